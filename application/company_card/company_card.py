@@ -1,24 +1,25 @@
 from pathlib import Path
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap, QIcon
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path, execute_query
+from resources.tools import resource_path, get_icon, get_window_icon, get_pixmap, ClientCardData, LazyTabWidget
 from .tabs import CompanyInformationTab, CurrentJobOrdersTab, OldCompanyJobOrdersTab
 
 application_path = str(resource_path(Path.cwd()))
 
 
 class ClientCard(QDialog):
-    def __init__(self, company_id=None, jobIds=None, parent=None):
+    def __init__(self, company_id=None, jobIds=None, parent=None, card_data=None):
         super().__init__(parent)
         self.setWindowTitle("Company Details")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.resize(1000, 800)  # Set the size of the dialog
 
         self.company_id = company_id
         self.job_ids = jobIds
+        # Everything the tabs display, fetched in two queries and shared by all of them
+        self.card_data = card_data or ClientCardData(company_id).load(show_errors=True)
         self.initUI()
 
         # Adjust the size to screen resolution
@@ -40,9 +41,7 @@ class ClientCard(QDialog):
 
         # Company icon label
         icon_label = QLabel()
-        icon_pixmap = QPixmap(str(Path(application_path, 'resources', 'icons',
-                                       'iconmonstr-building-20-white.svg')))  # Placeholder icon
-        scaled_pixmap = icon_pixmap.scaled(32, 32, Qt.KeepAspectRatio)
+        scaled_pixmap = get_pixmap('iconmonstr-building-20-white.svg', 32, 32)
         icon_label.setPixmap(scaled_pixmap)
         top_bar_layout.addWidget(icon_label)
 
@@ -50,39 +49,37 @@ class ClientCard(QDialog):
 
         # Tab layout
         tab_layout = QHBoxLayout()
-        tab_widget = QTabWidget()
+        # Tabs are only built when they are first shown
+        tab_widget = LazyTabWidget()
         tab_widget.setTabPosition(QTabWidget.North)
 
-        # Tabs
-        company_info_tab = CompanyInformationTab(self.company_id)
-        current_job_orders_tab = CurrentJobOrdersTab(self.company_id)
-        old_job_orders_tab = OldCompanyJobOrdersTab(self.company_id)
-
-        # Icons for tabs
-        icons = [
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-info-10.svg'))),
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-briefcase-5.svg'))),
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-inbox-22.svg')))
+        tabs = [
+            (self.createCompanyInformationTab, get_icon('iconmonstr-info-10.svg'), "Company Information"),
+            (self.createCurrentJobOrdersTab, get_icon('iconmonstr-briefcase-5.svg'), "Current Job Orders"),
+            (self.createOldJobOrdersTab, get_icon('iconmonstr-inbox-22.svg'), "Old Job Orders")
         ]
-        tab_titles = ["Company Information", "Current Job Orders", "Old Job Orders"]
-        tabs = [company_info_tab, current_job_orders_tab, old_job_orders_tab]
-
-        for title, tab, icon in zip(tab_titles, tabs, icons):
-            tab_widget.addTab(tab, icon, title)
+        for factory, icon, title in tabs:
+            tab_widget.addLazyTab(factory, icon, title)
 
         tab_layout.addWidget(tab_widget)
         main_layout.addLayout(tab_layout)
 
         self.setLayout(main_layout)
 
-    def fetchAndSetName(self):
-        # Fetch company name from the database
-        query = "SELECT employer_company FROM clients WHERE id = %s"
-        data = (self.company_id,)
+    def createCompanyInformationTab(self):
+        return CompanyInformationTab(self.company_id, self.card_data)
 
-        result = execute_query(query, data, fetch_mode="one")
-        if result:
-            self.name_label.setText(result[0])
+    def createCurrentJobOrdersTab(self):
+        return CurrentJobOrdersTab(self.company_id, card_data=self.card_data)
+
+    def createOldJobOrdersTab(self):
+        return OldCompanyJobOrdersTab(self.company_id, card_data=self.card_data)
+
+    def fetchAndSetName(self):
+        # Company name as loaded by the card
+        company_name = self.card_data.company.get("employer_company")
+        if company_name:
+            self.name_label.setText(company_name)
         else:
             self.name_label.setText("Company Name Not Available")
 
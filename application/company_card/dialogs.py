@@ -2,10 +2,11 @@ import re
 from pathlib import Path
 
 from PyQt5.QtCore import QTimer, pyqtSignal
-from PyQt5.QtGui import QTextDocument, QIcon
+from PyQt5.QtGui import QTextDocument
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path, load_json_file, execute_query
+from resources.tools import resource_path, execute_query, get_window_icon, repository_for, get_schema_metadata, \
+    save_custom_fields, set_custom_field, MAX_FIELD_NAME_LENGTH, SAVE_CONFLICT
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -47,6 +48,9 @@ class EditCompanyDialog(QDialog):
         self.company_id = company_id
         self.table_name = table_name
         self.company_data = company_data
+        # The form is filled from, and saved against, the row as it was when the dialog opened
+        self.repository = repository_for(table_name)
+        self.entity = self.repository.get(company_id)
         self.initUI()
         self.resize(600, 350)
 
@@ -87,6 +91,9 @@ class EditCompanyDialog(QDialog):
         db_keys = item['db_key']
         label_texts = [self.formatLabelText(key) for key in db_keys if key]
         current_values = self.getCurrentValues(item['value_widget'].text(), db_keys)
+        if self.entity is not None:
+            current_values = [self.entity.text(key) if key in self.entity else value
+                              for key, value in zip(db_keys, current_values)]
 
         for index, key in enumerate(db_keys):
             if key:  # Ensure key is not None
@@ -135,7 +142,6 @@ class EditCompanyDialog(QDialog):
         """
         Handles the save action, updating the database and UI fields with new values.
         """
-        updated_data = {}
         # First, gather new values for each db_key
         updated_data = {}
         error_messages = []
@@ -161,21 +167,41 @@ class EditCompanyDialog(QDialog):
 
             updated_data[key] = text_value
 
+        company = self.entity
+        if company is None:
+            QMessageBox.warning(self, "Validation Error", "The company could not be loaded from the database.")
+            return
+        custom_values = {}
+        for key, value in updated_data.items():
+            if key not in company:
+                # Fields added from the card are kept in the custom fields store
+                custom_values[key] = value
+                continue
+            try:
+                company.set(key, value)
+            except ValueError as e:
+                error_messages.append(str(e))
+
         # If there are validation errors, show them and abort the save
         if error_messages:
             QMessageBox.warning(self, "Validation Error", "\n".join(error_messages))
             return
 
-        # Update the database and UI fields with the new values
+        # Only the fields that changed are written, in a single UPDATE
+        saved = self.repository.save(company)
+        if saved == SAVE_CONFLICT:
+            QMessageBox.warning(self, "Validation Error",
+                                "The company was changed by someone else since this dialog was opened. Reopen "
+                                "the card to see their changes before editing it.")
+            return
+        if saved < 0:
+            return
+        if custom_values and save_custom_fields(self.table_name, self.company_id, custom_values) < 0:
+            return
+
+        # Update the UI fields with the new values
         for item in self.company_data:
             db_keys = item['db_key']
-            for key in db_keys:
-                if key in updated_data:
-                    value = updated_data[key] if updated_data[key] not in [None, 'N/A', 'NULL', 'None',
-                                                                           ''] else 'NULL'
-                    query = f"UPDATE {self.table_name} SET {key} = %s WHERE id = %s"
-                    execute_query(query, (value, self.company_id))
-
             # Update the corresponding value_widget in company_data
             new_text = concatenate_values(db_keys, [updated_data.get(key, '') for key in db_keys])
             formatted_value = f'<span style="color: grey;">{new_text}</span>'
@@ -222,7 +248,7 @@ class AddFieldDialog(QDialog):
         self.table_name = table_name
         self.added_fields = added_fields
         self.setWindowTitle("Add Employee Information")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.initUI()
         self.tempMsgBox = None  # Temporary storage for the message box
 
@@ -246,39 +272,30 @@ class AddFieldDialog(QDialog):
         buttonLayout.addWidget(saveButton)
         layout.addLayout(buttonLayout)
 
-    @staticmethod
-    def column_exists(table_name, column_name):
-        db_config = load_json_file()
-        database_name = db_config.get("database")
-        query = """
-            SELECT EXISTS (
-                SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = %s
-                AND TABLE_NAME = %s 
-                AND COLUMN_NAME = %s
-            ) AS `exists`;
-            """
-        # Assuming `execute_query` is a function that executes your SQL query and returns the results
-        # You need to replace 'your_database_name' with the actual name of your database
-        result = execute_query(query, (database_name, table_name, column_name), fetch_mode='one')
-
-        return result[0] == 1
-
     def onAddClicked(self):
         field = self.fieldEdit.text().strip()
         value = self.valueEdit.text()
         table = self.table_name
 
-        if not self.column_exists(table, field):
-            # Column does not exist, so add it
-            add_column_query = f"ALTER TABLE {table} ADD COLUMN {field} VARCHAR(255) NULL;"
-            execute_query(add_column_query)
-            print(f"Column {field} added.")
+        if not field or len(field) > MAX_FIELD_NAME_LENGTH:
+            QMessageBox.warning(self, "Input Error",
+                                f"The field name must be between 1 and {MAX_FIELD_NAME_LENGTH} characters long.")
+            return
 
-        # Now, update the record with the new value
-        update_query = f"UPDATE {table} SET {field} = %s WHERE id = %s"
-        data = (value, self._id)
-        execute_query(update_query, data)
+        schema = get_schema_metadata()
+        if field.lower() in (column.lower() for column in schema.defined_columns(table)):
+            QMessageBox.warning(self, "Input Error",
+                                f"'{field}' is already a field of every record. Edit it from the card instead.")
+            return
+
+        # Fields added before the custom fields store are columns of the table; the name is taken from the table
+        legacy_columns = {column.lower(): column for column in schema.extra_columns(table)}
+        if field.lower() in legacy_columns:
+            update_query = f"UPDATE {table} SET {legacy_columns[field.lower()]} = %s WHERE id = %s"
+            if execute_query(update_query, (value, self._id)).get("error"):
+                return
+        elif not set_custom_field(table, self._id, field, value):
+            return
 
         self.added_fields[field] = value
 
@@ -297,7 +314,7 @@ class AddFieldDialog(QDialog):
         self.tempMsgBox.setStandardButtons(QMessageBox.NoButton)
         self.tempMsgBox.setWindowTitle("Success")
         self.tempMsgBox.setWindowIcon(
-            QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+            get_window_icon())
         self.tempMsgBox.show()
 
         # Use a QTimer to close the message box after a delay
@@ -3,22 +3,27 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFontMetrics, QFont, QIcon
 from PyQt5.QtWidgets import *
 
 from application.job_order_card import JobOrderCard
-from resources.tools import resource_path, load_json_file, execute_query, find_output_directory
+from resources.tools import resource_path, find_output_directory, get_icon, ClientCardData, get_schema_metadata
 from .dialogs import EditCompanyDialog, AddFieldDialog
 
 application_path = str(resource_path(Path.cwd()))
 
 
 class CardTableWidget(QTableWidget):
-    def __init__(self, job_orders, *args, **kwargs):
+    def __init__(self, job_orders, opens_job_order_cards=True, *args, **kwargs):
+        """
+        Args:
+            job_orders (list): (database id, {column label: value}) for each row.
+            opens_job_order_cards (bool): Whether the ids are job order ids that open a job order card on
+                double-click (archived job orders keep the id of their archive row).
+        """
         super(CardTableWidget, self).__init__(*args, **kwargs)
-        self.job_ids = {}
+        self.opens_job_order_cards = opens_job_order_cards
         self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.setMouseTracking(True)  # Enable mouse tracking to show tooltips on hover
         self.horizontalHeader().sectionClicked.connect(self.onHeaderClicked)
@@ -30,35 +35,22 @@ class CardTableWidget(QTableWidget):
 
     def setupTable(self, job_orders):
         if job_orders:
-            self.setColumnCount(len(job_orders[0]))
-            self.setHorizontalHeaderLabels(job_orders[0].keys())
+            self.setColumnCount(len(job_orders[0][1]))
+            self.setHorizontalHeaderLabels(job_orders[0][1].keys())
 
     def populateTable(self, job_orders):
         self.setRowCount(len(job_orders))
-        for row_index, job_order in enumerate(job_orders):
-            job_title = job_order.get("Job Title", "")
-            po_order = job_order.get("PO Order Number", "")
-            company = job_order.get("Company", "")
-
-            # Assuming the job title is unique and you have a method to execute SQL queries
-            query = "SELECT id FROM job_orders WHERE job_title = %s AND po_order_number = %s AND company = %s"
-            result = execute_query(query, (job_title, po_order, company), fetch_mode="one")
-
-            if result:
-                job_id = result[0]
-                self.job_ids[row_index] = job_id  # Store the job_id associated with this row
-            else:
-                self.job_ids[row_index] = None  # No job_id found for this job title
-
+        for row_index, (job_id, job_order) in enumerate(job_orders):
             for col_index, (key, value) in enumerate(job_order.items()):
                 item = QTableWidgetItem(str(value))
                 item.setToolTip(str(value))  # Set tooltip for each cell
+                # Every cell carries the id of its row, so it survives sorting
+                item.setData(Qt.UserRole, job_id)
                 self.setItem(row_index, col_index, item)
 
     def onItemDoubleClicked(self, item):
-        row = item.row()
-        job_id = self.job_ids.get(row)
-        if job_id is not None:
+        job_id = item.data(Qt.UserRole)
+        if self.opens_job_order_cards and job_id is not None:
             jobOrderCard = JobOrderCard(job_id)
             jobOrderCard.exec_()
         else:
@@ -134,9 +126,10 @@ class CardTableWidget(QTableWidget):
 
 
 class CompanyInformationTab(QWidget):
-    def __init__(self, company_id=None):
+    def __init__(self, company_id=None, card_data=None):
         super().__init__()
         self.company_id = company_id
+        self.card_data = card_data or ClientCardData(company_id).load(show_errors=True)
         self.added_fields = {}
         self.ui_fields = []
         self.extra_columns = None
@@ -160,19 +153,14 @@ class CompanyInformationTab(QWidget):
         titleFont = QFont("Arial", 10, QFont.Bold)
         dataFont = QFont("Arial", 10)
 
-        # Fetching company data from the database
-        query = "SELECT * FROM clients WHERE id = %s"
-        data = (self.company_id,)
-        result = execute_query(query, data, fetch_mode="one", get_column_names=True)
-
         # Create the title label
         titleLabel = QLabel("<h2 style='color: #64bfd1;'>Company Information</h2>")
         titleLabel.setAlignment(Qt.AlignLeft)
         self.mainLayout.addWidget(titleLabel)
 
-        # Process and display fetched data
-        if result and 'result' in result and 'column_names' in result:
-            company_data = dict(zip(result['column_names'], result['result']))
+        # Process and display the company data loaded by the card
+        company_data = self.card_data.company
+        if company_data:
 
             # Add data rows to Company Information
             self.addDataRow(companyInfoLayout, "Company Name:", "employer_company", None, company_data, titleFont,
@@ -190,9 +178,9 @@ class CompanyInformationTab(QWidget):
                             dataFont)
 
             # User added data into Other Information
-            defined_columns = self.get_defined_columns_for_table("clients")
-            actual_columns = self.get_actual_columns_from_db("clients")
-            self.add_missing_columns_to_ui(otherInfoLayout, self.company_id, defined_columns, actual_columns,
+            defined_columns = get_schema_metadata().defined_columns("clients")
+            actual_columns = self.card_data.company_columns
+            self.add_missing_columns_to_ui(otherInfoLayout, company_data, defined_columns, actual_columns,
                                            titleFont, dataFont)
 
             # Set layout to the group box
@@ -209,12 +197,11 @@ class CompanyInformationTab(QWidget):
             buttonLayout = QHBoxLayout()
 
             addButton = QPushButton("Add Information")
-            addButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-plus-6.svg'))))
+            addButton.setIcon(get_icon('iconmonstr-plus-6.svg'))
             addButton.clicked.connect(self.onAddButtonClicked)
 
             editButton = QPushButton("Edit Information")
-            editButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons',
-                                              'iconmonstr-pencil-line-lined.svg'))))
+            editButton.setIcon(get_icon('iconmonstr-pencil-line-lined.svg'))
             editButton.clicked.connect(self.onEditButtonClicked)
 
             buttonLayout.addWidget(addButton)
@@ -265,39 +252,20 @@ class CompanyInformationTab(QWidget):
             if key not in self.extra_columns:
                 self.addDataRow(self.formLayout, key.replace('_', ' ').title() + ":", key, None,
                                 {key: value}, titleFont, dataFont)
+                self.extra_columns.add(key)
 
         self.added_fields = {}
 
-    @staticmethod
-    def get_defined_columns_for_table(table_name):
-        # Load the JSON schema for the table
-        table_schemas = load_json_file(Path(application_path, 'resources', 'tools', 'table_schemas.json'))
-        if table_name in table_schemas:
-            # Extract just the column names from the SQL definition
-            columns = [line.split()[0] for line in table_schemas[table_name] if line.upper().startswith('    ')]
-            return columns
-        return []
-
-    @staticmethod
-    def get_actual_columns_from_db(table_name):
-        query = "SHOW COLUMNS FROM " + table_name
-        result = execute_query(query, fetch_mode="all", skip_SELECT=True)
-        if result:
-            # The column name is the first item in each tuple returned
-            return [column[0] for column in result]
-        return []
-
-    def add_missing_columns_to_ui(self, formLayout, company_id, defined_columns, actual_columns, titleFont, dataFont):
-        # Find the difference between the actual columns and the defined columns
-        self.extra_columns = set(actual_columns) - set(defined_columns)
-        for column in self.extra_columns:
-            # Fetch the data for the extra column for the given employee
-            query = f"SELECT {column} FROM clients WHERE id = %s"
-            result = execute_query(query, (company_id,), fetch_mode="one")
-            if result:
-                # Display the extra data
-                self.addDataRow(formLayout, column.replace('_', ' ').title() + ":", column, None, {column: result[0]},
-                                titleFont, dataFont)
+    def add_missing_columns_to_ui(self, formLayout, company_data, defined_columns, actual_columns, titleFont,
+                                  dataFont):
+        # Columns added to the table before the custom fields store; their values came with the company row
+        extra_fields = {column: company_data.get(column) for column in set(actual_columns) - set(defined_columns)}
+        # Fields added from the card are kept in the custom fields store
+        extra_fields.update(self.card_data.custom_fields)
+        self.extra_columns = set(extra_fields)
+        for column, value in extra_fields.items():
+            self.addDataRow(formLayout, column.replace('_', ' ').title() + ":", column, None,
+                            {column: value}, titleFont, dataFont)
 
     def onEditButtonClicked(self):
         dialog = EditCompanyDialog(self.company_id, "clients", self.ui_fields, self)
@@ -309,16 +277,17 @@ class CompanyInformationTab(QWidget):
 
 
 class CurrentJobOrdersTab(QWidget):
-    def __init__(self, employer_id, parent=None):
+    def __init__(self, employer_id, parent=None, card_data=None):
         super().__init__(parent)
         self.employer_id = employer_id
+        self.card_data = card_data or ClientCardData(employer_id).load(show_errors=True)
         self.initUI()
 
     def initUI(self):
         layout = QVBoxLayout(self)
 
-        # Fetch employee name using company_id
-        self.company_name = self.fetch_company_name()
+        # Company name as loaded by the card
+        self.company_name = self.card_data.company_name
 
         # Fetch old job order details for this employee
         job_orders = self.fetch_old_job_orders()
@@ -387,29 +356,13 @@ class CurrentJobOrdersTab(QWidget):
         layout.addWidget(scrollArea)
         layout.addLayout(self.filterRowLayout)
 
-    def fetch_company_name(self):
-        # Fetch the first and last name of the employee from the employees table
-        query = "SELECT employer_company FROM clients WHERE id = %s"
-        result = execute_query(query, (self.employer_id,), fetch_mode="one")
-        if result:
-            # Directly return the tuple assuming the first element is first_name and the second is last_name
-            return result[0]
-        return "Unknown"
-
     def fetch_old_job_orders(self):
-        # Assuming execute_query returns a list of tuples, convert them to dictionaries
-        query = """
-        SELECT job_title, po_order_number, company, location, start_date, end_date, active_employees, needed_employees, 
-        position_type, bill_rate_min, bill_rate_max, bill_rate_conversion, pay_rate, pay_rate_conversion,
-        min_experience, requirements, remote, job_description_path, notes_path
-        FROM job_orders
-        WHERE company = %s
-        """
-        results = execute_query(query, (self.company_name,), fetch_mode="all")
+        # The job orders came with the card data, in the order of CURRENT_JOB_ORDER_COLUMNS
+        results = self.card_data.current_job_orders
         columns = ["Job Title", "PO Order Number", "Company", "Location", "Start Date", "End Date", "Active Employees",
                    "Needed Employees", "Position Type", "Bill Rate (Min)", "Bill Rate (Max)", "Bill Rate", "Pay",
                    "Pay Rate", "Min Experience", "Requirements", "Remote (%)", "Job Description Path", "Notes Path"]
-        job_orders = [dict(zip(columns, result)) for result in results]
+        job_orders = [(row.id, dict(zip(columns, row.values))) for row in results]
         return job_orders
 
     def updateButtonStyle(self, sender):
@@ -472,6 +425,7 @@ class CurrentJobOrdersTab(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.table.horizontalHeaderItem(i).text() for i in
                                              range(self.table.columnCount())])
 
@@ -514,16 +468,17 @@ class CurrentJobOrdersTab(QWidget):
 
 
 class OldCompanyJobOrdersTab(QWidget):
-    def __init__(self, employer_id, parent=None):
+    def __init__(self, employer_id, parent=None, card_data=None):
         super().__init__(parent)
         self.employer_id = employer_id
+        self.card_data = card_data or ClientCardData(employer_id).load(show_errors=True)
         self.initUI()
 
     def initUI(self):
         layout = QVBoxLayout(self)
 
-        # Fetch employee name using company_id
-        self.company_name = self.fetch_company_name()
+        # Company name as loaded by the card
+        self.company_name = self.card_data.company_name
 
         # Fetch old job order details for this employee
         job_orders = self.fetch_old_job_orders()
@@ -559,7 +514,7 @@ class OldCompanyJobOrdersTab(QWidget):
                 """)
 
         # Set up the table
-        self.table = CardTableWidget(job_orders)
+        self.table = CardTableWidget(job_orders, opens_job_order_cards=False)
         scrollLayout.addWidget(self.table)
         scrollArea.setWidget(scrollWidget)
 
@@ -592,29 +547,13 @@ class OldCompanyJobOrdersTab(QWidget):
         layout.addWidget(scrollArea)
         layout.addLayout(self.filterRowLayout)
 
-    def fetch_company_name(self):
-        # Fetch the first and last name of the employee from the employees table
-        query = "SELECT employer_company FROM clients WHERE id = %s"
-        result = execute_query(query, (self.employer_id,), fetch_mode="one")
-        if result:
-            # Directly return the tuple assuming the first element is first_name and the second is last_name
-            return result[0]
-        return "Unknown"
-
     def fetch_old_job_orders(self):
-        # Assuming execute_query returns a list of tuples, convert them to dictionaries
-        query = """
-        SELECT contact_person, location, po_order_number, start_date, end_date, needed_employees, job_title, 
-        position_type, bill_rate_min, bill_rate_max, bill_rate_conversion, pay_rate, pay_rate_conversion,
-        min_experience, requirements, remote, job_description_path, notes_path
-        FROM old_company_job_orders
-        WHERE employer_company = %s
-        """
-        results = execute_query(query, (self.company_name,), fetch_mode="all")
+        # The archived job orders came with the card data, in the order of OLD_COMPANY_JOB_ORDER_COLUMNS
+        results = self.card_data.old_job_orders
         columns = ["Contact Person", "Location", "PO Order Number", "Start Date", "End Date", "Needed Employees",
                    "Job Title", "Position Type", "Bill Rate (Min)", "Bill Rate (Max)", "Bill Rate", "Pay Rate",
                    "Pay Rate", "Min Experience", "Requirements", "Remote (%)", "Job Description Path", "Notes Path"]
-        job_orders = [dict(zip(columns, result)) for result in results]
+        job_orders = [(row.id, dict(zip(columns, row.values))) for row in results]
         return job_orders
 
     def updateButtonStyle(self, sender):
@@ -677,6 +616,7 @@ class OldCompanyJobOrdersTab(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.table.horizontalHeaderItem(i).text() for i in
                                              range(self.table.columnCount())])
 
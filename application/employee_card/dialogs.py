@@ -3,11 +3,12 @@ import re
 from pathlib import Path
 
 from PyQt5.QtCore import QTimer, pyqtSignal, QDate
-from PyQt5.QtGui import QFont, QTextDocument, QIcon
+from PyQt5.QtGui import QFont, QTextDocument
 from PyQt5.QtWidgets import *
 
 from resources.tools import resource_path, retrieve_current_job_order, \
-    change_active_needed_employees, load_json_file, execute_query
+    change_active_needed_employees, execute_query, get_window_icon, repository_for, get_schema_metadata, \
+    save_custom_fields, set_custom_field, store_document, MAX_FIELD_NAME_LENGTH, SAVE_CONFLICT
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -38,6 +39,9 @@ class EditEmployeeDialog(QDialog):
         self.employee_id = employee_id
         self.table_name = table_name
         self.employee_data = employee_data
+        # The form is filled from, and saved against, the row as it was when the dialog opened
+        self.repository = repository_for(table_name)
+        self.entity = self.repository.get(employee_id)
         self.initUI()
         self.resize(500, 600)
 
@@ -78,6 +82,9 @@ class EditEmployeeDialog(QDialog):
         db_keys = item['db_key']
         label_texts = [self.formatLabelText(key) for key in db_keys if key]
         current_values = self.getCurrentValues(item['value_widget'].text(), db_keys)
+        if self.entity is not None:
+            current_values = [self.entity.text(key) if key in self.entity else value
+                              for key, value in zip(db_keys, current_values)]
 
         for index, key in enumerate(db_keys):
             if key:  # Ensure key is not None
@@ -193,45 +200,56 @@ class EditEmployeeDialog(QDialog):
             if text_value == 'N/A':
                 continue
 
-            # Check and format 'hired_date'
-            if 'date' in key:
-                try:
-                    QDate.fromString(text_value, 'dd/MM/yyyy').toString('yyyy-MM-dd')
-                except ValueError:
-                    error_messages.append(f"{key} must be in 'DD/MM/YYYY' format.")
-                    continue
-
-                # Validate 'pay' to be a float
-            if key == 'pay':
+            # Validate 'pay' to be a float
+            if key == 'pay' and text_value:
                 try:
                     float(text_value)
                 except ValueError:
                     error_messages.append(f"{key} must be a valid number.")
                     continue
 
-                # Specific validation for 'availability', 'employee_type', etc., can be added here
-
-                # If all validations pass, add the data to updated_data
             updated_data[key] = text_value
 
-            # If there are validation errors, show them and abort the save
-            if error_messages:
-                QMessageBox.warning(self, "Validation Error", "\n".join(error_messages))
-                return
+        # Dates and other typed columns are validated while setting them on the employee
+        employee = self.entity
+        if employee is None:
+            QMessageBox.warning(self, "Validation Error", "The employee could not be loaded from the database.")
+            return
+        custom_values = {}
+        for key, value in updated_data.items():
+            if key not in employee:
+                # Fields added from the card are kept in the custom fields store
+                custom_values[key] = value
+                continue
+            try:
+                if key == 'resume_path' and value != employee.get(key):
+                    # A newly picked resume is copied into the document store
+                    value = store_document(value)
+                employee.set(key, value)
+            except ValueError as e:
+                error_messages.append(str(e))
+            except OSError as e:
+                error_messages.append(f"The resume could not be stored: {e}")
+
+        # If there are validation errors, show them and abort the save
+        if error_messages:
+            QMessageBox.warning(self, "Validation Error", "\n".join(error_messages))
+            return
+
+        # Only the fields that changed are written, in a single UPDATE
+        saved = self.repository.save(employee)
+        if saved == SAVE_CONFLICT:
+            QMessageBox.warning(self, "Validation Error",
+                                "The employee was changed by someone else since this dialog was opened. Reopen "
+                                "the card to see their changes before editing it.")
+            return
+        if saved < 0:
+            return
+        if custom_values and save_custom_fields(self.table_name, self.employee_id, custom_values) < 0:
+            return
 
-        # Update the database and UI
         for item in self.employee_data:
             db_keys = item['db_key']
-            for key in db_keys:
-                if key in updated_data:
-                    value = updated_data[key]
-                    # Prepare value for SQL query (handle NULL values)
-                    if value in [None, 'N/A', 'NULL', 'None', '']:
-                        value = 'NULL'
-                    # Construct SQL query differently based on whether value is None or not
-                    query = f"UPDATE {self.table_name} SET {key} = %s WHERE id = %s"
-                    execute_query(query, (value, self.employee_id))
-
             # Update the UI component
             new_values = [updated_data.get(key, '') for key in db_keys]
             new_text = self.concatenate_values(db_keys, new_values)
@@ -303,7 +321,7 @@ class AddFieldDialog(QDialog):
         self.table_name = table_name
         self.added_fields = added_fields
         self.setWindowTitle("Add Employee Information")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.initUI()
         self.tempMsgBox = None  # Temporary storage for the message box
 
@@ -327,39 +345,30 @@ class AddFieldDialog(QDialog):
         buttonLayout.addWidget(saveButton)
         layout.addLayout(buttonLayout)
 
-    @staticmethod
-    def column_exists(table_name, column_name):
-        db_config = load_json_file()
-        database_name = db_config.get("database")
-        query = """
-            SELECT EXISTS (
-                SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = %s
-                AND TABLE_NAME = %s 
-                AND COLUMN_NAME = %s
-            ) AS `exists`;
-            """
-        # Assuming `execute_query` is a function that executes your SQL query and returns the results
-        # You need to replace 'your_database_name' with the actual name of your database
-        result = execute_query(query, (database_name, table_name, column_name), fetch_mode='one')
-
-        return result[0] == 1
-
     def onAddClicked(self):
         field = self.fieldEdit.text().strip()
         value = self.valueEdit.text()
         table = self.table_name
 
-        if not self.column_exists(table, field):
-            # Column does not exist, so add it
-            add_column_query = f"ALTER TABLE {table} ADD COLUMN {field} VARCHAR(255) NULL;"
-            execute_query(add_column_query)
-            print(f"Column {field} added.")
+        if not field or len(field) > MAX_FIELD_NAME_LENGTH:
+            QMessageBox.warning(self, "Input Error",
+                                f"The field name must be between 1 and {MAX_FIELD_NAME_LENGTH} characters long.")
+            return
+
+        schema = get_schema_metadata()
+        if field.lower() in (column.lower() for column in schema.defined_columns(table)):
+            QMessageBox.warning(self, "Input Error",
+                                f"'{field}' is already a field of every record. Edit it from the card instead.")
+            return
 
-        # Now, update the record with the new value
-        update_query = f"UPDATE {table} SET {field} = %s WHERE id = %s"
-        data = (value, self._id)
-        execute_query(update_query, data)
+        # Fields added before the custom fields store are columns of the table; the name is taken from the table
+        legacy_columns = {column.lower(): column for column in schema.extra_columns(table)}
+        if field.lower() in legacy_columns:
+            update_query = f"UPDATE {table} SET {legacy_columns[field.lower()]} = %s WHERE id = %s"
+            if execute_query(update_query, (value, self._id)).get("error"):
+                return
+        elif not set_custom_field(table, self._id, field, value):
+            return
 
         self.added_fields[field] = value
 
@@ -377,8 +386,7 @@ class AddFieldDialog(QDialog):
         self.tempMsgBox.setText(message)
         self.tempMsgBox.setStandardButtons(QMessageBox.NoButton)
         self.tempMsgBox.setWindowTitle("Success")
-        self.tempMsgBox.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons',
-                                                     'crm-icon-high-seas.png'))))
+        self.tempMsgBox.setWindowIcon(get_window_icon())
         self.tempMsgBox.show()
 
         # Use a QTimer to close the message box after a delay
@@ -404,7 +412,7 @@ class ManageJobOrderDialog(QDialog):
         self.jobData = job_data
         self.employee_id = employee_id
         self.setWindowTitle("Job Order Control Page")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.initUI()
 
     def initUI(self):
@@ -1,25 +1,27 @@
 from pathlib import Path
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap, QIcon
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path, execute_query
+from resources.tools import resource_path, get_icon, get_window_icon, get_pixmap, EmployeeCardData, LazyTabWidget
 from .tabs import GeneralDataTab, CompanyDataTab, JobOrderDataTab, OldJobOrdersTab
 
 application_path = str(resource_path(Path.cwd()))
 
 
 class EmployeeCard(QDialog):
-    def __init__(self, database_id=None, employer_id=None, job_order_id=None, parent=None):
+    def __init__(self, database_id=None, employer_id=None, job_order_id=None, parent=None, card_data=None):
         super().__init__(parent)
         self.setWindowTitle("Employee Details")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.resize(800, 800)  # Set the size of the dialog
 
         self.database_id = database_id
-        self.employer_id = employer_id
-        self.job_order_id = job_order_id
+        # Everything the tabs display, fetched in two queries and shared by all of them
+        self.card_data = card_data or EmployeeCardData(database_id, employer_id, job_order_id).load(show_errors=True)
+        # Prefetched data may have looked up the current placement itself
+        self.employer_id = self.card_data.employer_id
+        self.job_order_id = self.card_data.job_order_id
         self.initUI()
 
         # Force the QDialog to never be larger than the screen resolution
@@ -41,8 +43,7 @@ class EmployeeCard(QDialog):
 
         # Person icon label
         person_icon_label = QLabel()
-        icon_pixmap = QPixmap(str(Path(application_path, 'resources', 'icons', 'iconmonstr-construction-3-white.svg')))
-        scaled_pixmap = icon_pixmap.scaled(32, 32, Qt.KeepAspectRatio)  # Scale the pixmap
+        scaled_pixmap = get_pixmap('iconmonstr-construction-3-white.svg', 32, 32)
         person_icon_label.setPixmap(scaled_pixmap)
         top_bar_layout.addWidget(person_icon_label)
 
@@ -50,35 +51,18 @@ class EmployeeCard(QDialog):
 
         # Tab layout with icons
         tab_layout = QHBoxLayout()
-        left_tab_widget = QTabWidget()
+        # Tabs are only built when they are first shown
+        left_tab_widget = LazyTabWidget()
         left_tab_widget.setTabPosition(QTabWidget.North)
 
-        # Home Tab
-        general_tab = GeneralDataTab(self.database_id)
-
-        # Edit Tab
-        company_tab = CompanyDataTab(self.employer_id, self.job_order_id)
-
-        # Job Order Tab
-        job_order_tab = JobOrderDataTab(self.database_id, self.job_order_id)
-        job_order_tab.refreshPages.connect(self.handleDataUpdated)
-
-        # Old Job Orders Tab
-        old_job_orders_tab = OldJobOrdersTab(self.database_id)
-
-        # Post-processing
-        icons = [
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-info-10.svg'))),
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-building-20.svg'))),
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-briefcase-5.svg'))),
-            QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-inbox-22.svg')))
+        tabs = [
+            (self.createGeneralTab, get_icon('iconmonstr-info-10.svg'), "Employee"),
+            (self.createCompanyTab, get_icon('iconmonstr-building-20.svg'), "Company"),
+            (self.createJobOrderTab, get_icon('iconmonstr-briefcase-5.svg'), "Current Job Order"),
+            (self.createOldJobOrdersTab, get_icon('iconmonstr-inbox-22.svg'), "Old Job Orders")
         ]
-        tab_titles = ["Employee", "Company", "Current Job Order", "Old Job Orders"]
-        tabs = [general_tab, company_tab, job_order_tab, old_job_orders_tab]
-
-        for title, tab, icon in zip(tab_titles, tabs, icons):
-            wrapped_title = self.wrap_text(title, max_length=10)
-            left_tab_widget.addTab(tab, icon, title)
+        for factory, icon, title in tabs:
+            left_tab_widget.addLazyTab(factory, icon, title)
 
         tab_layout.addWidget(left_tab_widget)
         tab_layout.addStretch()  # Add stretch to the right of the tabs
@@ -86,6 +70,20 @@ class EmployeeCard(QDialog):
 
         self.setLayout(main_layout)
 
+    def createGeneralTab(self):
+        return GeneralDataTab(self.database_id, self.card_data)
+
+    def createCompanyTab(self):
+        return CompanyDataTab(self.employer_id, self.job_order_id, self.card_data)
+
+    def createJobOrderTab(self):
+        job_order_tab = JobOrderDataTab(self.database_id, self.job_order_id, self.card_data)
+        job_order_tab.refreshPages.connect(self.handleDataUpdated)
+        return job_order_tab
+
+    def createOldJobOrdersTab(self):
+        return OldJobOrdersTab(self.database_id, card_data=self.card_data)
+
     def handleDataUpdated(self):
         # Logic that decides when to close and reinitialize
         self.close()  # Close the dialog
@@ -98,16 +96,11 @@ class EmployeeCard(QDialog):
         return text
 
     def fetchAndSetName(self):
-        # SQL query to get first_name and last_name based on database_id
-        query = "SELECT first_name, last_name FROM employees WHERE id = %s"
-        data = (self.database_id,)
-
-        # Assuming execute_query is a function that executes the query and returns the result
-        result = execute_query(query, data, fetch_mode="one")
+        first_name = self.card_data.employee.get("first_name")
+        last_name = self.card_data.employee.get("last_name")
 
-        # Check if result is not None and has required data
-        if result and result[0] and result[1]:
-            first_name, last_name = result
+        # Check if the employee was found and has required data
+        if first_name and last_name:
             full_name = f"{first_name} {last_name}"
             self.name_label.setText(full_name)
         else:
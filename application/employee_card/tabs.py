@@ -3,7 +3,6 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont, QFontMetrics, QIcon
 from PyQt5.QtWidgets import *
@@ -11,7 +10,8 @@ from PyQt5.QtWidgets import *
 from application.company_card import ClientCard
 from application.job_order_card import JobOrderCard
 from resources.tools import resource_path, archive_and_delete_employee_job_order, retrieve_current_job_order, \
-    change_active_needed_employees, read_text_file, load_json_file, execute_query, find_output_directory
+    change_active_needed_employees, execute_query, find_output_directory, DocumentPane, get_icon, EmployeeCardData, \
+    get_schema_metadata, get_card_prefetcher
 from .dialogs import EditEmployeeDialog, AddFieldDialog, ManageJobOrderDialog
 
 application_path = str(resource_path(Path.cwd()))
@@ -30,15 +30,17 @@ class CardTableWidget(QTableWidget):
 
     def setupTable(self, job_orders):
         if job_orders:
-            self.setColumnCount(len(job_orders[0]))
-            self.setHorizontalHeaderLabels(job_orders[0].keys())
+            self.setColumnCount(len(job_orders[0][1]))
+            self.setHorizontalHeaderLabels(job_orders[0][1].keys())
 
     def populateTable(self, job_orders):
         self.setRowCount(len(job_orders))
-        for row_index, job_order in enumerate(job_orders):
+        for row_index, (job_id, job_order) in enumerate(job_orders):
             for col_index, (key, value) in enumerate(job_order.items()):
                 item = QTableWidgetItem(str(value))
                 item.setToolTip(str(value))  # Set tooltip for each cell
+                # Every cell carries the id of its row, so it survives sorting
+                item.setData(Qt.UserRole, job_id)
                 self.setItem(row_index, col_index, item)
 
     def onHeaderClicked(self, logicalIndex):
@@ -111,9 +113,10 @@ class CardTableWidget(QTableWidget):
 
 
 class GeneralDataTab(QWidget):
-    def __init__(self, employee_id=None):
+    def __init__(self, employee_id=None, card_data=None):
         super().__init__()
         self.employee_id = employee_id
+        self.card_data = card_data or EmployeeCardData(employee_id).load(show_errors=True)
         self.added_fields = {}
         self.ui_fields = []
         self.extra_columns = None
@@ -137,19 +140,14 @@ class GeneralDataTab(QWidget):
         titleFont = QFont("Arial", 10, QFont.Bold)
         dataFont = QFont("Arial", 10)
 
-        # Fetching employee data from the database
-        query = "SELECT * FROM employees WHERE id = %s"
-        data = (self.employee_id,)
-        result = execute_query(query, data, fetch_mode="one", get_column_names=True)
-
         # Create the title label
         titleLabel = QLabel("<h2 style='color: #64bfd1;'>Employee Information</h2>")
         titleLabel.setAlignment(Qt.AlignLeft)
         self.mainLayout.addWidget(titleLabel)
 
-        # Process and display fetched data
-        if result and 'result' in result and 'column_names' in result:
-            employee_data = dict(zip(result['column_names'], result['result']))
+        # Process and display the employee data loaded by the card
+        employee_data = self.card_data.employee
+        if employee_data:
 
             # Add rows to General Information
             self.addDataRow(generalInfoLayout, "Employee:", "first_name", "last_name", employee_data, titleFont,
@@ -168,9 +166,9 @@ class GeneralDataTab(QWidget):
             self.addDataRow(jobInfoLayout, "Employee Type:", "employee_type", None, employee_data, titleFont, dataFont)
 
             # User added data into Other Information
-            defined_columns = self.get_defined_columns_for_table("employees")
-            actual_columns = self.get_actual_columns_from_db("employees")
-            self.add_missing_columns_to_ui(otherInfoLayout, self.employee_id, defined_columns, actual_columns,
+            defined_columns = get_schema_metadata().defined_columns("employees")
+            actual_columns = self.card_data.employee_columns
+            self.add_missing_columns_to_ui(otherInfoLayout, employee_data, defined_columns, actual_columns,
                                            titleFont, dataFont)
 
             # Set layouts to group boxes
@@ -187,12 +185,11 @@ class GeneralDataTab(QWidget):
             buttonLayout = QHBoxLayout()
 
             addButton = QPushButton("Add Information")
-            addButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-plus-6.svg'))))
+            addButton.setIcon(get_icon('iconmonstr-plus-6.svg'))
             addButton.clicked.connect(self.onAddButtonClicked)
 
             editButton = QPushButton("Edit Information")
-            editButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons',
-                                              'iconmonstr-pencil-line-lined.svg'))))
+            editButton.setIcon(get_icon('iconmonstr-pencil-line-lined.svg'))
             editButton.clicked.connect(self.onEditButtonClicked)
 
             buttonLayout.addWidget(addButton)
@@ -265,39 +262,20 @@ class GeneralDataTab(QWidget):
             if key not in self.extra_columns:
                 self.addDataRow(self.formLayout, key.replace('_', ' ').title() + ":", key, None,
                                 {key: value}, titleFont, dataFont)
+                self.extra_columns.add(key)
 
         self.added_fields = {}
 
-    @staticmethod
-    def get_defined_columns_for_table(table_name):
-        # Load the JSON schema for the table
-        table_schemas = load_json_file(Path(application_path, 'resources', 'tools', 'table_schemas.json'))
-        if table_name in table_schemas:
-            # Extract just the column names from the SQL definition
-            columns = [line.split()[0] for line in table_schemas[table_name] if line.upper().startswith('    ')]
-            return columns
-        return []
-
-    @staticmethod
-    def get_actual_columns_from_db(table_name):
-        query = "SHOW COLUMNS FROM " + table_name
-        result = execute_query(query, fetch_mode="all", skip_SELECT=True)
-        if result:
-            # The column name is the first item in each tuple returned
-            return [column[0] for column in result]
-        return []
-
-    def add_missing_columns_to_ui(self, formLayout, employee_id, defined_columns, actual_columns, titleFont, dataFont):
-        # Find the difference between the actual columns and the defined columns
-        self.extra_columns = set(actual_columns) - set(defined_columns)
-        for column in self.extra_columns:
-            # Fetch the data for the extra column for the given employee
-            query = f"SELECT {column} FROM employees WHERE id = %s"
-            result = execute_query(query, (employee_id,), fetch_mode="one")
-            if result:
-                # Display the extra data
-                self.addDataRow(formLayout, column.replace('_', ' ').title() + ":", column, None, {column: result[0]},
-                                titleFont, dataFont)
+    def add_missing_columns_to_ui(self, formLayout, employee_data, defined_columns, actual_columns, titleFont,
+                                  dataFont):
+        # Columns added to the table before the custom fields store; their values came with the employee row
+        extra_fields = {column: employee_data.get(column) for column in set(actual_columns) - set(defined_columns)}
+        # Fields added from the card are kept in the custom fields store
+        extra_fields.update(self.card_data.custom_fields)
+        self.extra_columns = set(extra_fields)
+        for column, value in extra_fields.items():
+            self.addDataRow(formLayout, column.replace('_', ' ').title() + ":", column, None,
+                            {column: value}, titleFont, dataFont)
 
     def onEditButtonClicked(self):
         dialog = EditEmployeeDialog(self.employee_id, "employees", self.ui_fields, self)
@@ -309,10 +287,11 @@ class GeneralDataTab(QWidget):
 
 
 class CompanyDataTab(QWidget):
-    def __init__(self, employer_id=None, job_id=None):
+    def __init__(self, employer_id=None, job_id=None, card_data=None):
         super().__init__()
         self.employer_id = employer_id
         self.job_id = job_id
+        self.card_data = card_data
         self.initUI()
 
     def initUI(self):
@@ -324,9 +303,9 @@ class CompanyDataTab(QWidget):
 
         # Check if the employee ID is provided and not None
         if self.employer_id is not None:
-            # If a current job ID is found, fetch company data
+            # If a current job ID is found, use the company data loaded by the card
             if self.job_id:
-                company_data = self.get_company_data(self.employer_id)
+                company_data = self.card_data.company if self.card_data else self.get_company_data(self.employer_id)
             else:
                 company_data = {}
         else:
@@ -352,7 +331,7 @@ class CompanyDataTab(QWidget):
         buttonLayout = QHBoxLayout()
         actionButton = QPushButton("Open Client Card")
         # Set an icon for the button if desired
-        actionButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-share-8.svg'))))
+        actionButton.setIcon(get_icon('iconmonstr-share-8.svg'))
         actionButton.clicked.connect(self.onActionButtonClicked)
         buttonLayout.addWidget(actionButton)
         buttonLayout.addStretch()
@@ -405,31 +384,20 @@ class CompanyDataTab(QWidget):
         if self.employer_id is None:
             QMessageBox.warning(self, "No Company Found", "No company was found for the selected employee.")
             return
-        allJobIds = self.getAllJobIds(self.employer_id)
-        clientCard = ClientCard(self.employer_id, allJobIds)  # Ensure you pass the correct ID here
+        # The client card data carries the ids of the client's job orders
+        cardData = get_card_prefetcher().take_or_load("client", self.employer_id)
+        clientCard = ClientCard(self.employer_id, cardData.job_order_ids or None, card_data=cardData)
         clientCard.exec_()
 
-    @staticmethod
-    def getAllJobIds(_id):
-        company_name_query = f"SELECT employer_company FROM clients WHERE id = %s"
-        company_name = execute_query(company_name_query, (_id,))
-        query = f"SELECT id FROM job_orders WHERE company = %s"
-        result = execute_query(query, company_name, fetch_mode="all")
-
-        if result:
-            return result
-        else:
-            return None
-
 
 class JobOrderDataTab(QWidget):
     refreshPages = pyqtSignal()
 
-    def __init__(self, employee_id=None, job_id=None):
+    def __init__(self, employee_id=None, job_id=None, card_data=None):
         super().__init__()
         self.job_id = job_id
         self.employee_id = employee_id
-        self.jobData = self.fetch_job_data()
+        self.jobData = card_data.job_order if card_data else self.fetch_job_data()
         self.initUI()
         self.setMinimumWidth(1200)
 
@@ -509,18 +477,10 @@ class JobOrderDataTab(QWidget):
         jobNotesGroup = QGroupBox("Job Description and Notes")
         jobNotesLayout = QVBoxLayout()
 
-        # Read job_description and notes from text files
-        if self.jobData.get('job_description_path', '') in [None, 'N/A', 'NULL', 'None', '']:
-            job_description = "No Job Description Found."
-        else:
-            job_description = read_text_file(self.jobData.get('job_description_path', ''))
-        if self.jobData.get('notes_path', '') in [None, 'N/A', 'NULL', 'None', '']:
-            notes = "No Notes Found."
-        else:
-            notes = read_text_file(self.jobData.get('notes_path', ''))
-
-        self.addDataLabel(jobNotesLayout, "Job Description:", job_description, wrapText=True, HBox=False)
-        self.addDataLabel(jobNotesLayout, "Notes:", notes, wrapText=True, HBox=False)
+        # The job description and notes are read in the background once the tab is shown
+        self.addDocumentPane(jobNotesLayout, "Job Description:", self.jobData.get('job_description_path', ''),
+                             "No Job Description Found.")
+        self.addDocumentPane(jobNotesLayout, "Notes:", self.jobData.get('notes_path', ''), "No Notes Found.")
 
         jobNotesGroup.setLayout(jobNotesLayout)
 
@@ -531,19 +491,19 @@ class JobOrderDataTab(QWidget):
 
         # Buttons
         buttonLayout = QVBoxLayout()
-        plus_icon = QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-plus-6.svg')))
+        plus_icon = get_icon('iconmonstr-plus-6.svg')
         addToJobOrderButton = QPushButton("Add to")
         addToJobOrderButton.setIcon(plus_icon)
 
-        x_icon = QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-x-mark-circle-lined.svg')))
+        x_icon = get_icon('iconmonstr-x-mark-circle-lined.svg')
         removeFromJobOrderButton = QPushButton("Remove from")
         removeFromJobOrderButton.setIcon(x_icon)
 
-        change_icon = QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-redo-6.svg')))
+        change_icon = get_icon('iconmonstr-redo-6.svg')
         changeJobOrderButton = QPushButton("Change")
         changeJobOrderButton.setIcon(change_icon)
 
-        open_icon = QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-share-8.svg')))
+        open_icon = get_icon('iconmonstr-share-8.svg')
         openButton = QPushButton("Open Job Order Card")
         openButton.setIcon(open_icon)
 
@@ -670,6 +630,14 @@ class JobOrderDataTab(QWidget):
         # Add the horizontal layout to the main layout
         layout.addLayout(rowLayout)
 
+    @staticmethod
+    def addDocumentPane(layout, labelText, filePath, emptyText):
+        """Adds a label followed by a document pane that loads the file asynchronously."""
+        labelWidget = QLabel(f"{labelText}")
+        labelWidget.setFont(QFont("Arial", 10, QFont.Bold))
+        layout.addWidget(labelWidget)
+        layout.addWidget(DocumentPane(filePath, empty_text=emptyText))
+
     def openJobOrderCard(self, dbId):
         if dbId is None:
             QMessageBox.warning(self, "No Job Order Found", "No job order was found for the selected employee.")
@@ -687,16 +655,17 @@ class JobOrderDataTab(QWidget):
 
 
 class OldJobOrdersTab(QWidget):
-    def __init__(self, employee_id, parent=None):
+    def __init__(self, employee_id, parent=None, card_data=None):
         super().__init__(parent)
         self.employee_id = employee_id
+        self.card_data = card_data or EmployeeCardData(employee_id).load(show_errors=True)
         self.initUI()
 
     def initUI(self):
         layout = QVBoxLayout(self)
 
-        # Fetch employee name using employee_id
-        self.employee_first_name, self.employee_last_name = self.fetch_employee_name()
+        # Employee name as loaded by the card
+        self.employee_first_name, self.employee_last_name = self.card_data.employee_name
 
         # Fetch old job order details for this employee
         job_orders = self.fetch_old_job_orders()
@@ -765,26 +734,12 @@ class OldJobOrdersTab(QWidget):
         layout.addWidget(scrollArea)
         layout.addLayout(self.filterRowLayout)
 
-    def fetch_employee_name(self):
-        # Fetch the first and last name of the employee from the employees table
-        query = "SELECT first_name, last_name FROM employees WHERE id = %s"
-        result = execute_query(query, (self.employee_id,), fetch_mode="one")
-        if result:
-            # Directly return the tuple assuming the first element is first_name and the second is last_name
-            return result
-        return "Unknown", "Unknown"
-
     def fetch_old_job_orders(self):
-        # Assuming execute_query returns a list of tuples, convert them to dictionaries
-        query = """
-        SELECT hired_date, pay, pay_conversion, po_order_number, location, company, job_title, position_type, remote
-        FROM old_employee_job_orders
-        WHERE first_name = %s AND last_name = %s
-        """
-        results = execute_query(query, (self.employee_first_name, self.employee_last_name), fetch_mode="all")
+        # The archived job orders came with the card data, in the order of OLD_EMPLOYEE_JOB_ORDER_COLUMNS
+        results = self.card_data.old_job_orders
         columns = ["Hired Date", "Pay", "Pay Rate", "PO Order Number", "Location", "Company", "Job Title",
                    "Position Type", "Remote (%)"]
-        job_orders = [dict(zip(columns, result)) for result in results]
+        job_orders = [(row.id, dict(zip(columns, row.values))) for row in results]
         return job_orders
 
     def updateButtonStyle(self, sender):
@@ -847,6 +802,7 @@ class OldJobOrdersTab(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.table.horizontalHeaderItem(i).text() for i in
                                              range(self.table.columnCount())])
 
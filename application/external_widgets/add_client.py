@@ -1,10 +1,10 @@
 from pathlib import Path
 
 from PyQt5.QtCore import QRegExp
-from PyQt5.QtGui import QRegExpValidator, QIcon
+from PyQt5.QtGui import QRegExpValidator
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path
+from resources.tools import resource_path, get_window_icon
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -21,7 +21,7 @@ class AddClientDialog(QDialog):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Add New Client")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.layout = QFormLayout(self)
 
         # Initialize input fields with labels
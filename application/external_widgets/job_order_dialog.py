@@ -2,10 +2,11 @@ from decimal import Decimal
 from pathlib import Path
 
 from PyQt5.QtCore import QRegExp, QDate, QPoint, Qt
-from PyQt5.QtGui import QRegExpValidator, QKeyEvent, QIcon
+from PyQt5.QtGui import QRegExpValidator, QKeyEvent
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path, read_text_file, execute_query, find_output_directory
+from resources.tools import resource_path, read_text_file, execute_query, open_document_store, get_icon, \
+    get_window_icon
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -39,7 +40,7 @@ class NoteDialog(QDialog):
     def __init__(self, parent=None, title="", text=""):
         super().__init__(parent)  # Ensure parent is the first argument
         self.setWindowTitle("Edit Note" if title else "Add Note")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         layout = QVBoxLayout(self)
 
         self.titleEdit = FocusLineEdit(title)
@@ -83,7 +84,7 @@ class EmployeeSelectionDialog(QDialog):
         self.selected_employee_name = None
         self.selected_employee_id = None
         self.setWindowTitle("Select Employee")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.setup_ui()
         self.populate_tree()
 
@@ -269,7 +270,7 @@ class JobOrderPage(QDialog):
     def __init__(self, employerData: dict, employerId: int, parent=None):
         super().__init__(parent)
         self.setWindowTitle("New Job Order")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.employerData = employerData
         self.employerId = employerId
         self.employeeId = None
@@ -488,8 +489,7 @@ class JobOrderPage(QDialog):
         spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
         labelsLayout.addSpacerItem(spacer)
         self.notesList = NotesListWidget()
-        self.addNotesButton = AddNoteButton(QIcon(str(Path(application_path, 'resources', 'icons',
-                                                           'iconmonstr-plus-square-multiple-lined.svg'))),
+        self.addNotesButton = AddNoteButton(get_icon('iconmonstr-plus-square-multiple-lined.svg'),
                                             self.notesList, self)
         labelsLayout.addWidget(self.addNotesButton)
         jobDescriptionLayout.addLayout(labelsLayout)
@@ -737,35 +737,21 @@ class JobOrderPage(QDialog):
 
     @staticmethod
     def saveJobDescription(job_description, job_title, poOrderNumber):
-        # Create a directory for job descriptions
-        out_dir = find_output_directory()
-        job_description_dir = Path(out_dir, "job_descriptions")
-        job_description_dir.mkdir(exist_ok=True)
-
-        # Save Job Description
+        # Job descriptions go to the document store, which deduplicates them and writes atomically
         job_description_path = None
         if job_description.strip():
             job_description_filename = f"{job_title}_{poOrderNumber}_job_description.txt"
-            job_description_path = job_description_dir / job_description_filename
-            with job_description_path.open("w", encoding="utf-8") as file:
-                file.write(job_description)
+            job_description_path = open_document_store().put_text(job_description, job_description_filename)
 
         return str(job_description_path)
 
     def saveNotes(self, job_title, poOrderNumber):
-        # Create a directory for job descriptions
-        out_dir = find_output_directory()
-        job_description_dir = Path(out_dir, "job_descriptions")
-        job_description_dir.mkdir(exist_ok=True)
-
         # Save Notes
         notes_path = None
         if self.notesList.notes:
             notes_filename = f"{job_title}_{poOrderNumber}_notes.txt"
-            notes_path = job_description_dir / notes_filename
-            with notes_path.open("w", encoding="utf-8") as file:
-                for title, note in self.notesList.notes.items():
-                    file.write(f"Title: {title}\nNote: {note}\n\n")
+            notes = "".join(f"Title: {title}\nNote: {note}\n\n" for title, note in self.notesList.notes.items())
+            notes_path = open_document_store().put_text(notes, notes_filename)
 
         return str(notes_path)
 
@@ -2,18 +2,18 @@ import sys
 from pathlib import Path
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFontMetrics, QIcon
+from PyQt5.QtGui import QFontMetrics
 from PyQt5.QtWidgets import *
-from application.company_card import ClientCard
-from application.employee_card import EmployeeCard
-from application.job_order_card import JobOrderCard
 
-from resources.tools import resource_path, execute_query
+from resources.tools import resource_path, execute_query, get_window_icon, get_card_prefetcher
 
 application_path = str(resource_path(Path.cwd()))
 
 
 class TableWidget(QTableWidget):
+    # Card opened by a double-click, per table type
+    CARD_KINDS = {"Employee": "employee", "Client": "client", "Job Order": "job_order"}
+
     def __init__(self, headers, type, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.originalTableData = []  # Initialize the original data holder
@@ -27,6 +27,11 @@ class TableWidget(QTableWidget):
         self.horizontalHeader().customContextMenuRequested.connect(self.headerContextMenu)
         self.cellDoubleClicked.connect(self.cellDoubleClickHandler)
         self.tableType = type
+
+        # Load the card of the row under the cursor or selected before it is double-clicked
+        self.setMouseTracking(True)
+        self.cellEntered.connect(self.prefetchCards)
+        self.currentCellChanged.connect(lambda row, column, previousRow, previousColumn: self.prefetchCards(row))
         self.isRecordingChanges = False  # Add flag to control change recording
 
         # Configure column resizing behavior
@@ -147,24 +152,43 @@ class TableWidget(QTableWidget):
         self.isRecordingChanges = False
 
     def cellDoubleClickHandler(self, row, column):
+        # The cards are only imported when one is first opened, which keeps them out of the start-up
+        from application.company_card import ClientCard
+        from application.employee_card import EmployeeCard
+        from application.job_order_card import JobOrderCard
+
         # Determine the Database ID from the row
         dbId = self.getDatabaseId(row)
 
+        # Cards open from the data prefetched while the row was hovered or selected, when it is still fresh
+        prefetcher = get_card_prefetcher()
+
         # Call the appropriate class based on tableType
         if self.tableType == "Employee":
-            job_id = self.getId(dbId, "employee_id", "job_order_id")
-            employer_id = self.getId(dbId, "employee_id", "client_id")
-            employeeCard = EmployeeCard(dbId, employer_id, job_id)
+            # The loader looks up the current job order and client of the employee with the rest of the card
+            employeeCard = EmployeeCard(dbId, card_data=prefetcher.take_or_load("employee", dbId))
             employeeCard.exec_()
         elif self.tableType == "Client":
-            allJobIds = self.getAllJobIds(dbId)
-            clientCard = ClientCard(dbId, allJobIds)
+            cardData = prefetcher.take_or_load("client", dbId)
+            clientCard = ClientCard(dbId, cardData.job_order_ids or None, card_data=cardData)
             clientCard.exec_()
         elif self.tableType == "Job Order":
-            jobOrderCard = JobOrderCard(dbId)
+            jobOrderCard = JobOrderCard(dbId, card_data=prefetcher.take_or_load("job_order", dbId))
             jobOrderCard.clientCardRequested.connect(self.openClientCard)
             jobOrderCard.exec_()
 
+        # The card may have changed what the other prefetched cards show
+        prefetcher.invalidate()
+
+    def prefetchCards(self, row, column=None):
+        kind = self.CARD_KINDS.get(self.tableType)
+        if kind is None or row < 0:
+            return
+        # The row itself first, then its visible neighbors
+        rows = [row] + [neighbor for neighbor in (row + 1, row - 1)
+                        if 0 <= neighbor < self.rowCount() and not self.isRowHidden(neighbor)]
+        get_card_prefetcher().prefetch(kind, [self.getDatabaseId(neighbor) for neighbor in rows])
+
     def getDatabaseId(self, row):
         # Assuming the database ID is stored in a specific column, e.g., the first hidden column
         for i in range(self.columnCount()):
@@ -174,30 +198,6 @@ class TableWidget(QTableWidget):
                     return int(item.text())
         return None
 
-    @staticmethod
-    def getId(_id, input_id, output_id):
-        query = f"SELECT {output_id} FROM job2employer_ids WHERE {input_id} = %s;"
-        data = (_id,)
-        result = execute_query(query, data, fetch_mode='one')
-
-        if result:
-            return result[0]
-        else:
-            # Handle the case where the query encountered an error
-            return None
-
-    @staticmethod
-    def getAllJobIds(_id):
-        company_name_query = f"SELECT employer_company FROM clients WHERE id = %s"
-        company_name = execute_query(company_name_query, (_id,))
-        query = f"SELECT id FROM job_orders WHERE company = %s"
-        result = execute_query(query, company_name, fetch_mode="all")
-
-        if result:
-            return result
-        else:
-            return None
-
     @staticmethod
     def openClientCard(job_id):
         query = f"SELECT company FROM job_orders WHERE id = %s"
@@ -208,6 +208,7 @@ class TableWidget(QTableWidget):
         query = f"SELECT id FROM job_orders WHERE company = %s"
         allJobIds = execute_query(query, company_name, fetch_mode="all")
 
+        from application.company_card import ClientCard
         clientCard = ClientCard(employer_id, allJobIds)
         clientCard.exec_()
 
@@ -227,7 +228,7 @@ def showMySQLHelp():
 
 def getDatabaseInfo(parent=None):
     dialog = QDialog(parent)
-    dialog.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+    dialog.setWindowIcon(get_window_icon())
     dialog.setMinimumWidth(400)  # Make the dialog wider
     layout = QVBoxLayout(dialog)
     layout.setSpacing(10)
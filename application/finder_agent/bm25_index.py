@@ -0,0 +1,304 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Same token pattern as the TfidfVectorizer default, so both engines see the same words
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases the text and splits it into the tokens used by the index."""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def file_signature(file_path: str) -> Tuple[str, Optional[float], Optional[int]]:
+    """Returns the (path, mtime, size) triple used to tell whether an indexed document changed on disk."""
+    try:
+        stat = os.stat(file_path)
+        return file_path, stat.st_mtime, stat.st_size
+    except (OSError, TypeError, ValueError):
+        return file_path, None, None
+
+
+class _PostingCursor:
+    """Walks the postings of one term in doc_id order, reading them from disk in blocks."""
+
+    BLOCK_SIZE = 512
+
+    def __init__(self, connection: sqlite3.Connection, term: str, weight: float, upper_bound: float):
+        self.connection = connection
+        self.term = term
+        self.weight = weight
+        self.upper_bound = upper_bound
+        self._block = []
+        self._position = 0
+        self._exhausted = False
+        self.doc_id = None
+        self.tf = 0
+        self._load(-1)
+
+    def _load(self, min_doc_id: int) -> None:
+        self._block = self.connection.execute(
+            "SELECT doc_id, tf FROM postings WHERE term = ? AND doc_id >= ? ORDER BY doc_id LIMIT ?",
+            (self.term, min_doc_id, self.BLOCK_SIZE)).fetchall()
+        self._position = 0
+        self._exhausted = len(self._block) < self.BLOCK_SIZE
+        self._set_current()
+
+    def _set_current(self) -> None:
+        if self._position < len(self._block):
+            self.doc_id, self.tf = self._block[self._position]
+        else:
+            self.doc_id, self.tf = None, 0
+
+    def next(self) -> None:
+        """Moves to the next posting."""
+        if self.doc_id is None:
+            return
+        self._position += 1
+        if self._position >= len(self._block) and not self._exhausted:
+            self._load(self._block[-1][0] + 1)
+        else:
+            self._set_current()
+
+    def seek(self, target: int) -> None:
+        """Moves to the first posting whose doc_id is >= target, skipping whole blocks through the B-tree."""
+        if self.doc_id is None or self.doc_id >= target:
+            return
+        if self._block and self._block[-1][0] >= target:
+            while self._block[self._position][0] < target:
+                self._position += 1
+            self._set_current()
+        elif self._exhausted:
+            self._position = len(self._block)
+            self._set_current()
+        else:
+            self._load(target)
+
+
+class BM25Index:
+    """
+    On-disk inverted index scored with BM25.
+
+    Postings (term, doc_id, tf) are stored in SQLite clustered by term, together with the length of every document
+    and per-term statistics. Queries are evaluated document-at-a-time with MaxScore: terms whose upper bound can no
+    longer lift a document into the current top K are only probed for candidates found through the other terms, so
+    most postings of common terms are skipped instead of scored.
+    """
+
+    def __init__(self, index_path, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            index_path: File the index is stored in. Created when missing.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalisation.
+        """
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.connection = sqlite3.connect(str(self.index_path))
+        self._doc_lengths = None
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY,
+                    source_path TEXT,
+                    mtime REAL,
+                    size INTEGER,
+                    length INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS terms (
+                    term TEXT PRIMARY KEY,
+                    df INTEGER NOT NULL,
+                    max_tf INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+            """)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Maintenance
+    # ------------------------------------------------------------------ #
+    def _remove(self, doc_id: int) -> None:
+        postings = self.connection.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,)).fetchall()
+        # max_tf is left as is: a stale value is still a valid upper bound
+        self.connection.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", postings)
+        self.connection.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def add_document(self, doc_id: int, text: str, source_path: Optional[str] = None,
+                     mtime: Optional[float] = None, size: Optional[int] = None) -> None:
+        """Adds a document to the index, replacing any previous version of it."""
+        counts = Counter(tokenize(text))
+        with self.connection:
+            self._remove(doc_id)
+            self.connection.execute(
+                "INSERT INTO documents (doc_id, source_path, mtime, size, length) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, source_path, mtime, size, sum(counts.values())))
+            self.connection.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                                        [(term, doc_id, tf) for term, tf in counts.items()])
+            self.connection.executemany(
+                "INSERT INTO terms (term, df, max_tf) VALUES (?, 1, ?) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + 1, max_tf = MAX(max_tf, excluded.max_tf)",
+                list(counts.items()))
+        self._doc_lengths = None
+
+    def remove_document(self, doc_id: int) -> None:
+        """Removes a document from the index."""
+        with self.connection:
+            self._remove(doc_id)
+        self._doc_lengths = None
+
+    def sync(self, rows: Iterable[Tuple[int, str]], reader: Callable[[List[str]], List[Optional[str]]]) -> int:
+        """
+        Brings the index up to date with the given documents, reading only the ones that changed on disk.
+
+        Args:
+            rows (Iterable[Tuple[int, str]]): (doc_id, file path) pairs.
+            reader (Callable): Reads a list of paths and returns their texts in the same order, with None for the
+                documents it could not read. Those are left out of the index, without recording their signature,
+                so they are read again on the next sync.
+
+        Returns:
+            int: Number of documents that were (re)indexed.
+        """
+        known = {doc_id: (source_path, mtime, size) for doc_id, source_path, mtime, size in
+                 self.connection.execute("SELECT doc_id, source_path, mtime, size FROM documents")}
+
+        stale = []
+        for doc_id, file_path in rows:
+            signature = file_signature(file_path)
+            if known.get(doc_id) != signature:
+                stale.append((doc_id, signature))
+
+        indexed = 0
+        if stale:
+            texts = reader([signature[0] for _, signature in stale])
+            for (doc_id, signature), text in zip(stale, texts):
+                if text is None:
+                    continue
+                self.add_document(doc_id, text, *signature)
+                indexed += 1
+        return indexed
+
+    # ------------------------------------------------------------------ #
+    # Scoring
+    # ------------------------------------------------------------------ #
+    def _load_doc_lengths(self) -> Dict[int, int]:
+        if self._doc_lengths is None:
+            self._doc_lengths = dict(self.connection.execute("SELECT doc_id, length FROM documents"))
+        return self._doc_lengths
+
+    def _idf(self, df: int, total_docs: int) -> float:
+        return math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query_text: str, top_k: int = 100,
+               allowed: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns the top K documents for the query, best first.
+
+        Args:
+            query_text (str): Text of the query document.
+            top_k (int): Number of results to return.
+            allowed (Optional[Sequence[int]]): Restricts the results to these doc_ids (e.g. the rows left after
+                the SQL constraints).
+
+        Returns:
+            List[Tuple[int, float]]: (doc_id, BM25 score) pairs sorted by descending score.
+        """
+        doc_lengths = self._load_doc_lengths()
+        total_docs = len(doc_lengths)
+        query_terms = Counter(tokenize(query_text))
+        if not total_docs or not query_terms or top_k <= 0:
+            return []
+
+        allowed = set(allowed) if allowed is not None else None
+        average_length = sum(doc_lengths.values()) / total_docs
+        k1, b = self.k1, self.b
+
+        cursors = []
+        placeholders = ", ".join("?" * len(query_terms))
+        for term, df, max_tf in self.connection.execute(
+                f"SELECT term, df, max_tf FROM terms WHERE df > 0 AND term IN ({placeholders})", list(query_terms)):
+            weight = query_terms[term] * self._idf(df, total_docs)
+            # Highest contribution the term can make, reached by its max_tf in the shortest possible document
+            upper_bound = weight * max_tf * (k1 + 1) / (max_tf + k1 * (1 - b))
+            cursors.append(_PostingCursor(self.connection, term, weight, upper_bound))
+
+        # MaxScore keeps the terms ordered by upper bound; the low ones form the non-essential prefix
+        cursors.sort(key=lambda cursor: cursor.upper_bound)
+        prefix_bounds = []
+        running = 0.0
+        for cursor in cursors:
+            running += cursor.upper_bound
+            prefix_bounds.append(running)
+
+        heap = []  # Min-heap of (score, doc_id) holding the current top K
+        threshold = 0.0
+        first_essential = 0
+
+        def contribution(cursor, doc_length):
+            tf = cursor.tf
+            return cursor.weight * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_length / average_length))
+
+        while True:
+            essential = [cursor for cursor in cursors[first_essential:] if cursor.doc_id is not None]
+            if not essential:
+                break
+            doc_id = min(cursor.doc_id for cursor in essential)
+
+            doc_length = doc_lengths.get(doc_id, average_length)
+            score = 0.0
+            for cursor in essential:
+                if cursor.doc_id == doc_id:
+                    score += contribution(cursor, doc_length)
+                    cursor.next()
+
+            if allowed is not None and doc_id not in allowed:
+                continue
+
+            # Probe the non-essential terms from the strongest down, stopping once the doc cannot make the cut
+            for position in range(first_essential - 1, -1, -1):
+                if score + prefix_bounds[position] <= threshold:
+                    break
+                cursor = cursors[position]
+                cursor.seek(doc_id)
+                if cursor.doc_id == doc_id:
+                    score += contribution(cursor, doc_length)
+
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, doc_id))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, doc_id))
+            else:
+                continue
+
+            if len(heap) == top_k:
+                threshold = heap[0][0]
+                while first_essential < len(cursors) and prefix_bounds[first_essential] <= threshold:
+                    first_essential += 1
+
+        return [(doc_id, score) for score, doc_id in sorted(heap, key=lambda item: (-item[0], item[1]))]
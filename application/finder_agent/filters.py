@@ -0,0 +1,219 @@
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import *
+
+from resources.tools import execute_query
+
+AVAILABILITY_OPTIONS = {
+    "NW": "Not Working",
+    "~A": "Available Soon",
+    "W": "Working",
+    "NA": "Not Available"
+}
+POSITION_TYPES = ["Direct Placement", "Contract", "Contract to Hire", "Full Time/Contract", "1099"]
+US_STATES = ["Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado",
+             "Connecticut", "Delaware", "Florida", "Georgia", "Hawaii", "Idaho",
+             "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky", "Louisiana",
+             "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota",
+             "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada",
+             "New Hampshire", "New Jersey", "New Mexico", "New York",
+             "North Carolina", "North Dakota", "Ohio", "Oklahoma", "Oregon",
+             "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota",
+             "Tennessee", "Texas", "Utah", "Vermont", "Virginia", "Washington",
+             "West Virginia", "Wisconsin", "Wyoming"]
+
+
+def _in_condition(column: str, values: Iterable[str]) -> Tuple[str, tuple]:
+    values = tuple(values)
+    placeholders = ", ".join(["%s"] * len(values))
+    return f"{column} IN ({placeholders})", values
+
+
+def build_employee_filter(availability: Optional[Iterable[str]] = None,
+                          employee_type: Optional[str] = None,
+                          states: Optional[Iterable[str]] = None,
+                          free_by: Optional[date] = None) -> Tuple[str, tuple]:
+    """
+    Builds the WHERE clause used to narrow down the employees before their resumes are read and scored.
+
+    Args:
+        availability (Optional[Iterable[str]]): Availability codes to keep ('NW', '~A', 'W', 'NA').
+        employee_type (Optional[str]): 'W2' keeps every non-1099 employee, any other value must match exactly.
+        states (Optional[Iterable[str]]): States the employee has to live in.
+        free_by (Optional[date]): Drops employees placed on a job order that is still running on this date.
+
+    Returns:
+        Tuple[str, tuple]: The WHERE clause and the parameters that go with it.
+    """
+    conditions = ["resume_path IS NOT NULL", "resume_path <> ''"]
+    params = []
+
+    if availability is not None:
+        availability = tuple(availability)
+        if not availability:
+            # Nothing ticked means nothing can match
+            return "WHERE 1 = 0", ()
+        condition, values = _in_condition("availability", availability)
+        conditions.append(condition)
+        params.extend(values)
+
+    if employee_type == "W2":
+        conditions.append("(employee_type IS NULL OR employee_type <> '1099')")
+    elif employee_type:
+        conditions.append("employee_type = %s")
+        params.append(employee_type)
+
+    if states:
+        condition, values = _in_condition("state", states)
+        conditions.append(condition)
+        params.extend(values)
+
+    if free_by is not None:
+        conditions.append("NOT EXISTS (SELECT 1 FROM job2employer_ids j "
+                          "JOIN job_orders jo ON jo.id = j.job_order_id "
+                          "WHERE j.employee_id = employees.id AND jo.end_date >= %s)")
+        params.append(free_by)
+
+    return "WHERE " + " AND ".join(conditions), tuple(params)
+
+
+def build_job_order_filter(position_types: Optional[Iterable[str]] = None,
+                           states: Optional[Iterable[str]] = None,
+                           start_from: Optional[date] = None,
+                           start_to: Optional[date] = None,
+                           open_only: bool = False) -> Tuple[str, tuple]:
+    """
+    Builds the WHERE clause used to narrow down the job orders before their descriptions are read and scored.
+
+    Args:
+        position_types (Optional[Iterable[str]]): Position types to keep.
+        states (Optional[Iterable[str]]): States the job has to be located in. The location column is stored as
+            "address, city, state zip", so the state is matched inside it.
+        start_from (Optional[date]): Earliest accepted start date.
+        start_to (Optional[date]): Latest accepted start date.
+        open_only (bool): Drops job orders whose end date has already passed.
+
+    Returns:
+        Tuple[str, tuple]: The WHERE clause and the parameters that go with it.
+    """
+    conditions = ["job_description_path IS NOT NULL", "job_description_path <> ''"]
+    params = []
+
+    if position_types:
+        condition, values = _in_condition("position_type", position_types)
+        conditions.append(condition)
+        params.extend(values)
+
+    if states:
+        states = tuple(states)
+        conditions.append("(" + " OR ".join(["location LIKE %s"] * len(states)) + ")")
+        params.extend(f"%, {state} %" for state in states)
+
+    if start_from is not None:
+        conditions.append("start_date >= %s")
+        params.append(start_from)
+
+    if start_to is not None:
+        conditions.append("start_date <= %s")
+        params.append(start_to)
+
+    if open_only:
+        conditions.append("(end_date IS NULL OR end_date >= CURDATE())")
+
+    return "WHERE " + " AND ".join(conditions), tuple(params)
+
+
+class EmployeeConstraintsBox(QGroupBox):
+    """Structured constraints applied to the employees before any resume is ranked."""
+
+    def __init__(self, parent=None):
+        super().__init__("Constraints", parent)
+        layout = QHBoxLayout(self)
+
+        layout.addWidget(QLabel("Availability:"))
+        self.availabilityCheckBoxes = {}
+        for code, description in AVAILABILITY_OPTIONS.items():
+            checkBox = QCheckBox(code)
+            checkBox.setToolTip(description)
+            checkBox.setChecked(code in ("NW", "~A"))
+            self.availabilityCheckBoxes[code] = checkBox
+            layout.addWidget(checkBox)
+
+        layout.addWidget(QLabel("Type:"))
+        self.typeComboBox = QComboBox()
+        self.typeComboBox.addItems(["Any", "W2", "1099"])
+        layout.addWidget(self.typeComboBox)
+
+        layout.addWidget(QLabel("State:"))
+        self.stateComboBox = QComboBox()
+        self.stateComboBox.addItem("Any")
+        states = execute_query("SELECT DISTINCT state FROM employees WHERE state IS NOT NULL ORDER BY state",
+                               fetch_mode="all")
+        self.stateComboBox.addItems([str(state[0]) for state in states or [] if state[0]])
+        layout.addWidget(self.stateComboBox)
+
+        self.freeByStartCheckBox = QCheckBox("Free by job start date")
+        self.freeByStartCheckBox.setToolTip("Skip employees whose current job order is still running when the "
+                                            "selected job order starts.")
+        layout.addWidget(self.freeByStartCheckBox)
+        layout.addStretch()
+
+    def buildFilter(self, job_start_date: Optional[date] = None) -> Tuple[str, tuple]:
+        """Returns the WHERE clause and parameters for the current selection."""
+        employee_type = self.typeComboBox.currentText()
+        state = self.stateComboBox.currentText()
+        return build_employee_filter(
+            availability=[code for code, checkBox in self.availabilityCheckBoxes.items() if checkBox.isChecked()],
+            employee_type=None if employee_type == "Any" else employee_type,
+            states=None if state == "Any" else [state],
+            free_by=job_start_date if self.freeByStartCheckBox.isChecked() else None
+        )
+
+
+class JobOrderConstraintsBox(QGroupBox):
+    """Structured constraints applied to the job orders before any job description is ranked."""
+
+    def __init__(self, parent=None):
+        super().__init__("Constraints", parent)
+        layout = QHBoxLayout(self)
+
+        layout.addWidget(QLabel("Position Type:"))
+        self.positionTypeComboBox = QComboBox()
+        self.positionTypeComboBox.addItems(["Any"] + POSITION_TYPES)
+        layout.addWidget(self.positionTypeComboBox)
+
+        layout.addWidget(QLabel("State:"))
+        self.stateComboBox = QComboBox()
+        self.stateComboBox.addItems(["Any"] + US_STATES)
+        layout.addWidget(self.stateComboBox)
+
+        self.startWindowCheckBox = QCheckBox("Starts between")
+        layout.addWidget(self.startWindowCheckBox)
+        self.startFromEdit = QDateEdit(calendarPopup=True)
+        self.startFromEdit.setDate(QDate.currentDate())
+        layout.addWidget(self.startFromEdit)
+        layout.addWidget(QLabel("and"))
+        self.startToEdit = QDateEdit(calendarPopup=True)
+        self.startToEdit.setDate(QDate.currentDate().addMonths(3))
+        layout.addWidget(self.startToEdit)
+
+        self.openOnlyCheckBox = QCheckBox("Open only")
+        self.openOnlyCheckBox.setToolTip("Skip job orders whose end date has already passed.")
+        self.openOnlyCheckBox.setChecked(True)
+        layout.addWidget(self.openOnlyCheckBox)
+        layout.addStretch()
+
+    def buildFilter(self) -> Tuple[str, tuple]:
+        """Returns the WHERE clause and parameters for the current selection."""
+        position_type = self.positionTypeComboBox.currentText()
+        state = self.stateComboBox.currentText()
+        use_window = self.startWindowCheckBox.isChecked()
+        return build_job_order_filter(
+            position_types=None if position_type == "Any" else [position_type],
+            states=None if state == "Any" else [state],
+            start_from=self.startFromEdit.date().toPyDate() if use_window else None,
+            start_to=self.startToEdit.date().toPyDate() if use_window else None,
+            open_only=self.openOnlyCheckBox.isChecked()
+        )
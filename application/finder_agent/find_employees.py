@@ -3,15 +3,16 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFontMetrics, QIcon
 from PyQt5.QtWidgets import *
 from application.employee_card import EmployeeCard
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from resources.tools import resource_path, read_text_file, execute_query, find_output_directory
+from resources.tools import resource_path, read_text_file, execute_query, find_output_directory, get_window_icon, \
+    get_card_prefetcher
+from .ranking import (SCORING_METHODS, BM25_SCORING, rank_with_tfidf, rank_with_bm25, open_ranking_index,
+                      hydrate_rankings)
+from .filters import EmployeeConstraintsBox
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -28,36 +29,31 @@ class CardTableWidget(QTableWidget):
         self.adjustColumnResizing()
         self.itemDoubleClicked.connect(self.onItemDoubleClicked)
 
+        # Load the card of the row under the cursor or selected before it is double-clicked
+        self.cellEntered.connect(self.prefetchCards)
+        self.currentCellChanged.connect(lambda row, column, previousRow, previousColumn: self.prefetchCards(row))
+
     def populateTable(self, rankings):
         self.clearContents()  # Clear the table contents before populating
         self.setRowCount(0)  # Reset the row count to 0 to remove all existing rows
+        rankings = [(index, score) for index, score in rankings if score != 0.0]  # Skip if score is 0.00
+
+        # Fetch the data of every ranked employee in one query
+        employees = hydrate_rankings(rankings, "employees",
+                                     ["first_name", "last_name", "availability", "job_id", "employee_type"])
+
         row = 0
         ranking_number = 1  # Initialize ranking number
         for index, score in rankings:
-            _id = index[0]
-            if score == 0.0:
-                continue  # Skip if score is 0.00
-
-            # Fetch employee data using execute_query function
-            employee_query = ("SELECT first_name, last_name, availability, job_id, employee_type FROM employees "
-                              "WHERE id = %s")
-            employee_result = execute_query(employee_query, (_id,), fetch_mode="one", get_column_names=True)
-
-            if employee_result and 'result' in employee_result and employee_result['result']:
-                employee_data = employee_result['result']
-                column_names = employee_result.get('column_names', [])
-                first_name_index = column_names.index('first_name') if 'first_name' in column_names else None
-                last_name_index = column_names.index('last_name') if 'last_name' in column_names else None
-
-                employee_name = f"{employee_data[first_name_index]} {employee_data[last_name_index]}" if first_name_index is not None and last_name_index is not None else "N/A"
+            employee_data = employees.get(index[0])
+            if employee_data:
+                first_name = employee_data.get('first_name')
+                last_name = employee_data.get('last_name')
+                employee_name = f"{first_name} {last_name}" if first_name is not None and last_name is not None else "N/A"
                 match_percentage = "{:.2%}".format(score)  # Convert score to percentage
-                availability_index = column_names.index('availability') if 'availability' in column_names else None
-                job_id_index = column_names.index('job_id') if 'job_id' in column_names else None
-                employee_type_index = column_names.index('employee_type') if 'employee_type' in column_names else None
-
-                availability = employee_data[availability_index] if availability_index is not None else "N/A"
-                job_id = employee_data[job_id_index] if job_id_index is not None else "N/A"
-                employee_type = employee_data[employee_type_index] if employee_type_index is not None else "N/A"
+                availability = employee_data.get('availability', "N/A")
+                job_id = employee_data.get('job_id', "N/A")
+                employee_type = employee_data.get('employee_type', "N/A")
 
                 # Prepare data for the table
                 data = [employee_name, match_percentage, str(ranking_number), availability, job_id, employee_type,
@@ -93,13 +89,32 @@ class CardTableWidget(QTableWidget):
             employee_id_item = self.item(row, employee_id_column)
             if employee_id_item:
                 employee_id = int(employee_id_item.text())
-                employeeCard = EmployeeCard(employee_id)
+                employeeCard = EmployeeCard(employee_id,
+                                            card_data=get_card_prefetcher().take_or_load("employee", employee_id))
                 employeeCard.exec_()
+                # The card may have changed what the other prefetched cards show
+                get_card_prefetcher().invalidate()
             else:
                 QMessageBox.warning(self, "Error", "Employee ID not found for the selected row.")
         else:
             QMessageBox.warning(self, "Error", "Employee ID column not found.")
 
+    def prefetchCards(self, row, column=None):
+        if row < 0:
+            return
+        # The row itself first, then its visible neighbors
+        rows = [row] + [neighbor for neighbor in (row + 1, row - 1)
+                        if 0 <= neighbor < self.rowCount() and not self.isRowHidden(neighbor)]
+        get_card_prefetcher().prefetch("employee", [self.getDatabaseId(neighbor) for neighbor in rows])
+
+    def getDatabaseId(self, row):
+        # The database ID is stored in the hidden column
+        for col in range(self.columnCount()):
+            if self.isColumnHidden(col):
+                item = self.item(row, col)
+                return int(item.text()) if item is not None and item.text().isdigit() else None
+        return None
+
     def onHeaderClicked(self, logicalIndex):
         """
         Sorts the table based on the clicked column header and updates the header to display a sorting arrow.
@@ -173,7 +188,7 @@ class RankingEmployeeResultsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Ranking Employees")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.resize(1000, 800)
 
         layout = QVBoxLayout(self)
@@ -213,6 +228,7 @@ class RankingEmployeeResultsDialog(QDialog):
         # Job Info Drop Down and Button
         self.jobComboBox = QComboBox()
         self.jobOrderData = {}
+        self.jobOrderStartDates = {}
         self.populateJobOrders()
         self.setupCompleter()
         label = QLabel("Choose Job Order:")
@@ -221,9 +237,18 @@ class RankingEmployeeResultsDialog(QDialog):
 
         buttonLayout.addWidget(label)
         buttonLayout.addWidget(self.jobComboBox)
+        self.scoringComboBox = QComboBox()
+        self.scoringComboBox.addItems(SCORING_METHODS)
+        self.scoringComboBox.setToolTip("TF-IDF scores every document on each run. BM25 uses an on-disk index "
+                                        "and stops early once the best matches are found.")
+        buttonLayout.addWidget(self.scoringComboBox)
         buttonLayout.addWidget(self.generateRankingsButton)
         scrollLayout.addLayout(buttonLayout)
 
+        # Structured constraints are applied in SQL before any resume is read
+        self.constraintsBox = EmployeeConstraintsBox()
+        scrollLayout.addWidget(self.constraintsBox)
+
         self.table = CardTableWidget()
         scrollLayout.addWidget(self.table)
         scrollArea.setWidget(scrollWidget)
@@ -261,13 +286,14 @@ class RankingEmployeeResultsDialog(QDialog):
         self.table.setColumnHidden(6, True)
 
     def populateJobOrders(self):
-        query = "SELECT job_description_path, job_title, po_order_number FROM job_orders"
+        query = "SELECT job_description_path, job_title, po_order_number, start_date FROM job_orders"
         results = execute_query(query, fetch_mode='all')
         if results:
-            for job_description_path, job_title, po_order_number in results:
+            for job_description_path, job_title, po_order_number, start_date in results:
                 combo_box_string = f"{job_title}-{po_order_number}"
                 self.jobComboBox.addItem(combo_box_string)
                 self.jobOrderData[combo_box_string] = job_description_path
+                self.jobOrderStartDates[combo_box_string] = start_date
 
     def setupCompleter(self):
         # Extract the combo box items
@@ -338,6 +364,7 @@ class RankingEmployeeResultsDialog(QDialog):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.table.horizontalHeaderItem(i).text() for i in
                                              range(self.table.columnCount())])
 
@@ -382,10 +409,10 @@ class RankingEmployeeResultsDialog(QDialog):
         job_description_path = self.jobOrderData[selected_text]
 
         # Check if the file extension is supported
-        if not job_description_path or not job_description_path.endswith(('.doc', '.docx', '.pdf', '.txt')):
+        if not job_description_path or not job_description_path.endswith(('.doc', '.docx', '.pdf', '.txt', '.gpg')):
             QMessageBox.warning(self, "Unsupported File Type",
                                 f"The job description path '{job_description_path}' is not supported.\n"
-                                "Supported file types are: .doc, .docx, .pdf, .txt")
+                                "Supported file types are: .doc, .docx, .pdf, .txt (optionally encrypted as .gpg)")
             self.show()  # Show the dialog again for the user to make another selection
             return
 
@@ -395,23 +422,24 @@ class RankingEmployeeResultsDialog(QDialog):
         # Force the UI to update
         QApplication.processEvents()
 
-        texts = [read_text_file(job_description_path)]
-        employee_data = []
-
-        employees_query = "SELECT id, resume_path FROM employees"
-        employees = execute_query(employees_query, fetch_mode="all")
-        for employee_id, resume_path in employees:
-            extracted_text = read_text_file(resume_path)
-            texts.append(extracted_text)
-            employee_data.append((employee_id, resume_path))
-
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(texts)
+        query_text = read_text_file(job_description_path)
+
+        # Only employees that satisfy the constraints have their resumes read and scored
+        where_clause, params = self.constraintsBox.buildFilter(self.jobOrderStartDates.get(selected_text))
+        employees_query = f"SELECT id, resume_path FROM employees {where_clause}"
+        employees = execute_query(employees_query, params, fetch_mode="all") or []
+        if not employees:
+            self.table.populateTable([])
+            self.generateRankingsButton.setText("Rank Employees")
+            self.generateRankingsButton.setEnabled(True)
+            QMessageBox.information(self, "No Employees", "No employees match the selected constraints.")
+            return
 
-        cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
-        similarity_scores = cosine_similarities.flatten()
-        rankings = sorted([(employee_id, score) for employee_id, score in zip(employee_data, similarity_scores)],
-                          key=lambda x: x[1], reverse=True)
+        if self.scoringComboBox.currentText() == BM25_SCORING:
+            with open_ranking_index("employees") as index:
+                rankings = rank_with_bm25(query_text, employees, index)
+        else:
+            rankings = rank_with_tfidf(query_text, employees)
 
         self.table.populateTable(rankings)
 
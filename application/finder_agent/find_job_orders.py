@@ -3,14 +3,16 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFontMetrics, QIcon
 from PyQt5.QtWidgets import *
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from resources.tools import resource_path, read_text_file, execute_query, find_output_directory
+from application.job_order_card import JobOrderCard
+from resources.tools import resource_path, read_text_file, execute_query, find_output_directory, get_window_icon, \
+    get_card_prefetcher
+from .ranking import (SCORING_METHODS, BM25_SCORING, rank_with_tfidf, rank_with_bm25, open_ranking_index,
+                      hydrate_rankings)
+from .filters import JobOrderConstraintsBox
 
 application_path = str(resource_path(Path.cwd()))
 
@@ -28,43 +30,34 @@ class CardTableWidget(QTableWidget):
         self.adjustColumnResizing()
         self.itemDoubleClicked.connect(self.onItemDoubleClicked)
 
+        # Load the card of the row under the cursor or selected before it is double-clicked
+        self.cellEntered.connect(self.prefetchCards)
+        self.currentCellChanged.connect(lambda row, column, previousRow, previousColumn: self.prefetchCards(row))
+
     def populateTable(self, rankings):
         self.clearContents()  # Clear the table contents before populating
         self.setRowCount(0)  # Reset the row count to 0 to remove all existing rows
+        rankings = [(index, score) for index, score in rankings if score != 0.0]  # Skip if score is 0.00
+
+        # Fetch the data of every ranked job order in one query
+        job_orders = hydrate_rankings(rankings, "job_orders",
+                                      ["job_title", "po_order_number", "company", "start_date", "end_date",
+                                       "needed_employees", "position_type", "min_experience"])
+
         row = 0
         ranking_number = 1  # Initialize ranking number
         for index, score in rankings:
-            _id = index[0]
-            if score == 0.0:
-                continue  # Skip if score is 0.00
-
-            # Fetch job data using execute_query function
-            job_query = ("SELECT job_title, po_order_number, company, start_date, end_date, needed_employees, "
-                         "position_type, min_experience FROM job_orders WHERE id = %s")
-            job_result = execute_query(job_query, (_id,), fetch_mode="one", get_column_names=True)
-
-            if job_result and 'result' in job_result and job_result['result']:
-                job_data = job_result['result']
-                column_names = job_result.get('column_names', [])
-
-                job_title_index = column_names.index('job_title')
-                po_order_number_index = column_names.index('po_order_number')
-                company_index = column_names.index('company')
-                start_date_index = column_names.index('start_date')
-                end_date_index = column_names.index('end_date')
-                needed_employees_index = column_names.index('needed_employees')
-                position_type_index = column_names.index('position_type')
-                min_experience_index = column_names.index('min_experience')
-
+            job_data = job_orders.get(index[0])
+            if job_data:
                 match_percentage = "{:.2%}".format(score)  # Convert score to percentage
-                job_title = job_data[job_title_index] if job_title_index is not None else "N/A"
-                po_order_number = job_data[po_order_number_index] if po_order_number_index is not None else "N/A"
-                company = job_data[company_index] if company_index is not None else "N/A"
-                start_date = job_data[start_date_index] if start_date_index is not None else "N/A"
-                end_date = job_data[end_date_index] if end_date_index is not None else "N/A"
-                needed_employees = job_data[needed_employees_index] if needed_employees_index is not None else "N/A"
-                position_type = job_data[position_type_index] if position_type_index is not None else "N/A"
-                min_experience = job_data[min_experience_index] if min_experience_index is not None else "N/A"
+                job_title = job_data.get('job_title', "N/A")
+                po_order_number = job_data.get('po_order_number', "N/A")
+                company = job_data.get('company', "N/A")
+                start_date = job_data.get('start_date', "N/A")
+                end_date = job_data.get('end_date', "N/A")
+                needed_employees = job_data.get('needed_employees', "N/A")
+                position_type = job_data.get('position_type', "N/A")
+                min_experience = job_data.get('min_experience', "N/A")
 
                 # Prepare data for the table
                 data = [job_title, po_order_number, match_percentage, str(ranking_number), company,
@@ -101,13 +94,31 @@ class CardTableWidget(QTableWidget):
             job_id_item = self.item(row, job_id_column)
             if job_id_item:
                 job_id = int(job_id_item.text())
-                jobCard = JobOrderCard(job_id)
+                jobCard = JobOrderCard(job_id, card_data=get_card_prefetcher().take_or_load("job_order", job_id))
                 jobCard.exec_()
+                # The card may have changed what the other prefetched cards show
+                get_card_prefetcher().invalidate()
             else:
                 QMessageBox.warning(self, "Error", "Employee ID not found for the selected row.")
         else:
             QMessageBox.warning(self, "Error", "Employee ID column not found.")
 
+    def prefetchCards(self, row, column=None):
+        if row < 0:
+            return
+        # The row itself first, then its visible neighbors
+        rows = [row] + [neighbor for neighbor in (row + 1, row - 1)
+                        if 0 <= neighbor < self.rowCount() and not self.isRowHidden(neighbor)]
+        get_card_prefetcher().prefetch("job_order", [self.getDatabaseId(neighbor) for neighbor in rows])
+
+    def getDatabaseId(self, row):
+        # The database ID is stored in the hidden column
+        for col in range(self.columnCount()):
+            if self.isColumnHidden(col):
+                item = self.item(row, col)
+                return int(item.text()) if item is not None and item.text().isdigit() else None
+        return None
+
     def onHeaderClicked(self, logicalIndex):
         self.currentSortOrder = not getattr(self, 'currentSortOrder', False)
         sorting_order = Qt.AscendingOrder if self.currentSortOrder else Qt.DescendingOrder
@@ -173,7 +184,7 @@ class RankingJobOrderResultsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Ranking Job Orders")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.resize(1000, 800)
 
         layout = QVBoxLayout(self)
@@ -221,9 +232,18 @@ class RankingJobOrderResultsDialog(QDialog):
 
         buttonLayout.addWidget(label)
         buttonLayout.addWidget(self.employeeComboBox)
+        self.scoringComboBox = QComboBox()
+        self.scoringComboBox.addItems(SCORING_METHODS)
+        self.scoringComboBox.setToolTip("TF-IDF scores every document on each run. BM25 uses an on-disk index "
+                                        "and stops early once the best matches are found.")
+        buttonLayout.addWidget(self.scoringComboBox)
         buttonLayout.addWidget(self.generateRankingsButton)
         scrollLayout.addLayout(buttonLayout)
 
+        # Structured constraints are applied in SQL before any job description is read
+        self.constraintsBox = JobOrderConstraintsBox()
+        scrollLayout.addWidget(self.constraintsBox)
+
         self.table = CardTableWidget()
         scrollLayout.addWidget(self.table)
         scrollArea.setWidget(scrollWidget)
@@ -338,6 +358,7 @@ class RankingJobOrderResultsDialog(QDialog):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.table.horizontalHeaderItem(i).text() for i in
                                              range(self.table.columnCount())])
 
@@ -382,10 +403,10 @@ class RankingJobOrderResultsDialog(QDialog):
         resume_path = self.employeeData[selected_text]
 
         # Check if the file extension is supported
-        if not resume_path or not resume_path.endswith(('.doc', '.docx', '.pdf', '.txt')):
+        if not resume_path or not resume_path.endswith(('.doc', '.docx', '.pdf', '.txt', '.gpg')):
             QMessageBox.warning(self, "Unsupported File Type",
                                 f"The resume path '{resume_path}' is not supported.\n"
-                                "Supported file types are: .doc, .docx, .pdf, .txt")
+                                "Supported file types are: .doc, .docx, .pdf, .txt (optionally encrypted as .gpg)")
             self.show()  # Show the dialog again for the user to make another selection
             return
 
@@ -395,23 +416,24 @@ class RankingJobOrderResultsDialog(QDialog):
         # Force the UI to update
         QApplication.processEvents()
 
-        texts = [read_text_file(resume_path)]
-        job_data = []
-
-        job_orders_query = "SELECT id, job_description_path FROM job_orders"
-        job_orders = execute_query(job_orders_query, fetch_mode="all")
-        for job_id, job_description_path in job_orders:
-            extracted_text = read_text_file(job_description_path)
-            texts.append(extracted_text)
-            job_data.append((job_id, job_description_path))
-
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(texts)
+        query_text = read_text_file(resume_path)
+
+        # Only job orders that satisfy the constraints have their descriptions read and scored
+        where_clause, params = self.constraintsBox.buildFilter()
+        job_orders_query = f"SELECT id, job_description_path FROM job_orders {where_clause}"
+        job_orders = execute_query(job_orders_query, params, fetch_mode="all") or []
+        if not job_orders:
+            self.table.populateTable([])
+            self.generateRankingsButton.setText("Rank Job Orders")
+            self.generateRankingsButton.setEnabled(True)
+            QMessageBox.information(self, "No Job Orders", "No job orders match the selected constraints.")
+            return
 
-        cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
-        similarity_scores = cosine_similarities.flatten()
-        rankings = sorted([(job_id, score) for job_id, score in zip(job_data, similarity_scores)],
-                          key=lambda x: x[1], reverse=True)
+        if self.scoringComboBox.currentText() == BM25_SCORING:
+            with open_ranking_index("job_orders") as index:
+                rankings = rank_with_bm25(query_text, job_orders, index)
+        else:
+            rankings = rank_with_tfidf(query_text, job_orders)
 
         self.table.populateTable(rankings)
 
@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from resources.tools import find_output_directory, execute_query, get_extraction_service, is_read_error
+from .bm25_index import BM25Index
+
+TFIDF_SCORING = "TF-IDF (cosine)"
+BM25_SCORING = "BM25 (index)"
+SCORING_METHODS = [TFIDF_SCORING, BM25_SCORING]
+
+# Resumes and job descriptions rarely hold anything useful for matching past their first pages
+RANKING_MAX_PAGES = 10
+
+# The BM25 engine only keeps the best matches, which is all the result table shows anyway
+BM25_TOP_K = 200
+
+Row = Tuple[int, str]
+Ranking = Tuple[Row, float]
+
+
+def read_ranking_texts(file_paths: List[str]) -> List[Optional[str]]:
+    """
+    Reads the documents being ranked through the extraction service, stopping long PDFs after RANKING_MAX_PAGES
+    pages. The documents are parsed concurrently in the worker processes, the .doc files among them in a single
+    LibreOffice batch, and repeated runs hit its cache.
+
+    Documents that could not be read come back as None rather than as their error message.
+    """
+    texts = get_extraction_service().extract_many(file_paths, max_pages=RANKING_MAX_PAGES)
+    return [None if is_read_error(text) else text for text in texts]
+
+
+def vectorize_texts(texts: List[str]):
+    """Fits a TF-IDF model on the texts and returns the sparse document-term matrix."""
+    # scikit-learn takes seconds to import, so it is only loaded once a ranking is requested
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer()
+    return vectorizer.fit_transform(texts)
+
+
+def score_tfidf_matrix(tfidf_matrix):
+    """Returns the cosine similarity of the first row (the query) against every other row."""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    cosine_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
+    return cosine_similarities.flatten()
+
+
+def rank_with_tfidf(query_text: str, rows: Sequence[Row],
+                    reader: Callable[[List[str]], List[str]] = read_ranking_texts) -> List[Ranking]:
+    """
+    Scores every row against the query with cosine similarity over a freshly fitted TF-IDF matrix.
+
+    Args:
+        query_text (str): Text of the job description or resume being matched.
+        rows (Sequence[Row]): (database id, document path) pairs to score.
+        reader (Callable): Reads a list of paths and returns their texts in the same order (None when unreadable).
+
+    Returns:
+        List[Ranking]: ((database id, document path), score) pairs sorted by descending score.
+    """
+    # A document that could not be read matches nothing
+    texts = [query_text] + [text or "" for text in reader([path for _, path in rows])]
+    similarity_scores = score_tfidf_matrix(vectorize_texts(texts))
+    return sorted(zip(rows, similarity_scores), key=lambda x: x[1], reverse=True)
+
+
+def rank_with_bm25(query_text: str, rows: Sequence[Row], index: BM25Index,
+                   reader: Callable[[List[str]], List[str]] = read_ranking_texts,
+                   top_k: int = BM25_TOP_K) -> List[Ranking]:
+    """
+    Scores the rows against the query with the on-disk BM25 index, only reading documents that changed.
+
+    BM25 scores are unbounded, so they are scaled against the best match to fit the "Match (%)" column.
+
+    Args:
+        query_text (str): Text of the job description or resume being matched.
+        rows (Sequence[Row]): (database id, document path) pairs to score.
+        index (BM25Index): Index holding the documents of the rows.
+        reader (Callable): Reads a list of paths and returns their texts in the same order (None when unreadable).
+        top_k (int): Number of results to keep.
+
+    Returns:
+        List[Ranking]: ((database id, document path), score) pairs sorted by descending score.
+    """
+    index.sync(rows, reader)
+    paths = dict(rows)
+    results = index.search(query_text, top_k=top_k, allowed=paths.keys())
+    best_score = results[0][1] if results else 0.0
+    return [((doc_id, paths[doc_id]), score / best_score if best_score else 0.0) for doc_id, score in results]
+
+
+def hydrate_rankings(rankings: Iterable[Ranking], table_name: str, columns: Sequence[str],
+                     fetch: Callable = execute_query) -> Dict[int, dict]:
+    """
+    Loads the display columns of every ranked row in a single query.
+
+    Args:
+        rankings (Iterable[Ranking]): Rankings returned by one of the rank_with_* functions.
+        table_name (str): Table the ids belong to.
+        columns (Sequence[str]): Columns to load.
+        fetch (Callable): Query function with the execute_query signature.
+
+    Returns:
+        Dict[int, dict]: Column values keyed by database id.
+    """
+    ids = list(dict.fromkeys(row[0] for row, _ in rankings))
+    if not ids:
+        return {}
+
+    placeholders = ", ".join(["%s"] * len(ids))
+    query = f"SELECT id, {', '.join(columns)} FROM {table_name} WHERE id IN ({placeholders})"
+    response = fetch(query, tuple(ids), fetch_mode="all", get_column_names=True)
+    if not response or not response.get('result'):
+        return {}
+
+    column_names = response['column_names']
+    return {row[0]: dict(zip(column_names, row)) for row in response['result']}
+
+
+def open_ranking_index(name: str) -> BM25Index:
+    """Opens (or creates) the BM25 index stored in the output directory under the given name."""
+    return BM25Index(Path(find_output_directory(), "ranking_index", f"{name}.sqlite3"))
@@ -1,10 +1,11 @@
 from pathlib import Path
 
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont, QPixmap, QColor, QIcon
+from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtWidgets import *
 
-from resources.tools import resource_path, read_text_file, load_json_file, execute_query
+from resources.tools import resource_path, run_in_background, DocumentPane, extract_text, get_icon, \
+    get_window_icon, get_pixmap, JobOrderCardData, get_schema_metadata
 from .dialogs import EditCompanyDialog, AddFieldDialog
 
 application_path = str(resource_path(Path.cwd()))
@@ -13,10 +14,10 @@ application_path = str(resource_path(Path.cwd()))
 class JobOrderCard(QDialog):
     clientCardRequested = pyqtSignal(int)
 
-    def __init__(self, job_id=None, parent=None):
+    def __init__(self, job_id=None, parent=None, card_data=None):
         super().__init__(parent)
         self.setWindowTitle("Company Details")
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
         self.resize(1200, 800)  # Set the size of the dialog
 
         self.job_id = job_id
@@ -24,6 +25,8 @@ class JobOrderCard(QDialog):
         self.added_fields = {}
         self.ui_fields = []
         self.extra_columns = None
+        # The job order row, fetched in one query and reused by the name label and every section
+        self.card_data = card_data or JobOrderCardData(job_id).load(show_errors=True)
         self.initUI()
 
         # Adjust the size to screen resolution
@@ -50,9 +53,7 @@ class JobOrderCard(QDialog):
 
         # Company icon label
         icon_label = QLabel()
-        icon_pixmap = QPixmap(
-            str(Path(application_path, 'resources', 'icons', 'iconmonstr-briefcase-5-white.svg')))  # Placeholder icon
-        scaled_pixmap = icon_pixmap.scaled(32, 32, Qt.KeepAspectRatio)
+        scaled_pixmap = get_pixmap('iconmonstr-briefcase-5-white.svg', 32, 32)
         icon_label.setPixmap(scaled_pixmap)
         top_bar_layout.addWidget(icon_label)
 
@@ -131,15 +132,15 @@ class JobOrderCard(QDialog):
         buttonLayout = QHBoxLayout()
 
         addButton = QPushButton("Add Information")
-        addButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-briefcase-plus-6.svg'))))
+        addButton.setIcon(get_icon('iconmonstr-briefcase-plus-6.svg'))
         addButton.clicked.connect(self.onAddButtonClicked)
 
         editButton = QPushButton("Edit Information")
-        editButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-pencil-line-lined.svg'))))
+        editButton.setIcon(get_icon('iconmonstr-pencil-line-lined.svg'))
         editButton.clicked.connect(self.onEditButtonClicked)
 
         clientCardButton = QPushButton("Open Client Card")
-        clientCardButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'iconmonstr-share-8.svg'))))
+        clientCardButton.setIcon(get_icon('iconmonstr-share-8.svg'))
         clientCardButton.clicked.connect(self.onClientCardButtonClicked)
 
         buttonLayout.addWidget(addButton)
@@ -152,13 +153,10 @@ class JobOrderCard(QDialog):
         self.setLayout(mainLayout)
 
     def fetchAndSetName(self):
-        # Fetch company name from the database
-        query = "SELECT job_title FROM job_orders WHERE id = %s"
-        data = (self.job_id,)
-
-        result = execute_query(query, data, fetch_mode="one")
-        if result:
-            self.name_label.setText(result[0])
+        # Job title as loaded by the card
+        job_title = self.card_data.job_order.get("job_title")
+        if job_title:
+            self.name_label.setText(job_title)
         else:
             self.name_label.setText("Job Title Not Available")
 
@@ -167,13 +165,9 @@ class JobOrderCard(QDialog):
         titleFont = QFont("Arial", 10, QFont.Bold)
         dataFont = QFont("Arial", 10)
 
-        # Fetching company data from the database
-        query = "SELECT * FROM job_orders WHERE id = %s"
-        data = (self.job_id,)
-        result = execute_query(query, data, fetch_mode="one", get_column_names=True)
-
-        if result and 'result' in result and 'column_names' in result:
-            job_data = dict(zip(result['column_names'], result['result']))
+        # Job order data loaded by the card
+        job_data = self.card_data.job_order
+        if job_data:
 
             self.addData(self.jobInfoLeftLayout, "Job Title:", "job_title", None, job_data, titleFont, dataFont)
             self.addData(self.jobInfoRightLayout, "PO Order Number:", "po_order_number", None, job_data, titleFont,
@@ -220,9 +214,9 @@ class JobOrderCard(QDialog):
             self.addNotes(self.jobDescLayout, "Notes:", "notes_path", job_data, titleFont, dataFont)
 
             # User added data into Other Information
-            defined_columns = self.get_defined_columns_for_table("job_orders")
-            actual_columns = self.get_actual_columns_from_db("job_orders")
-            self.add_missing_columns_to_ui(self.otherInfoLayout, self.job_id, defined_columns, actual_columns,
+            defined_columns = get_schema_metadata().defined_columns("job_orders")
+            actual_columns = self.card_data.job_order_columns
+            self.add_missing_columns_to_ui(self.otherInfoLayout, job_data, defined_columns, actual_columns,
                                            titleFont, dataFont)
 
     def adjustSizeToScreen(self):
@@ -268,129 +262,76 @@ class JobOrderCard(QDialog):
             "value_widget": valueWidget,
         })
 
-    @staticmethod
-    def get_defined_columns_for_table(table_name):
-        # Load the JSON schema for the table
-        table_schemas = load_json_file(Path(application_path, 'resources', 'tools', 'table_schemas.json'))
-        if table_name in table_schemas:
-            # Extract just the column names from the SQL definition
-            columns = [line.split()[0] for line in table_schemas[table_name] if line.upper().startswith('    ')]
-            return columns
-        return []
-
-    @staticmethod
-    def get_actual_columns_from_db(table_name):
-        query = "SHOW COLUMNS FROM " + table_name
-        result = execute_query(query, fetch_mode="all", skip_SELECT=True)
-        if result:
-            # The column name is the first item in each tuple returned
-            return [column[0] for column in result]
-        return []
-
-    def add_missing_columns_to_ui(self, gridLayout, job_id, defined_columns, actual_columns, titleFont, dataFont):
-        # Find the difference between the actual columns and the defined columns
-        self.extra_columns = set(actual_columns) - set(defined_columns)
+    def add_missing_columns_to_ui(self, gridLayout, job_data, defined_columns, actual_columns, titleFont, dataFont):
+        # Columns added to the table before the custom fields store; their values came with the job order row
+        extra_fields = {column: job_data.get(column) for column in set(actual_columns) - set(defined_columns)}
+        # Fields added from the card are kept in the custom fields store
+        extra_fields.update(self.card_data.custom_fields)
+        self.extra_columns = set(extra_fields)
         column_index = 0  # Initialize column index to manage layout positioning
 
-        for column in self.extra_columns:
-            # Fetch the data for the extra column for the given job order
-            query = f"SELECT {column} FROM job_orders WHERE id = %s"
-            result = execute_query(query, (job_id,), fetch_mode="one")
-            if result:
-                # Calculate grid position
-                row = column_index // 2  # Integer division to calculate the row
-                col = column_index % 2  # Modulo to alternate between columns 0 and 1
-
-                # Create label and value widgets
-                labelWidget = QLabel(column.replace('_', ' ').title() + ":")
-                labelWidget.setFont(titleFont)
-                value = result[0] if result[0] is not None else "N/A"
-                valueWidget = QLabel(f'<span style="color: grey;">{value}</span>')
-                valueWidget.setFont(dataFont)
-
-                # Add widgets to the grid layout at calculated positions
-                gridLayout.addWidget(labelWidget, row, col * 2)  # Multiply col by 2 for label
-                gridLayout.addWidget(valueWidget, row, col * 2 + 1)  # Next column for value
-
-                column_index += 1  # Increment column index for next iteration
-
-                # Add to ui_fields for future reference
-                self.ui_fields.append({
-                    "label_text": column.replace('_', ' ').title() + ":",
-                    "label_widget": labelWidget,
-                    "db_key": (column,),
-                    "value_widget": valueWidget,
-                })
+        for column, value in extra_fields.items():
+            # Calculate grid position
+            row = column_index // 2  # Integer division to calculate the row
+            col = column_index % 2  # Modulo to alternate between columns 0 and 1
+
+            # Create label and value widgets
+            labelWidget = QLabel(column.replace('_', ' ').title() + ":")
+            labelWidget.setFont(titleFont)
+            value = value if value is not None else "N/A"
+            valueWidget = QLabel(f'<span style="color: grey;">{value}</span>')
+            valueWidget.setFont(dataFont)
+
+            # Add widgets to the grid layout at calculated positions
+            gridLayout.addWidget(labelWidget, row, col * 2)  # Multiply col by 2 for label
+            gridLayout.addWidget(valueWidget, row, col * 2 + 1)  # Next column for value
+
+            column_index += 1  # Increment column index for next iteration
+
+            # Add to ui_fields for future reference
+            self.ui_fields.append({
+                "label_text": column.replace('_', ' ').title() + ":",
+                "label_widget": labelWidget,
+                "db_key": (column,),
+                "value_widget": valueWidget,
+            })
 
     def addJobDescription(self, layout, label, key, data, titleFont, dataFont):
         labelWidget = QLabel(label)
         labelWidget.setFont(titleFont)
-        jobDescriptionEdit = QTextEdit()
-        jobDescriptionEdit.setReadOnly(True)
-
-        try:
-            jobDescriptionEdit.setText(read_text_file(data.get(key)))
-        except FileNotFoundError:
-            jobDescriptionEdit.setText("Job description file not found.")
-        except Exception as e:
-            jobDescriptionEdit.setText(f"Could not load the job description due to the following error: \n{e}.")
-
-        jobDescriptionEdit.setFont(dataFont)
-        jobDescriptionEdit.setStyleSheet("color: gray;")
+
+        # The description is extracted in the background and rendered as a truncated preview
+        jobDescriptionPane = DocumentPane(data.get(key), empty_text="Job description file not found.")
+        jobDescriptionPane.textView.setFont(dataFont)
         layout.addWidget(labelWidget)
-        layout.addWidget(jobDescriptionEdit)
+        layout.addWidget(jobDescriptionPane)
 
         # Add to ui_fields for future reference
         self.ui_fields.append({
             "label_text": label,
             "label_widget": labelWidget,
             "db_key": (key,),
-            "value_widget": jobDescriptionEdit,
+            "value_widget": jobDescriptionPane,
         })
 
     def addNotes(self, layout, label, key, data, titleFont, dataFont):
         labelWidget = QLabel(label)
         labelWidget.setFont(titleFont)
         notesListWidget = QListWidget()
+        notesListWidget.setFont(dataFont)
 
-        try:
-            with open(data.get(key), 'r') as file:
-                notes_content = file.readlines()
-                current_title = ""
-                current_note = ""
-                for line in notes_content:
-                    if line.startswith("Title: "):
-                        # If there's a current note being processed, add it before starting a new one
-                        if current_title:
-                            item = QListWidgetItem(f"{current_title}: {current_note[:10]}...")
-                            item.setForeground(QColor('gray'))  # Set the text color to gray
-                            notesListWidget.addItem(item)
-                            current_note = ""  # Reset current note for the next one
-                        current_title = line[len("Title: "):].strip()  # Remove the "Title: " part
-                    elif line.startswith("Note: "):
-                        current_note += line[len("Note: "):]  # Append text after "Note: "
-                    elif line.strip() == "" and current_title:  # End of a note section
-                        # Add the note to the list and reset for the next note
-                        item = QListWidgetItem(f"{current_title}: {current_note[:10]}...")
-                        item.setForeground(QColor('gray'))  # Set the text color to gray
-                        notesListWidget.addItem(item)
-                        current_title = ""
-                        current_note = ""
-                # Add the last note if the file doesn't end with an empty line
-                if current_title:
-                    item = QListWidgetItem(f"{current_title}: {current_note[:10]}...")
-                    item.setForeground(QColor('gray'))  # Set the text color to gray
-                    notesListWidget.addItem(item)
-        except FileNotFoundError:
-            item = QListWidgetItem("Notes file not found.")
-            item.setForeground(QColor('gray'))  # Set the text color to gray
-            notesListWidget.addItem(item)
-        except Exception as e:
-            item = QListWidgetItem(f"Could not load the notes due to the following error: \n{e}.")
-            item.setForeground(QColor('gray'))  # Set the text color to gray
-            notesListWidget.addItem(item)
+        notes_path = data.get(key)
+        if notes_path in [None, 'N/A', 'NULL', 'None', '']:
+            self.addNoteItem(notesListWidget, "Notes file not found.")
+        else:
+            # Read the notes off the GUI thread and fill the list once they are available
+            self.addNoteItem(notesListWidget, "Loading notes...")
+            self.notesTask = run_in_background(
+                extract_text, notes_path,
+                on_finished=lambda text: self.populateNotes(notesListWidget, text),
+                on_failed=lambda message: self.populateNotes(
+                    notesListWidget, None, f"Could not load the notes due to the following error: \n{message}."))
 
-        notesListWidget.setFont(dataFont)
         layout.addWidget(labelWidget)
         layout.addWidget(notesListWidget)
 
@@ -402,6 +343,42 @@ class JobOrderCard(QDialog):
             "value_widget": notesListWidget,
         })
 
+    @staticmethod
+    def addNoteItem(notesListWidget, text):
+        item = QListWidgetItem(text)
+        item.setForeground(QColor('gray'))  # Set the text color to gray
+        notesListWidget.addItem(item)
+
+    def populateNotes(self, notesListWidget, notes_text, error_text=None):
+        """Parses the "Title:"/"Note:" blocks of the notes file into the list."""
+        notesListWidget.clear()
+        if error_text:
+            self.addNoteItem(notesListWidget, error_text)
+            return
+        if notes_text is None or notes_text == "File not found." or notes_text.startswith("An error occurred"):
+            self.addNoteItem(notesListWidget, "Notes file not found.")
+            return
+
+        current_title = ""
+        current_note = ""
+        for line in notes_text.splitlines(keepends=True):
+            if line.startswith("Title: "):
+                # If there's a current note being processed, add it before starting a new one
+                if current_title:
+                    self.addNoteItem(notesListWidget, f"{current_title}: {current_note[:10]}...")
+                    current_note = ""  # Reset current note for the next one
+                current_title = line[len("Title: "):].strip()  # Remove the "Title: " part
+            elif line.startswith("Note: "):
+                current_note += line[len("Note: "):]  # Append text after "Note: "
+            elif line.strip() == "" and current_title:  # End of a note section
+                # Add the note to the list and reset for the next note
+                self.addNoteItem(notesListWidget, f"{current_title}: {current_note[:10]}...")
+                current_title = ""
+                current_note = ""
+        # Add the last note if the file doesn't end with an empty line
+        if current_title:
+            self.addNoteItem(notesListWidget, f"{current_title}: {current_note[:10]}...")
+
     def onAddButtonClicked(self):
         dialog = AddFieldDialog(self.job_id, "job_orders", self.added_fields, self)
         dialog.dataUpdated.connect(self.refreshCompanyData)
@@ -414,6 +391,7 @@ class JobOrderCard(QDialog):
                 ui_field['label_widget'].deleteLater()
             ui_field['value_widget'].deleteLater()
         self.ui_fields.clear()  # Clear the list after removing widgets
+        self.card_data.load(show_errors=True)  # Pick up the edited or added fields
         self.addDataToLayout()
         self.added_fields = {}
         self.adjustSizeToScreen()
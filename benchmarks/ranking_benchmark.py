@@ -0,0 +1,232 @@
+"""
+Benchmarks the finder agent ranking pipeline against a synthetic corpus.
+
+Every stage (extraction, vectorization, scoring and result hydration) is timed on its own, and the per-stage
+latency, throughput and peak RSS are written to a JSON report. The database is replaced by a local SQLite
+stand-in, so no MySQL server is needed.
+
+Run it from the repository root:
+
+    python -m benchmarks.ranking_benchmark --sizes 1000 10000 --formats txt docx pdf
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from application.finder_agent.bm25_index import BM25Index
+from application.finder_agent.ranking import (read_ranking_texts, vectorize_texts, score_tfidf_matrix,
+                                              rank_with_bm25, hydrate_rankings)
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_CORPUS_DIR = BENCHMARK_DIR / "corpus"
+DEFAULT_RESULTS_DIR = BENCHMARK_DIR / "results"
+
+SKILLS = ["python", "sql", "excel", "forklift", "welding", "cnc", "machining", "assembly", "inventory",
+          "logistics", "shipping", "receiving", "quality", "inspection", "blueprints", "osha", "safety",
+          "maintenance", "electrical", "plc", "hydraulics", "pneumatics", "customer", "service", "sales",
+          "accounting", "payroll", "scheduling", "supervisor", "leadership", "training", "lean", "six",
+          "sigma", "kaizen", "solidworks", "autocad", "java", "javascript", "networking", "helpdesk",
+          "recruiting", "onboarding", "compliance", "auditing", "procurement", "purchasing", "forecasting"]
+TITLES = ["Machine Operator", "Warehouse Associate", "Quality Inspector", "Maintenance Technician",
+          "Production Supervisor", "Staff Accountant", "Software Developer", "Help Desk Analyst",
+          "Welder", "CNC Machinist", "Logistics Coordinator", "Customer Service Representative"]
+FILLER = ["responsible", "for", "the", "team", "daily", "operations", "experience", "with", "managed",
+          "improved", "process", "reduced", "costs", "worked", "across", "shifts", "and", "ensured",
+          "standards", "were", "met", "years", "in", "a", "fast", "paced", "environment"]
+
+EMPLOYEE_RESULT_COLUMNS = ["first_name", "last_name", "availability", "job_id", "employee_type"]
+
+
+# ---------------------------------------------------------------------- #
+# Synthetic corpus
+# ---------------------------------------------------------------------- #
+def synthetic_document(rng: random.Random, paragraphs: int) -> str:
+    """Builds a resume-like document made of a title and paragraphs mixing skills with filler words."""
+    lines = [rng.choice(TITLES)]
+    for _ in range(paragraphs):
+        words = rng.choices(SKILLS, k=rng.randint(5, 15)) + rng.choices(FILLER, k=rng.randint(30, 70))
+        rng.shuffle(words)
+        lines.append(" ".join(words).capitalize() + ".")
+    return "\n".join(lines)
+
+
+def write_document(path: Path, text: str) -> None:
+    """Writes the text as .txt, .docx or .pdf depending on the extension of the path."""
+    if path.suffix == ".txt":
+        path.write_text(text, encoding="utf-8")
+    elif path.suffix == ".docx":
+        import docx
+        document = docx.Document()
+        for line in text.split("\n"):
+            document.add_paragraph(line)
+        document.save(str(path))
+    elif path.suffix == ".pdf":
+        import fitz  # PyMuPDF
+        with fitz.open() as document:
+            page = document.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+            document.save(str(path))
+    else:
+        raise ValueError(f"Unsupported benchmark format: {path.suffix}")
+
+
+def generate_corpus(corpus_dir: Path, size: int, extension: str, seed: int = 0) -> List[Path]:
+    """Creates (or reuses) a corpus of synthetic resumes and returns their paths."""
+    target_dir = corpus_dir / str(size) / extension
+    target_dir.mkdir(parents=True, exist_ok=True)
+    paths = [target_dir / f"{number:06d}.{extension}" for number in range(size)]
+    rng = random.Random(seed)
+    for path in paths:
+        # Documents are generated in order so the corpus is identical whether it is reused or rebuilt
+        text = synthetic_document(rng, rng.randint(3, 8))
+        if not path.exists():
+            write_document(path, text)
+    return paths
+
+
+# ---------------------------------------------------------------------- #
+# Local database stand-in
+# ---------------------------------------------------------------------- #
+class LocalDatabase:
+    """SQLite stand-in exposing the same execute_query interface as resources.tools.mydb."""
+
+    def __init__(self, size: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE employees (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, "
+                                "availability TEXT, job_id TEXT, employee_type TEXT, resume_path TEXT)")
+        self.connection.executemany(
+            "INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(number + 1, f"First{number}", f"Last{number}", rng.choice(["NW", "W", "~A", "NA"]),
+              f"J{number % 500}", rng.choice([None, "Contract", "1099"]), None) for number in range(size)])
+        self.statements = 0
+
+    def execute_query(self, query: str, data: Optional[Tuple[Any, ...]] = None, **kwargs):
+        self.statements += 1
+        cursor = self.connection.execute(query.replace("%s", "?"), data or ())
+        result_dict = {}
+        if kwargs.get("get_column_names"):
+            result_dict["column_names"] = [column[0] for column in cursor.description]
+        result_dict["result"] = cursor.fetchall() if kwargs.get("fetch_mode") == "all" else cursor.fetchone()
+        if len(result_dict) == 1:
+            return result_dict["result"]
+        return result_dict
+
+
+# ---------------------------------------------------------------------- #
+# Measurements
+# ---------------------------------------------------------------------- #
+def peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of the process in MB, when the platform exposes it."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def measure(name: str, items: int, func, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Runs one stage and returns its result together with its timing record."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    record = {
+        "stage": name,
+        "items": items,
+        "seconds": round(elapsed, 4),
+        "items_per_second": round(items / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    print(f"  {name:<22} {elapsed:>9.3f}s  {record['items_per_second'] or 0:>12,.1f}/s")
+    return result, record
+
+
+def run_benchmark(size: int, extension: str, corpus_dir: Path, top_k: int, seed: int) -> Dict[str, Any]:
+    """Runs every stage of the pipeline for one corpus size and format."""
+    print(f"{size} .{extension} documents")
+    paths, generation = measure("generate_corpus", size, generate_corpus, corpus_dir, size, extension, seed)
+    query_text = synthetic_document(random.Random(seed + 1), 6)
+    rows = [(number + 1, str(path)) for number, path in enumerate(paths)]
+    stages = [generation]
+
+    # Read the way the finder agent does: through the extraction service, with the same page cap
+    texts, record = measure("extraction", size, read_ranking_texts, [str(path) for path in paths])
+    texts = [text or "" for text in texts]
+    stages.append(record)
+
+    tfidf_matrix, record = measure("vectorization", size + 1, vectorize_texts, [query_text] + texts)
+    stages.append(record)
+
+    def score_and_sort():
+        scores = score_tfidf_matrix(tfidf_matrix)
+        return sorted(zip(rows, scores), key=lambda x: x[1], reverse=True)
+
+    tfidf_rankings, record = measure("scoring_tfidf", size, score_and_sort)
+    stages.append(record)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        with BM25Index(Path(index_dir, "benchmark.sqlite3")) as index:
+            # The extracted texts are reused, so this only measures the indexing itself
+            texts_by_path = dict(zip((path for _, path in rows), texts))
+            _, record = measure("bm25_index_build", size, index.sync, rows,
+                                lambda file_paths: [texts_by_path[path] for path in file_paths])
+            stages.append(record)
+
+            _, record = measure("scoring_bm25", size, rank_with_bm25, query_text, rows, index,
+                                reader=lambda file_paths: [], top_k=top_k)
+            stages.append(record)
+
+    database = LocalDatabase(size, seed)
+    top_rankings = tfidf_rankings[:top_k]
+    hydrated, record = measure("hydration", len(top_rankings), hydrate_rankings, top_rankings, "employees",
+                               EMPLOYEE_RESULT_COLUMNS, fetch=database.execute_query)
+    record["statements"] = database.statements
+    stages.append(record)
+
+    return {"documents": size, "format": extension, "top_k": top_k, "hydrated_rows": len(hydrated),
+            "stages": stages}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the finder agent ranking pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="Corpus sizes, e.g. 1000 10000 100000")
+    parser.add_argument("--formats", nargs="+", default=["txt"], choices=["txt", "docx", "pdf"])
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR,
+                        help="Where the synthetic documents are generated and reused from.")
+    parser.add_argument("--output", type=Path, default=None, help="JSON report path.")
+    parser.add_argument("--top-k", type=int, default=200, help="Number of results that are hydrated.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "runs": [run_benchmark(size, extension, args.corpus_dir, args.top_k, args.seed)
+                 for size in args.sizes for extension in args.formats]
+    }
+
+    output = args.output or DEFAULT_RESULTS_DIR / f"ranking_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
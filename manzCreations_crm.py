@@ -1,16 +1,40 @@
+import time
+
+# Measured from here rather than from process start, so it also works in the frozen executable
+STARTUP_STARTED = time.perf_counter()
+# Time to first window the start-up is held to. Heavy dependencies (scikit-learn, PyMuPDF, python-docx, pandas)
+# and the cards/finder dialogs must stay out of the imports below; they are loaded where they are first used.
+STARTUP_TARGET_SECONDS = 2.0
+
+# Opt-in start-up profiling (CRM_BOOT_PROFILE=1 or --profile-boot). Imported first so it can time the imports below
+from resources.tools.boot_profiler import boot_profiler
+
+boot_profiler.start()
+
+import json
 import locale
+import multiprocessing
+import os
 import subprocess
-from datetime import timedelta
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional
 
-from PyQt5.QtCore import QSize
+from PyQt5.QtCore import QSize, Qt, QTimer
 from PyQt5.QtGui import QFont, QIcon
 from PyQt5.QtWidgets import *
 
 # Import application specific files
-from application.external_widgets import *
-from application.finder_agent import *
+from application.external_widgets import AddClientDialog, AddEmployeeDialog, JobOrderPage, TableWidget, \
+    getDatabaseInfo
 
-from resources.tools import *
+from resources.tools import resource_path, load_json_file, execute_query, find_output_directory, addToDatabase, \
+    show_error_message, archive_and_delete_employee_job_order, archive_and_delete_company_job_order, \
+    retrieve_current_job_order, retrieve_current_company, change_active_needed_employees, \
+    check_database_and_tables, create_db_connection, save_db_config, read_output_directory, \
+    sweep_employee_availability, reconcile_employee_counts, run_in_background, get_icon, get_window_icon, get_pixmap, \
+    get_stylesheet, SnapshotTableLoader, get_card_prefetcher, store_document, delete_custom_fields
 
 locale.setlocale(locale.LC_ALL, '')  # Set to the user's default locale
 
@@ -25,6 +49,16 @@ column_data_path = Path(application_path, 'resources', 'tools', 'column_data.jso
 HEADERS = load_json_file(column_data_path, "Column Data JSON file")
 
 
+def format_phone_number(value):
+    if isinstance(value, str) and len(value) == 10:
+        return f"+1 ({value[:3]}) {value[3:6]}-{value[6:]}"
+    return value
+
+
+def format_currency(value):
+    return locale.currency(value, grouping=True) if value is not None else value
+
+
 ###################################
 
 
@@ -57,18 +91,21 @@ class EmployeePage(QWidget):
         self.titleLabel = QLabel("Employee Management")
         self.titleLabel.setStyleSheet("font-size: 18pt; font-weight: bold; color: #64bfd1;")
         self.headerLayout.addWidget(self.titleLabel)
+
+        # Shown while the table is refreshed from the database
+        self.statusLabel = QLabel()
+        self.headerLayout.addWidget(self.statusLabel)
         self.headerLayout.addStretch()
 
         # Optional: Add an image to the header
         self.headerIcon = QLabel()
-        self.headerIcon.setPixmap(QIcon(str(Path(application_path, 'resources', 'example.png'))).pixmap(50, 50))
+        self.headerIcon.setPixmap(get_pixmap('example.png', 50, 50))
         self.headerLayout.addWidget(self.headerIcon)
 
         # Refresh Table Button
         self.refreshTableButton = QPushButton()
         buttonHeight = self.refreshTableButton.sizeHint().height()
-        self.refreshTableButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons',
-                                                       'iconmonstr-refresh-lined.svg'))))
+        self.refreshTableButton.setIcon(get_icon('iconmonstr-refresh-lined.svg'))
         self.refreshTableButton.setIconSize(QSize(buttonHeight, buttonHeight))
         self.refreshTableButton.clicked.connect(self.populateTable)
         self.headerLayout.addWidget(self.refreshTableButton)
@@ -91,6 +128,9 @@ class EmployeePage(QWidget):
 
         # Table Widget for Employees
         self.tableWidget = TableWidget(HEADERS["EMPLOYEE_HEADERS"], "Employee")
+        self.tableLoader = SnapshotTableLoader(self.tableWidget, self.statusLabel, editable=False, parent=self)
+        self.tableLoader.refreshing.connect(self.onTableRefreshing)
+        self.tableLoader.loaded.connect(self.filterTable)
         self.tableWidget.horizontalHeader().sectionClicked.connect(self.onHeaderClicked)
         self.scrollAreaLayout.addWidget(self.tableWidget)
 
@@ -200,6 +240,8 @@ class EmployeePage(QWidget):
             sql = f"UPDATE employees SET {change['columnName']} = %s WHERE id = %s"
             data = (change['newValue'], change['rowId'])
             execute_query(sql, data)
+        # Cards prefetched before the save would show the old values
+        get_card_prefetcher().invalidate()
 
         # Clear pending changes after saving
         self.tableWidget.pendingChanges.clear()
@@ -249,6 +291,7 @@ class EmployeePage(QWidget):
                             # Assuming the table is named 'employees', adjust as necessary
                             deleteQuery = "DELETE FROM employees WHERE id = %s"
                             cursor.execute(deleteQuery, (idToDelete,))
+                            delete_custom_fields(cursor, "employees", [idToDelete])
                         # Commit the transaction
                         connection.commit()
                     QMessageBox.information(self, "Success", "The selected entries have been deleted.")
@@ -260,6 +303,7 @@ class EmployeePage(QWidget):
             finally:
                 if connection and connection.is_connected():
                     connection.close()
+            get_card_prefetcher().invalidate()
 
             # Remove the rows from the table widget. Iterate in reverse order to avoid index shifting issues.
             for selectedRow in sorted(selectedRows, reverse=True):
@@ -272,6 +316,11 @@ class EmployeePage(QWidget):
         self.revertButton.setEnabled(False)
         self.deleteButton.setEnabled(False)
 
+    def onTableRefreshing(self, refreshing):
+        # Rows shown from the snapshot may be stale, so editing waits for the live data
+        if not self.saveButton.isEnabled():
+            self.editButton.setEnabled(not refreshing)
+
     def onHeaderClicked(self, logicalIndex):
         """
         Sorts the table based on the clicked column header and updates the header to display a sorting arrow.
@@ -344,7 +393,6 @@ class EmployeePage(QWidget):
         """
         if employee_type is None:
             employee_type = self.employee_type
-        self.tableWidget.setRowCount(0)  # Clear the table
 
         # Adjust SQL query based on employee type
         query = "SELECT * FROM employees"
@@ -359,26 +407,8 @@ class EmployeePage(QWidget):
                 # Select employees where employee_type is not '1099' (including NULL) and availability is not 'NA'
                 query += " WHERE (employee_type <> '1099' OR employee_type IS NULL) AND availability <> 'NA'"
 
-        # Fetch data from the database
-        results = execute_query(query, fetch_mode="all", return_cursor=True)
-        employees = results["result"]
-        cursor = results["cursor"]
-        for row, emp_data in enumerate(employees):
-            self.tableWidget.insertRow(row)
-            column_names = list(HEADERS["EMPLOYEE_HEADERS"].keys())
-            for column, column_name in enumerate(column_names):
-                # Get the value corresponding to the column name
-                value = emp_data[cursor.column_names.index(column_name)]
-                if column_name == "phone" and len(value) == 10:
-                    value = f"+1 ({value[:3]}) {value[3:6]}-{value[6:]}"
-                item = QTableWidgetItem(str(value))
-                item.setToolTip(str(value))
-                item.setFlags(item.flags() ^ Qt.ItemIsEditable)
-                self.tableWidget.setItem(row, column, item)
-                if column_name == "id":
-                    self.tableWidget.hideColumn(column)
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Show the last snapshot right away and fetch the data from the database in the background
+        self.tableLoader.load(f"employees_{employee_type or 'all'}", query, {"phone": format_phone_number})
 
     def openAddEmployeeDialog(self) -> None:
         """
@@ -392,6 +422,12 @@ class EmployeePage(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             employee_data = dialog.getEmployeeData()
             sql_headers = list(employee_data.keys())
+            # The resume is kept in the document store, so moving or deleting the original does not lose it
+            try:
+                employee_data["resume_path"] = store_document(employee_data["resume_path"])
+            except OSError as e:
+                show_error_message(f"The resume could not be stored: {e}")
+                return
 
             # Check if an employee with the same name already exists
             query = "SELECT id FROM employees WHERE first_name = %s AND last_name = %s"
@@ -414,6 +450,7 @@ class EmployeePage(QWidget):
                     return  # Do not proceed with adding a new employee
             else:
                 addToDatabase(employee_data, sql_headers, "employees")
+            get_card_prefetcher().invalidate()
             self.populateTable(self.employee_type)
         else:
             return
@@ -421,12 +458,14 @@ class EmployeePage(QWidget):
         # Determine the id for the new employee based on the database
         query = "SELECT id FROM employees WHERE first_name = %s AND last_name = %s"
         result = execute_query(query, (employee_data["first_name"], employee_data["last_name"]))
+        from application.employee_card import EmployeeCard
         dialog = EmployeeCard(database_id=result[0])
         if dialog.exec_() == QDialog.Accepted:
             pass
 
     @staticmethod
     def openJobFinderAgent():
+        from application.finder_agent import RankingJobOrderResultsDialog
         dialog = RankingJobOrderResultsDialog()
         dialog.exec_()
 
@@ -447,6 +486,7 @@ class EmployeePage(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.tableWidget.horizontalHeaderItem(i).text() for i in
                                              range(self.tableWidget.columnCount())])
 
@@ -516,18 +556,21 @@ class ClientPage(QWidget):
         self.titleLabel = QLabel("Client Management")
         self.titleLabel.setStyleSheet("font-size: 18pt; font-weight: bold; color: #64bfd1;")
         self.headerLayout.addWidget(self.titleLabel)
+
+        # Shown while the table is refreshed from the database
+        self.statusLabel = QLabel()
+        self.headerLayout.addWidget(self.statusLabel)
         self.headerLayout.addStretch()
 
         # Optional: Add an image to the header
         self.headerIcon = QLabel()
-        self.headerIcon.setPixmap(QIcon(str(Path(application_path, 'resources', 'example.png'))).pixmap(50, 50))
+        self.headerIcon.setPixmap(get_pixmap('example.png', 50, 50))
         self.headerLayout.addWidget(self.headerIcon)
 
         # Refresh Table Button
         self.refreshTableButton = QPushButton()
         buttonHeight = self.refreshTableButton.sizeHint().height()
-        self.refreshTableButton.setIcon(QIcon(str(Path(application_path, 'resources', 'icons',
-                                                       'iconmonstr-refresh-lined.svg'))))
+        self.refreshTableButton.setIcon(get_icon('iconmonstr-refresh-lined.svg'))
         self.refreshTableButton.setIconSize(QSize(buttonHeight, buttonHeight))
         self.refreshTableButton.clicked.connect(self.populateTable)
         self.headerLayout.addWidget(self.refreshTableButton)
@@ -550,6 +593,9 @@ class ClientPage(QWidget):
 
         # Table Widget for Clients
         self.tableWidget = TableWidget(HEADERS["CLIENT_HEADERS"], "Client")
+        self.tableLoader = SnapshotTableLoader(self.tableWidget, self.statusLabel, parent=self)
+        self.tableLoader.refreshing.connect(self.onTableRefreshing)
+        self.tableLoader.loaded.connect(self.filterTable)
         self.tableWidget.horizontalHeader().sectionClicked.connect(self.onHeaderClicked)
         self.scrollAreaLayout.addWidget(self.tableWidget)
 
@@ -656,6 +702,8 @@ class ClientPage(QWidget):
             sql = f"UPDATE clients SET {change['columnName']} = %s WHERE id = %s"
             data = (change['newValue'], change['rowId'])
             execute_query(sql, data)
+        # Cards prefetched before the save would show the old values
+        get_card_prefetcher().invalidate()
 
         # Clear pending changes after saving
         self.tableWidget.pendingChanges.clear()
@@ -714,6 +762,7 @@ class ClientPage(QWidget):
                             # Assuming the table is named 'employees', adjust as necessary
                             deleteQuery = "DELETE FROM clients WHERE id = %s"
                             cursor.execute(deleteQuery, (idToDelete,))
+                            delete_custom_fields(cursor, "clients", [idToDelete])
                         # Commit the transaction
                         connection.commit()
                     QMessageBox.information(self, "Success", "The selected entries have been deleted.")
@@ -725,6 +774,7 @@ class ClientPage(QWidget):
             finally:
                 if connection and connection.is_connected():
                     connection.close()
+            get_card_prefetcher().invalidate()
 
             # Remove the rows from the table widget. Iterate in reverse order to avoid index shifting issues.
             for selectedRow in sorted(selectedRows, reverse=True):
@@ -737,6 +787,11 @@ class ClientPage(QWidget):
         self.revertButton.setEnabled(False)
         self.deleteButton.setEnabled(False)
 
+    def onTableRefreshing(self, refreshing):
+        # Rows shown from the snapshot may be stale, so editing waits for the live data
+        if not self.saveButton.isEnabled():
+            self.editButton.setEnabled(not refreshing)
+
     def onHeaderClicked(self, logicalIndex):
         """
         Sorts the table based on the clicked column header and updates the header to display a sorting arrow.
@@ -807,33 +862,11 @@ class ClientPage(QWidget):
         Populate the table with data from the clients database.
         Optionally filters the employees based on their type.
         """
-        self.tableWidget.setRowCount(0)  # Clear the table
-
-        # Adjust SQL query based on employee type
         query = "SELECT * FROM clients"
 
-        # Fetch data from the database
-        results = execute_query(query, fetch_mode="all", return_cursor=True)
-        clients = results["result"]
-        cursor = results["cursor"]
-        for row, client_data in enumerate(clients):
-            self.tableWidget.insertRow(row)
-            column_names = list(HEADERS["CLIENT_HEADERS"].keys())
-            for column, column_name in enumerate(column_names):
-                # Get the value corresponding to the column name
-                value = client_data[cursor.column_names.index(column_name)]
-                if column_name == "contact_phone":
-                    if len(value) == 10:
-                        value = f"+1 ({value[:3]}) {value[3:6]}-{value[6:]}"
-                elif column_name == "billing_allowance":
-                    value = locale.currency(value, grouping=True)
-                item = QTableWidgetItem(str(value))
-                item.setToolTip(str(value))
-                self.tableWidget.setItem(row, column, item)
-                if column_name == "id":
-                    self.tableWidget.hideColumn(column)
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Show the last snapshot right away and fetch the data from the database in the background
+        self.tableLoader.load("clients", query, {"contact_phone": format_phone_number,
+                                                 "billing_allowance": format_currency})
 
     def createJobOrder(self):
         """
@@ -907,6 +940,7 @@ class ClientPage(QWidget):
                     return  # Do not proceed with adding a new employer
             else:
                 addToDatabase(client_data, sql_headers, "clients")
+            get_card_prefetcher().invalidate()
             self.populateTable()
 
     def exportToExcel(self):
@@ -926,6 +960,7 @@ class ClientPage(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.tableWidget.horizontalHeaderItem(i).text() for i in
                                              range(self.tableWidget.columnCount())])
 
@@ -977,6 +1012,10 @@ class CurrentJobOrdersPage(QWidget):
         self.titleLabel = QLabel("Current Job Orders")
         self.titleLabel.setStyleSheet("font-size: 18pt; font-weight: bold; color: #64bfd1;")
         self.headerLayout.addWidget(self.titleLabel)
+
+        # Shown while the table is refreshed from the database
+        self.statusLabel = QLabel()
+        self.headerLayout.addWidget(self.statusLabel)
         self.layout.addLayout(self.headerLayout)
 
         # Table and button layout
@@ -995,6 +1034,9 @@ class CurrentJobOrdersPage(QWidget):
 
         # Table Widget for Job Orders
         self.tableWidget = TableWidget(HEADERS["JOB_ORDER_HEADERS"], "Job Order")
+        self.tableLoader = SnapshotTableLoader(self.tableWidget, self.statusLabel, parent=self)
+        self.tableLoader.refreshing.connect(self.onTableRefreshing)
+        self.tableLoader.loaded.connect(self.filterTable)
         self.tableWidget.horizontalHeader().sectionClicked.connect(self.onHeaderClicked)
         self.scrollAreaLayout.addWidget(self.tableWidget)
 
@@ -1086,6 +1128,8 @@ class CurrentJobOrdersPage(QWidget):
             sql = f"UPDATE job_orders SET {change['columnName']} = %s WHERE id = %s"
             data = (change['newValue'], change['rowId'])
             execute_query(sql, data)
+        # Cards prefetched before the save would show the old values
+        get_card_prefetcher().invalidate()
 
         # Clear pending changes after saving
         self.tableWidget.pendingChanges.clear()
@@ -1135,6 +1179,7 @@ class CurrentJobOrdersPage(QWidget):
                             # Assuming the table is named 'employees', adjust as necessary
                             deleteQuery = "DELETE FROM job_orders WHERE id = %s"
                             cursor.execute(deleteQuery, (idToDelete,))
+                            delete_custom_fields(cursor, "job_orders", [idToDelete])
                         # Commit the transaction
                         connection.commit()
                     QMessageBox.information(self, "Success", "The selected entries have been deleted.")
@@ -1146,6 +1191,7 @@ class CurrentJobOrdersPage(QWidget):
             finally:
                 if connection and connection.is_connected():
                     connection.close()
+            get_card_prefetcher().invalidate()
 
             # Remove the rows from the table widget. Iterate in reverse order to avoid index shifting issues.
             for selectedRow in sorted(selectedRows, reverse=True):
@@ -1153,31 +1199,15 @@ class CurrentJobOrdersPage(QWidget):
 
     @staticmethod
     def remove_active_employees_from_client(employer_id, job_order_id):
-        # Fetch the current values of needed_employees and active_employees
-        query = "SELECT active_employees FROM job_orders WHERE id = %s"
-        result = execute_query(query, (job_order_id,), fetch_mode='one')
-        if result:
-            jo_active_employees = result[0]
-        else:
-            return
-
-        query = "SELECT active_employees FROM clients WHERE id = %s"
-        result = execute_query(query, (employer_id,), fetch_mode='one')
-        if result:
-            cl_active_employees = result[0]
-        else:
-            return
-
-        # Decrement needed_employees
-        new_active_employees = cl_active_employees - jo_active_employees
-
-        # Update the clients table with the new values
+        # Subtract the employees of the job order from its client in a single statement, so a placement made at the
+        # same time is not lost
         update_query = """
-                        UPDATE clients 
-                        SET active_employees = %s 
-                        WHERE id = %s
+                        UPDATE clients c
+                        JOIN job_orders jo ON jo.id = %s
+                        SET c.active_employees = c.active_employees - jo.active_employees
+                        WHERE c.id = %s
                         """
-        execute_query(update_query, (new_active_employees, employer_id))
+        execute_query(update_query, (job_order_id, employer_id))
 
     def disableEditing(self):
         self.tableWidget.disableEditing()
@@ -1186,6 +1216,11 @@ class CurrentJobOrdersPage(QWidget):
         self.revertButton.setEnabled(False)
         self.deleteButton.setEnabled(False)
 
+    def onTableRefreshing(self, refreshing):
+        # Rows shown from the snapshot may be stale, so editing waits for the live data
+        if not self.saveButton.isEnabled():
+            self.editButton.setEnabled(not refreshing)
+
     def onHeaderClicked(self, logicalIndex):
         """
         Sorts the table based on the clicked column header and updates the header to display a sorting arrow.
@@ -1256,31 +1291,14 @@ class CurrentJobOrdersPage(QWidget):
         Populate the table with data from the clients database.
         Optionally filters the employees based on their type.
         """
-        self.tableWidget.setRowCount(0)  # Clear the table
-
-        # Adjust SQL query based on employee type
         query = "SELECT * FROM job_orders"
 
-        # Fetch data from the database
-        results = execute_query(query, fetch_mode="all", return_cursor=True)
-        job_orders = results["result"]
-        cursor = results["cursor"]
-        for row, job_data in enumerate(job_orders):
-            self.tableWidget.insertRow(row)
-            column_names = list(HEADERS["JOB_ORDER_HEADERS"].keys())
-            for column, column_name in enumerate(column_names):
-                # Get the value corresponding to the column name
-                value = job_data[cursor.column_names.index(column_name)]
-                item = QTableWidgetItem(str(value))
-                item.setToolTip(str(value))
-                self.tableWidget.setItem(row, column, item)
-                if column_name == "id":
-                    self.tableWidget.hideColumn(column)
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Show the last snapshot right away and fetch the data from the database in the background
+        self.tableLoader.load("job_orders", query)
 
     @staticmethod
     def openEmployeeFinderAgent():
+        from application.finder_agent import RankingEmployeeResultsDialog
         dialog = RankingEmployeeResultsDialog()
         dialog.exec_()
 
@@ -1301,6 +1319,7 @@ class CurrentJobOrdersPage(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.tableWidget.horizontalHeaderItem(i).text() for i in
                                              range(self.tableWidget.columnCount())])
 
@@ -1354,6 +1373,10 @@ class OldJobOrdersPage(QWidget):
         self.titleLabel = QLabel("Old Job Orders")
         self.titleLabel.setStyleSheet("font-size: 18pt; font-weight: bold; color: #64bfd1;")
         self.headerLayout.addWidget(self.titleLabel)
+
+        # Shown while the table is refreshed from the database
+        self.statusLabel = QLabel()
+        self.headerLayout.addWidget(self.statusLabel)
         self.layout.addLayout(self.headerLayout)
 
         # Delete Entries Button
@@ -1383,6 +1406,9 @@ class OldJobOrdersPage(QWidget):
         self.headers = HEADERS["OLD_EMPLOYEE_JOB_ORDER_HEADERS"] if self.dbSide == "Employee" else HEADERS[
             "OLD_COMPANY_JOB_ORDER_HEADERS"]
         self.tableWidget = TableWidget(self.headers, "Old Job Orders")
+        self.tableLoader = SnapshotTableLoader(self.tableWidget, self.statusLabel, parent=self)
+        self.tableLoader.refreshing.connect(self.onTableRefreshing)
+        self.tableLoader.loaded.connect(self.filterTable)
         self.tableWidget.horizontalHeader().sectionClicked.connect(self.onHeaderClicked)
         self.scrollAreaLayout.addWidget(self.tableWidget)
 
@@ -1427,28 +1453,14 @@ class OldJobOrdersPage(QWidget):
         Populate the table with data from the clients database.
         Optionally filters the employees based on their type.
         """
-        self.tableWidget.setRowCount(0)  # Clear the table
-
-        # Adjust SQL query based on employee type
         query = f"SELECT * FROM {self.table}"
 
-        # Fetch data from the database
-        results = execute_query(query, fetch_mode="all", return_cursor=True)
-        job_orders = results["result"]
-        cursor = results["cursor"]
-        for row, job_data in enumerate(job_orders):
-            self.tableWidget.insertRow(row)
-            column_names = list(self.headers.keys())
-            for column, column_name in enumerate(column_names):
-                # Get the value corresponding to the column name
-                value = job_data[cursor.column_names.index(column_name)]
-                item = QTableWidgetItem(str(value))
-                item.setToolTip(str(value))
-                self.tableWidget.setItem(row, column, item)
-                if column_name == "id":
-                    self.tableWidget.hideColumn(column)
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Show the last snapshot right away and fetch the data from the database in the background
+        self.tableLoader.load(self.table, query)
+
+    def onTableRefreshing(self, refreshing):
+        # Rows shown from the snapshot may be stale, so deleting waits for the live data
+        self.deleteEntriesButton.setEnabled(not refreshing)
 
     def filterTable(self):
         """
@@ -1522,6 +1534,7 @@ class OldJobOrdersPage(QWidget):
             finally:
                 if connection and connection.is_connected():
                     connection.close()
+            get_card_prefetcher().invalidate()
 
             # Remove the rows from the table widget. Iterate in reverse order to avoid index shifting issues.
             for selectedRow in sorted(selectedRows, reverse=True):
@@ -1576,6 +1589,7 @@ class OldJobOrdersPage(QWidget):
                 data.append(row_data)
 
             # Convert the data to a pandas DataFrame
+            import pandas as pd
             df = pd.DataFrame(data, columns=[self.tableWidget.horizontalHeaderItem(i).text() for i in
                                              range(self.tableWidget.columnCount())])
 
@@ -1643,10 +1657,12 @@ class MainWindow(QMainWindow):
     - showEmployeePage: Shows the EmployeePage widget when the "Manage Employees" menu item is clicked.
     - showClientPage: Shows the ClientPage widget when the "Manage Clients" menu item is clicked.
     - showJobOrderPage: Shows the JobOrderPage dialog for creating job orders.
+    - startAvailabilitySweep: Runs the daily availability sweep in the background.
     """
 
     def __init__(self):
         super().__init__()
+        self.availabilitySweepTask = None
         self.employeePage = None
         self.clientPage = None
         self.currentJobOrderPage = None
@@ -1658,7 +1674,7 @@ class MainWindow(QMainWindow):
         # Setting up the main window
         self.setWindowTitle("Employee and Client Management System")
         self.setGeometry(100, 100, 1720, 600)
-        self.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+        self.setWindowIcon(get_window_icon())
 
         # Create menu bar and add items
         menubar = self.menuBar()
@@ -1720,6 +1736,8 @@ class MainWindow(QMainWindow):
     def showJobOrderPage(self, employerData, employer_id):
         jobOrderDialog = JobOrderPage(employerData, employer_id, self)
         jobOrderDialog.exec_()  # Executing the dialog
+        # A new job order changes the client card it was created for
+        get_card_prefetcher().invalidate()
 
     def showOldJobOrdersPage(self, dbSide):
         # Show the Old Job Orders Page
@@ -1737,6 +1755,23 @@ class MainWindow(QMainWindow):
         except RuntimeError as e:
             show_error_message(f"Error occurred: {e}. Please try again.")
 
+    def startAvailabilitySweep(self):
+        self.statusBar().showMessage("Updating employee availability...")
+        self.availabilitySweepTask = run_in_background(update_employee_availability,
+                                                       on_finished=self.onAvailabilitySweepFinished,
+                                                       on_failed=self.onAvailabilitySweepFailed)
+
+    def onAvailabilitySweepFinished(self, counts):
+        self.statusBar().showMessage("Employee availability is up to date.", 5000)
+        # The sweep archived placements and recounted employees behind the prefetched cards
+        get_card_prefetcher().invalidate()
+        # The dashboard was built from the data before the sweep
+        if any(counts.values()) and self.centralWidget() is self.dashboardPage:
+            self.showDashboardPage()
+
+    def onAvailabilitySweepFailed(self, message):
+        self.statusBar().showMessage(f"Could not update employee availability: {message}", 10000)
+
     def showDashboardPage(self):
         # Show the Dashboard Page
         try:
@@ -1746,83 +1781,35 @@ class MainWindow(QMainWindow):
             show_error_message(f"Error occurred: {e}. Please try again.")
 
 
-def load_stylesheet() -> str:
-    """
-    Load the stylesheet from a given file path.
-
-    :return: The stylesheet content as a string.
-    """
-    # Determine the full path to the icons folder
-    icons_path = Path(application_path, 'resources', 'icons')
-    try:
-        with open(Path(application_path, 'resources', 'style_properties', 'stylesheet.qss'), "r") as file:
-            return file.read().replace('{{ICON_PATH}}', str(icons_path).replace("\\", "/"))
-    except IOError:
-        print(
-            f"Error opening stylesheet file: "
-            f"{Path(application_path, 'resources', 'style_properties', 'stylesheet.qss')}")
-        return ""
-
-
-def update_employee_availability():
-    # Today's date for reference
-    today = datetime.now()
-    one_month_away = today + timedelta(days=30)
-
-    # Find job_orders ending in 1 month
-    job_orders_ending_soon_query = """
-            SELECT id FROM job_orders WHERE end_date BETWEEN %s AND %s
-            """
-    job_orders_ending_soon = execute_query(job_orders_ending_soon_query, (today, one_month_away), fetch_mode='all')
-
-    # Update employees associated with these job orders to "~A"
-    for job_id in job_orders_ending_soon:
-        update_employees_availability_query = """
-            UPDATE employees SET availability = '~A'
-            WHERE id IN (SELECT employee_id FROM job2employer_ids WHERE job_order_id = %s)
-            """
-        execute_query(update_employees_availability_query, (job_id[0],))
-
-    # Step 2: Find job orders that ended yesterday
-    job_orders_ended_yesterday_query = """
-        SELECT id FROM job_orders WHERE end_date < %s
-        """
-    job_orders_ended_yesterday = execute_query(job_orders_ended_yesterday_query, (today,), fetch_mode='all')
+AVAILABILITY_SWEEP_MARKER = resource_path("availability_sweep.json")
 
-    # Update employees associated with these job orders
-    for job_id in job_orders_ended_yesterday:
-        # Retrieve employee IDs for the job_id
-        employee_ids_query = """
-            SELECT employee_id FROM job2employer_ids WHERE job_order_id = %s
-        """
-        employee_ids = execute_query(employee_ids_query, (job_id[0],), fetch_mode="all")
 
-        client_id_query = """
-            SELECT client_id FROM job2employer_ids WHERE job_order_id = %s
-        """
-        client_id = execute_query(client_id_query, (job_id[0],), fetch_mode="one")
+def availability_sweep_due() -> bool:
+    """The sweep only needs to run once per day; the date of the last successful run is kept in a marker file."""
+    marker = load_json_file(AVAILABILITY_SWEEP_MARKER, skip_error_dlg=True) or {}
+    return marker.get("last_run") != date.today().isoformat()
 
-        for employee_id in employee_ids:
-            # Archive and delete job order details for each employee
-            archive_and_delete_employee_job_order(employee_id[0], job_id[0])
-            archive_and_delete_company_job_order(client_id[0], job_id[0])
 
-            # Update employee's status and details
-            update_employee_query = """
-                UPDATE employees 
-                SET availability = 'NW', employee_type = NULL, job_id = NULL, hired_date = NULL, pay = NULL, 
-                pay_conversion = NULL 
-                WHERE id = %s
-            """
-            execute_query(update_employee_query, (employee_id[0],))
+def update_employee_availability():
+    """
+    Runs the availability sweep, then fixes the employee counts the archived placements leave behind, and records
+    the day it ran. Meant to run on a background thread.
+    """
+    counts = sweep_employee_availability()
+    counts.update(reconcile_employee_counts())
+    with open(AVAILABILITY_SWEEP_MARKER, "w") as file:
+        json.dump({"last_run": date.today().isoformat(), "counts": counts}, file)
+    return counts
 
 
 def main():
+    boot_profiler.start_phase("qt_application")
     app = QApplication(sys.argv)
     app.setFont(QFont("Arial", 10))
-    stylesheet = load_stylesheet()
-    app.setStyleSheet(stylesheet)
+    boot_profiler.start_phase("stylesheet")
+    app.setStyleSheet(get_stylesheet())
     # Try connecting and checking the database and tables
+    boot_profiler.start_phase("database_check")
     config = load_json_file(file_type="Database Configuration JSON file", skip_error_dlg=True)
     if config:
         # Try to connect with existing config
@@ -1844,11 +1831,25 @@ def main():
             QMessageBox.critical(None, "Error", "Database connection details are required to start "
                                                 "the application.")
 
-    update_employee_availability()
+    boot_profiler.start_phase("main_window")
     mainWindow = MainWindow()
     mainWindow.show()
+    boot_profiler.start_phase("first_paint")
+    # Runs once the event loop has processed the first paint of the window
+    QTimer.singleShot(0, report_startup_time)
+    if availability_sweep_due():
+        QTimer.singleShot(0, mainWindow.startAvailabilitySweep)
     sys.exit(app.exec_())
 
 
+def report_startup_time():
+    elapsed = time.perf_counter() - STARTUP_STARTED
+    status = "within" if elapsed <= STARTUP_TARGET_SECONDS else "over"
+    print(f"First window shown after {elapsed:.2f}s ({status} the {STARTUP_TARGET_SECONDS:.1f}s target)")
+    boot_profiler.finish(read_output_directory())
+
+
 if __name__ == "__main__":
+    # Needed by the PDF extraction worker processes when running as a frozen executable
+    multiprocessing.freeze_support()
     main()
@@ -1,4 +1,68 @@
 # __init__.py
-from .decrypt_encrypted_files import *
-from .helpful_functions import *
-from .mydb import *
+# The submodules are imported on first use of one of their names (PEP 562), so importing resources.tools does not
+# load Qt widgets, the document parsers or the database driver until they are actually needed. Use explicit
+# imports; "from resources.tools import *" still works but loads everything.
+import importlib
+
+_EXPORTS = {
+    "assets": ("ICONS_DIR", "STYLESHEET_PATH", "WINDOW_ICON", "asset_path", "get_icon", "get_window_icon", "get_pixmap",
+               "get_stylesheet", "clear_asset_cache"),
+    "background": ("TaskSignals", "BackgroundTask", "run_in_background"),
+    "boot_profiler": ("BOOT_PROFILE_ENV", "BOOT_PROFILE_ARG", "BootProfiler", "boot_profiler"),
+    "card_data": ("SPLIT_MARKER", "OLD_EMPLOYEE_JOB_ORDER_COLUMNS", "CURRENT_JOB_ORDER_COLUMNS",
+                  "OLD_COMPANY_JOB_ORDER_COLUMNS", "CardRow", "to_card_rows", "split_joined_row", "CardData",
+                  "EmployeeCardData", "ClientCardData", "JobOrderCardData"),
+    "card_prefetch": ("CARD_LOADERS", "CardDataCache", "CardPrefetcher", "get_card_prefetcher"),
+    "custom_fields": ("CUSTOM_FIELD_ENTITY_TYPES", "MAX_FIELD_NAME_LENGTH", "fetch_custom_fields",
+                      "delete_custom_fields", "get_custom_fields", "set_custom_field", "save_custom_fields"),
+    "decrypt_encrypted_files": ("DECRYPTION_KEY_LOCATION", "DECRYPTION_MANIFEST_NAME", "DECRYPTED_CACHE_MAX_BYTES",
+                                "ConfigDialog", "get_config_path", "set_config_path", "prompt_for_config_path",
+                                "read_config", "init_gpg", "DecryptedDocumentCache", "get_decrypted_document_cache",
+                                "read_decrypted_bytes", "file_sha256", "load_manifest", "save_manifest",
+                                "find_stale_files", "decrypt_file", "print_progress", "decrypt_files",
+                                "print_summary"),
+    "doc_converter": ("LibreOfficeConverter", "get_doc_converter"),
+    "document_pane": ("EMPTY_PATHS", "DocumentPane"),
+    "document_store": ("DOCUMENT_REFERENCE_PREFIX", "is_document_reference", "DocumentStore", "get_document_store"),
+    "extraction_service": ("DEFAULT_HOST", "DEFAULT_PORT", "AUTHKEY_ENV", "MIN_AUTHKEY_LENGTH",
+                           "CONVERSION_TIMEOUT_MARGIN", "get_authkey", "ExtractionTimeout", "ExtractionWorkerCrashed",
+                           "ExtractionService", "get_extraction_service", "extract_text", "ExtractionServiceManager",
+                           "serve_extraction_service"),
+    "helpful_functions": ("read_output_directory", "find_output_directory", "browse_output_directory",
+                          "show_error_message", "addToDatabase", "archive_and_delete_employee_job_order",
+                          "archive_and_delete_company_job_order", "sweep_employee_availability",
+                          "retrieve_current_job_order", "retrieve_current_company", "change_active_needed_employees",
+                          "reconcile_employee_counts",
+                          "convert_doc_to_docx", "convert_docs_to_docx", "read_docx_file",
+                          "PDF_PARALLEL_PAGE_THRESHOLD", "PDF_PAGES_PER_WORKER_CHUNK", "open_pdf", "iter_pdf_pages",
+                          "read_pdf_file",
+                          "open_document_store", "store_document", "read_document_bytes", "read_encrypted_text_file",
+                          "READ_ERROR_PREFIXES", "is_read_error", "read_text_file", "read_text_files"),
+    "lazy_tabs": ("LazyTabWidget",),
+    "mydb": ("resource_path", "application_path", "CONFIG_PATH", "TABLE_QUERIES_PATH", "SCHEMA_FINGERPRINT_PATH",
+             "load_json_file", "save_db_config", "create_db_connection", "db_transaction", "get_column_indices",
+             "get_column_names", "add_query_listener", "remove_query_listener", "execute_query",
+             "load_schema_fingerprint", "check_database_and_tables", "create_table", "showCriticalMessage"),
+    "repository": ("NULL_TEXTS", "DATE_FORMATS", "SAVE_CONFLICT", "coerce_value", "Entity", "Employee", "Client",
+                   "JobOrder", "Repository", "employees", "clients", "job_orders", "repository_for"),
+    "schema_metadata": ("CONSTRAINT_KEYWORDS", "parse_defined_columns", "SchemaMetadata", "get_schema_metadata"),
+    "table_snapshots": ("SNAPSHOT_DIR_NAME", "SNAPSHOT_VERSION", "snapshot_path", "save_table_snapshot",
+                        "load_table_snapshot", "fetch_table_rows", "SnapshotTableLoader"),
+}
+
+_NAME_TO_MODULE = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_NAME_TO_MODULE)
+
+
+def __getattr__(name):
+    module = _NAME_TO_MODULE.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # Later lookups skip this function
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtGui import QIcon, QPixmap
+
+from .mydb import resource_path
+
+application_path = str(resource_path(Path.cwd()))
+
+ICONS_DIR = Path(application_path, 'resources', 'icons')
+STYLESHEET_PATH = Path(application_path, 'resources', 'style_properties', 'stylesheet.qss')
+WINDOW_ICON = 'crm-icon-high-seas.png'
+
+# Process-wide caches. QIcon and QPixmap are implicitly shared, so handing out the cached object is cheap and safe
+_icons: Dict[str, QIcon] = {}
+_pixmaps: Dict[Tuple[str, int, int], QPixmap] = {}
+_stylesheet: Optional[str] = None
+
+
+def asset_path(name: str) -> Path:
+    """Returns the path of a file in resources/icons, or of a path relative to the resources folder."""
+    path = ICONS_DIR / name
+    return path if path.exists() else Path(application_path, 'resources', name)
+
+
+def get_icon(name: str) -> QIcon:
+    """
+    Returns the icon for a file in resources/icons, loading it on first use.
+
+    The same QIcon is reused everywhere, so each size it is drawn at is rasterized (and each SVG parsed) only once.
+    """
+    icon = _icons.get(name)
+    if icon is None:
+        icon = _icons[name] = QIcon(str(asset_path(name)))
+    return icon
+
+
+def get_window_icon() -> QIcon:
+    return get_icon(WINDOW_ICON)
+
+
+def get_pixmap(name: str, width: int, height: int) -> QPixmap:
+    """Returns the icon rendered at the given size (aspect ratio kept), rendering it only the first time."""
+    key = (name, width, height)
+    pixmap = _pixmaps.get(key)
+    if pixmap is None:
+        # SVGs are rendered at the target size, which is sharper than scaling a default-size raster
+        pixmap = _pixmaps[key] = get_icon(name).pixmap(width, height)
+    return pixmap
+
+
+def get_stylesheet() -> str:
+    """Returns the application stylesheet with its icon paths filled in, reading the file only once."""
+    global _stylesheet
+    if _stylesheet is None:
+        try:
+            with open(STYLESHEET_PATH, "r") as file:
+                _stylesheet = file.read().replace('{{ICON_PATH}}', str(ICONS_DIR).replace("\\", "/"))
+        except IOError:
+            print(f"Error opening stylesheet file: {STYLESHEET_PATH}")
+            return ""
+    return _stylesheet
+
+
+def clear_asset_cache() -> None:
+    """Drops every cached icon, pixmap and the stylesheet, e.g. after the files changed on disk."""
+    global _stylesheet
+    _icons.clear()
+    _pixmaps.clear()
+    _stylesheet = None
@@ -0,0 +1,62 @@
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskSignals(QObject):
+    """Signals emitted by a BackgroundTask. They are delivered on the thread that created the task."""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class BackgroundTask(QRunnable):
+    """Runs a function on a worker thread and reports the result through Qt signals."""
+
+    def __init__(self, func: Callable, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Drops the result of the task. A task that already started still runs to completion."""
+        self.cancelled = True
+
+    def run(self) -> None:
+        if self.cancelled:
+            return
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"Background task {getattr(self.func, '__name__', self.func)} failed: {e}")
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
+
+
+def run_in_background(func: Callable, *args, on_finished: Optional[Callable] = None,
+                      on_failed: Optional[Callable] = None, pool: Optional[QThreadPool] = None,
+                      **kwargs) -> BackgroundTask:
+    """
+    Starts func(*args, **kwargs) on a worker thread.
+
+    Args:
+        func (Callable): Function to run. It must not touch any widget.
+        on_finished (Optional[Callable]): Receives the return value on the GUI thread.
+        on_failed (Optional[Callable]): Receives the error message on the GUI thread.
+        pool (Optional[QThreadPool]): Pool to run on. Defaults to the global pool.
+
+    Returns:
+        BackgroundTask: The started task. Keep a reference to it to be able to cancel it.
+    """
+    task = BackgroundTask(func, *args, **kwargs)
+    if on_finished is not None:
+        task.signals.finished.connect(on_finished)
+    if on_failed is not None:
+        task.signals.failed.connect(on_failed)
+    (pool or QThreadPool.globalInstance()).start(task)
+    return task
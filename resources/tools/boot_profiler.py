@@ -0,0 +1,211 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from importlib.abc import Loader, MetaPathFinder
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BOOT_PROFILE_ENV = "CRM_BOOT_PROFILE"
+BOOT_PROFILE_ARG = "--profile-boot"
+
+
+class _TimedLoader(Loader):
+    """Wraps a module loader to time the execution of the module."""
+
+    def __init__(self, loader, profiler: "BootProfiler"):
+        self.loader = loader
+        self.profiler = profiler
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profiler._enter_import(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler._exit_import()
+
+    def __getattr__(self, name):
+        # Loaders expose extra methods (get_resource_reader, is_package, ...) that importlib may call
+        return getattr(self.loader, name)
+
+
+class _ImportTimer(MetaPathFinder):
+    """Meta path hook that wraps the loader of every module imported while the profiler runs."""
+
+    def __init__(self, profiler: "BootProfiler"):
+        self.profiler = profiler
+        self._resolving = set()
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self._resolving:
+            return None
+        self._resolving.add(fullname)
+        try:
+            # Let the regular finders locate the module, then wrap whatever loader they picked
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self.profiler)
+                    return spec
+            return None
+        finally:
+            self._resolving.discard(fullname)
+
+
+class BootProfiler:
+    """
+    Opt-in profiler for the application start-up.
+
+    Start-up is split into named phases. For each phase it records the wall time, the modules imported (with their
+    own and cumulative time, nested imports included) and the number and duration of SQL statements run through
+    execute_query. finish() writes a JSON report and a collapsed-stack file (boot;phase;module;... microseconds)
+    that flamegraph.pl and speedscope read directly.
+
+    Enable it with the CRM_BOOT_PROFILE=1 environment variable or the --profile-boot argument.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[Dict] = []
+        self.imports: List[Dict] = []
+        self.stacks: Dict[str, float] = {}
+        self._current: Optional[Dict] = None
+        self._import_stack: List[List] = []
+        self._finder = None
+        self._finished = False
+
+    @classmethod
+    def from_environment(cls) -> "BootProfiler":
+        enabled = os.environ.get(BOOT_PROFILE_ENV, "") not in ("", "0") or BOOT_PROFILE_ARG in sys.argv
+        if BOOT_PROFILE_ARG in sys.argv:
+            sys.argv.remove(BOOT_PROFILE_ARG)  # Keep it away from QApplication
+        return cls(enabled)
+
+    # ------------------------------------------------------------------ #
+    # Phases
+    # ------------------------------------------------------------------ #
+    def start(self, first_phase: str = "imports") -> None:
+        """Installs the import hook and the SQL listener, and starts the first phase."""
+        if not self.enabled or self._finder is not None:
+            return
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+        self.start_phase(first_phase)
+
+        from .mydb import add_query_listener
+        add_query_listener(self._record_query)
+
+    def start_phase(self, name: str) -> None:
+        """Ends the current phase, if any, and starts the next one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._end_phase(now)
+        self._current = {"name": name, "start": round(now - self.started, 4), "seconds": None,
+                         "imports": 0, "import_seconds": 0.0, "sql_statements": 0, "sql_seconds": 0.0,
+                         "_started": now}
+
+    def _end_phase(self, now: float) -> None:
+        if self._current is None:
+            return
+        phase = self._current
+        phase["seconds"] = round(now - phase.pop("_started"), 4)
+        phase["import_seconds"] = round(phase["import_seconds"], 4)
+        phase["sql_seconds"] = round(phase["sql_seconds"], 4)
+        self.phases.append(phase)
+        # Time of the phase not spent in imports or SQL shows up as the phase's own frame
+        own = phase["seconds"] - phase["import_seconds"] - phase["sql_seconds"]
+        self._add_stack(f"boot;{phase['name']}", own)
+        self._current = None
+
+    def _phase_name(self) -> str:
+        return self._current["name"] if self._current else "unphased"
+
+    # ------------------------------------------------------------------ #
+    # Imports
+    # ------------------------------------------------------------------ #
+    def _enter_import(self, module_name: str) -> None:
+        # [name, start, time spent in nested imports]
+        self._import_stack.append([module_name, time.perf_counter(), 0.0])
+
+    def _exit_import(self) -> None:
+        module_name, start, children = self._import_stack.pop()
+        cumulative = time.perf_counter() - start
+        own = cumulative - children
+        if self._import_stack:
+            self._import_stack[-1][2] += cumulative
+        elif self._current is not None:
+            self._current["imports"] += 1
+            self._current["import_seconds"] += cumulative
+
+        path = ";".join(frame[0] for frame in self._import_stack)
+        self.imports.append({"module": module_name, "phase": self._phase_name(), "seconds": round(own, 5),
+                             "cumulative_seconds": round(cumulative, 5)})
+        self._add_stack(";".join(filter(None, ["boot", self._phase_name(), path, module_name])), own)
+
+    # ------------------------------------------------------------------ #
+    # SQL
+    # ------------------------------------------------------------------ #
+    def _record_query(self, query: str, seconds: float) -> None:
+        if self._current is None:
+            return
+        self._current["sql_statements"] += 1
+        self._current["sql_seconds"] += seconds
+        statement = " ".join(query.split())[:60].replace(";", ",")
+        self._add_stack(f"boot;{self._phase_name()};sql;{statement}", seconds)
+
+    def _add_stack(self, stack: str, seconds: float) -> None:
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + max(seconds, 0.0)
+
+    # ------------------------------------------------------------------ #
+    # Report
+    # ------------------------------------------------------------------ #
+    def finish(self, output_dir=None) -> Optional[Path]:
+        """Ends the last phase, removes the hooks and writes the reports. Returns the JSON report path."""
+        if not self.enabled or self._finished:
+            return None
+        self._finished = True
+        now = time.perf_counter()
+        self._end_phase(now)
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        from .mydb import remove_query_listener
+        remove_query_listener(self._record_query)
+
+        output_dir = Path(output_dir or Path.cwd(), "boot_profiles")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "total_seconds": round(now - self.started, 4),
+            "phases": self.phases,
+            "slowest_imports": sorted(self.imports, key=lambda entry: entry["seconds"], reverse=True)[:50],
+            "imports": self.imports
+        }
+        report_path = output_dir / f"boot_{stamp}.json"
+        report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+        folded_path = output_dir / f"boot_{stamp}.folded"
+        with open(folded_path, "w", encoding="utf-8") as file:
+            for stack, seconds in self.stacks.items():
+                microseconds = int(seconds * 1_000_000)
+                if microseconds:
+                    file.write(f"{stack} {microseconds}\n")
+
+        print(f"Boot profile written to {report_path} (flamegraph stacks: {folded_path.name})")
+        for phase in self.phases:
+            print(f"  {phase['name']:<30} {phase['seconds']:>7.3f}s  imports {phase['import_seconds']:>6.3f}s  "
+                  f"sql {phase['sql_statements']:>3} / {phase['sql_seconds']:.3f}s")
+        return report_path
+
+
+boot_profiler = BootProfiler.from_environment()
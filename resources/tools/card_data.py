@@ -0,0 +1,204 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from mysql.connector import Error
+
+from .custom_fields import fetch_custom_fields
+from .mydb import db_transaction, showCriticalMessage
+
+# Marker columns placed between the tables of a joined SELECT, so the row can be split back into one dict per table
+# even though the tables share column names (id, address, company, ...)
+SPLIT_MARKER = "_split"
+
+OLD_EMPLOYEE_JOB_ORDER_COLUMNS = ("hired_date", "pay", "pay_conversion", "po_order_number", "location", "company",
+                                  "job_title", "position_type", "remote")
+CURRENT_JOB_ORDER_COLUMNS = ("job_title", "po_order_number", "company", "location", "start_date", "end_date",
+                             "active_employees", "needed_employees", "position_type", "bill_rate_min",
+                             "bill_rate_max", "bill_rate_conversion", "pay_rate", "pay_rate_conversion",
+                             "min_experience", "requirements", "remote", "job_description_path", "notes_path")
+OLD_COMPANY_JOB_ORDER_COLUMNS = ("contact_person", "location", "po_order_number", "start_date", "end_date",
+                                 "needed_employees", "job_title", "position_type", "bill_rate_min", "bill_rate_max",
+                                 "bill_rate_conversion", "pay_rate", "pay_rate_conversion", "min_experience",
+                                 "requirements", "remote", "job_description_path", "notes_path")
+
+
+class CardRow(NamedTuple):
+    """A row of a card sub-table: the primary key of the record it shows, then the displayed values."""
+    id: Optional[int]
+    values: Tuple
+
+
+def to_card_rows(rows: Sequence[Sequence]) -> List[CardRow]:
+    """Builds card rows from query rows that select the id first."""
+    return [CardRow(row[0], tuple(row[1:])) for row in rows]
+
+
+def split_joined_row(column_names: Sequence[str], row: Optional[Sequence]) -> List[Tuple[List[str], Dict]]:
+    """
+    Splits a row of "SELECT a.*, NULL AS _split1, b.*, ..." into the columns and values of each table.
+
+    A table whose columns are all NULL (no match in a LEFT JOIN) gets an empty dict.
+
+    Returns:
+        List[Tuple[List[str], Dict]]: (column names, {column: value}) per table, in SELECT order.
+    """
+    parts = []
+    columns, values = [], []
+    for index, column in enumerate(column_names):
+        if column.startswith(SPLIT_MARKER):
+            parts.append((columns, values))
+            columns, values = [], []
+            continue
+        columns.append(column)
+        values.append(row[index] if row is not None else None)
+    parts.append((columns, values))
+    return [(columns, dict(zip(columns, values)) if any(value is not None for value in values) else {})
+            for columns, values in parts]
+
+
+class CardData:
+    """
+    Everything a card shows, fetched with a fixed number of queries over a single connection.
+
+    The card builds one loader and hands it to all of its tabs, which read from it instead of querying the database
+    themselves. load() raises on database errors so it can also run on a worker thread; pass show_errors=True from
+    the GUI to report the error in a dialog and continue with empty data instead.
+    """
+
+    def __init__(self):
+        self.loaded = False
+
+    def load(self, show_errors: bool = False) -> "CardData":
+        try:
+            with db_transaction() as cursor:
+                self._fetch(cursor)
+            self.loaded = True
+        except Error as e:
+            if not show_errors:
+                raise
+            showCriticalMessage("Database Error", f"The card data could not be loaded: {e}")
+        return self
+
+    def _fetch(self, cursor) -> None:
+        raise NotImplementedError
+
+
+class EmployeeCardData(CardData):
+    """
+    Employee, current job order, its company, the archived job orders and the custom fields of an employee in three
+    queries.
+
+    With resolve_placement, the current job order and client are looked up in job2employer_ids first (one more query
+    on the same connection), so the card can be opened from the employee id alone.
+    """
+
+    def __init__(self, employee_id, employer_id=None, job_order_id=None, resolve_placement=False):
+        super().__init__()
+        self.employee_id = employee_id
+        self.employer_id = employer_id
+        self.job_order_id = job_order_id
+        self.resolve_placement = resolve_placement
+        self.employee: Dict = {}
+        self.employee_columns: List[str] = []
+        self.job_order: Dict = {}
+        self.company: Dict = {}
+        self.old_job_orders: List[CardRow] = []
+        self.custom_fields: Dict[str, str] = {}
+
+    def _fetch(self, cursor) -> None:
+        if self.resolve_placement:
+            cursor.execute("SELECT job_order_id, client_id FROM job2employer_ids WHERE employee_id = %s",
+                           (self.employee_id,))
+            placement = cursor.fetchone()
+            self.job_order_id, self.employer_id = placement if placement else (None, None)
+
+        # The company is only shown for an employee placed on a job order
+        employer_id = self.employer_id if self.job_order_id else None
+        cursor.execute(f"""
+            SELECT e.*, NULL AS {SPLIT_MARKER}1, jo.*, NULL AS {SPLIT_MARKER}2, c.*
+            FROM employees e
+            LEFT JOIN job_orders jo ON jo.id = %s
+            LEFT JOIN clients c ON c.id = %s
+            WHERE e.id = %s
+        """, (self.job_order_id, employer_id, self.employee_id))
+        row = cursor.fetchone()
+        (self.employee_columns, employee), (_, self.job_order), (_, self.company) = \
+            split_joined_row(cursor.column_names, row)
+        self.employee = employee if row is not None else {}
+
+        columns = ", ".join(f"o.{column}" for column in OLD_EMPLOYEE_JOB_ORDER_COLUMNS)
+        cursor.execute(f"""
+            SELECT o.id, {columns}
+            FROM old_employee_job_orders o
+            JOIN employees e ON o.first_name = e.first_name AND o.last_name = e.last_name
+            WHERE e.id = %s
+        """, (self.employee_id,))
+        self.old_job_orders = to_card_rows(cursor.fetchall())
+        self.custom_fields = fetch_custom_fields(cursor, "employees", self.employee_id)
+
+    @property
+    def employee_name(self) -> Tuple[str, str]:
+        return self.employee.get("first_name") or "Unknown", self.employee.get("last_name") or "Unknown"
+
+
+class ClientCardData(CardData):
+    """Client, its current job orders, its archived job orders and its custom fields in three queries."""
+
+    def __init__(self, company_id):
+        super().__init__()
+        self.company_id = company_id
+        self.company: Dict = {}
+        self.company_columns: List[str] = []
+        self.job_order_ids: List[Tuple] = []
+        self.current_job_orders: List[CardRow] = []
+        self.old_job_orders: List[CardRow] = []
+        self.custom_fields: Dict[str, str] = {}
+
+    def _fetch(self, cursor) -> None:
+        columns = ", ".join(f"jo.{column}" for column in CURRENT_JOB_ORDER_COLUMNS)
+        cursor.execute(f"""
+            SELECT c.*, NULL AS {SPLIT_MARKER}1, jo.id, {columns}
+            FROM clients c
+            LEFT JOIN job_orders jo ON jo.company = c.employer_company
+            WHERE c.id = %s
+            ORDER BY jo.id
+        """, (self.company_id,))
+        rows = cursor.fetchall()
+        self.company_columns = list(cursor.column_names[:cursor.column_names.index(f"{SPLIT_MARKER}1")])
+        self.company = split_joined_row(cursor.column_names, rows[0])[0][1] if rows else {}
+        # One row per job order, with the client repeated; a client without job orders has a single NULL job order
+        job_start = len(self.company_columns) + 2
+        job_rows = [row for row in rows if row[job_start - 1] is not None]
+        self.current_job_orders = to_card_rows([row[job_start - 1:] for row in job_rows])
+        self.job_order_ids = [(row.id,) for row in self.current_job_orders]
+
+        columns = ", ".join(f"o.{column}" for column in OLD_COMPANY_JOB_ORDER_COLUMNS)
+        cursor.execute(f"""
+            SELECT o.id, {columns}
+            FROM old_company_job_orders o
+            JOIN clients c ON o.employer_company = c.employer_company
+            WHERE c.id = %s
+        """, (self.company_id,))
+        self.old_job_orders = to_card_rows(cursor.fetchall())
+        self.custom_fields = fetch_custom_fields(cursor, "clients", self.company_id)
+
+    @property
+    def company_name(self) -> str:
+        return self.company.get("employer_company") or "Unknown"
+
+
+class JobOrderCardData(CardData):
+    """The job order row, with its live column list, and its custom fields in two queries."""
+
+    def __init__(self, job_order_id):
+        super().__init__()
+        self.job_order_id = job_order_id
+        self.job_order: Dict = {}
+        self.job_order_columns: List[str] = []
+        self.custom_fields: Dict[str, str] = {}
+
+    def _fetch(self, cursor) -> None:
+        cursor.execute("SELECT * FROM job_orders WHERE id = %s", (self.job_order_id,))
+        row = cursor.fetchone()
+        self.job_order_columns = list(cursor.column_names)
+        self.job_order = dict(zip(cursor.column_names, row)) if row is not None else {}
+        self.custom_fields = fetch_custom_fields(cursor, "job_orders", self.job_order_id)
@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QThreadPool, QTimer
+
+from .background import run_in_background
+from .card_data import CardData, ClientCardData, EmployeeCardData, JobOrderCardData
+
+# How each kind of card loads its data from a database id
+CARD_LOADERS: Dict[str, Callable[[int], CardData]] = {
+    "employee": lambda employee_id: EmployeeCardData(employee_id, resolve_placement=True),
+    "client": ClientCardData,
+    "job_order": JobOrderCardData,
+}
+
+
+class CardDataCache:
+    """
+    Small LRU cache of card data with an expiry time.
+
+    Entries are handed out once (take removes them), so a card reopened after an edit never shows the data it was
+    opened with before. Only used from the GUI thread.
+    """
+
+    def __init__(self, max_entries: int = 32, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, CardData]]" = OrderedDict()
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl_seconds
+
+    def put(self, key: Tuple[str, int], data: CardData) -> None:
+        self._entries[key] = (time.monotonic(), data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def take(self, key: Tuple[str, int]) -> Optional[CardData]:
+        entry = self._entries.pop(key, None)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+            return None
+        return entry[1]
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drops the entries of one kind of card, or all of them."""
+        for key in [key for key in self._entries if kind is None or key[0] == kind]:
+            del self._entries[key]
+
+
+class CardPrefetcher(QObject):
+    """
+    Loads the data of the cards the user is likely to open next, so a double-click opens them from memory.
+
+    Tables call prefetch() with the ids of the selected or hovered row and its neighbors. Requests are debounced so
+    scrolling past rows does not start queries, only the first `budget` ids of the latest request are loaded, and
+    loads queued for an older request are cancelled. The loads run on a dedicated pool of `max_threads` threads so
+    they never hold up the other background work.
+
+    Every page that writes to the database calls invalidate() afterwards. Loads that were already running keep going,
+    but their results belong to an older generation and are dropped instead of being cached.
+    """
+
+    def __init__(self, budget: int = 3, max_threads: int = 2, debounce_ms: int = 150, cache: CardDataCache = None,
+                 parent=None):
+        super().__init__(parent)
+        self.budget = budget
+        self.cache = cache or CardDataCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._pending: Tuple[str, Tuple[int, ...]] = ("", ())
+        self._tasks = {}
+        self._generation = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._start)
+
+    def prefetch(self, kind: str, ids: Iterable[Optional[int]]) -> None:
+        """Schedules loading the cards of the given ids, most likely first. Replaces the previous request."""
+        if kind not in CARD_LOADERS:
+            return
+        self._pending = (kind, tuple(dict.fromkeys(_id for _id in ids if _id is not None)))
+        self._timer.start()
+
+    def take(self, kind: str, _id: int) -> Optional[CardData]:
+        """Returns the prefetched data of a card, or None when it has to be loaded now."""
+        return self.cache.take((kind, _id))
+
+    def take_or_load(self, kind: str, _id: int) -> CardData:
+        """Returns the prefetched data of a card, or loads it now (reporting errors in a dialog) on a miss."""
+        return self.take(kind, _id) or CARD_LOADERS[kind](_id).load(show_errors=True)
+
+    def invalidate(self) -> None:
+        """Forgets every prefetched card after the database was changed; a card also shows its related records."""
+        self._generation += 1
+        for task in self._tasks.values():
+            if self.pool.tryTake(task):
+                task.cancel()
+        self._tasks.clear()
+        self.cache.invalidate()
+
+    def _start(self) -> None:
+        kind, ids = self._pending
+        wanted = {(kind, _id) for _id in ids[:self.budget]}
+
+        # Drop the loads of the previous request that did not start yet
+        for key, task in list(self._tasks.items()):
+            if key not in wanted and self.pool.tryTake(task):
+                task.cancel()
+                del self._tasks[key]
+
+        for key in sorted(wanted, key=lambda key: ids.index(key[1])):
+            if key in self.cache or key in self._tasks:
+                continue
+            self._tasks[key] = run_in_background(
+                self._load, key, pool=self.pool,
+                on_finished=lambda data, key=key, generation=self._generation: self._onLoaded(key, data, generation),
+                on_failed=lambda message, key=key, generation=self._generation: self._onFailed(key, generation))
+
+    @staticmethod
+    def _load(key: Tuple[str, int]) -> CardData:
+        kind, _id = key
+        return CARD_LOADERS[kind](_id).load()
+
+    def _onLoaded(self, key: Tuple[str, int], data: CardData, generation: int) -> None:
+        if generation != self._generation:
+            return  # Read before the last invalidate(); a newer load of the same card may already be running
+        self._tasks.pop(key, None)
+        self.cache.put(key, data)
+
+    def _onFailed(self, key: Tuple[str, int], generation: int) -> None:
+        if generation == self._generation:
+            self._tasks.pop(key, None)
+
+
+_prefetcher = None
+
+
+def get_card_prefetcher() -> CardPrefetcher:
+    """Returns the prefetcher shared by all tables. Must be called from the GUI thread."""
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = CardPrefetcher()
+    return _prefetcher
@@ -0,0 +1,86 @@
+from typing import Dict, Iterable, Optional
+
+from .mydb import execute_query
+from .repository import NULL_TEXTS
+
+# custom_fields.entity_type of the rows that belong to each table
+CUSTOM_FIELD_ENTITY_TYPES = {"employees": "employee", "clients": "client", "job_orders": "job_order"}
+MAX_FIELD_NAME_LENGTH = 64
+
+_SELECT_QUERY = ("SELECT field_name, field_value FROM custom_fields "
+                 "WHERE entity_type = %s AND entity_id = %s ORDER BY field_name")
+
+
+def fetch_custom_fields(cursor, table_name: str, entity_id) -> Dict[str, Optional[str]]:
+    """Reads the custom fields of a record with an open cursor, e.g. inside a card data transaction."""
+    cursor.execute(_SELECT_QUERY, (CUSTOM_FIELD_ENTITY_TYPES[table_name], entity_id))
+    return dict(cursor.fetchall())
+
+
+def delete_custom_fields(cursor, table_name: str, entity_ids: Iterable) -> int:
+    """Removes the custom fields of deleted records with an open cursor, in the transaction that deletes them."""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return 0
+    placeholders = ", ".join(["%s"] * len(entity_ids))
+    cursor.execute(f"DELETE FROM custom_fields WHERE entity_type = %s AND entity_id IN ({placeholders})",
+                   (CUSTOM_FIELD_ENTITY_TYPES[table_name], *entity_ids))
+    return cursor.rowcount
+
+
+def get_custom_fields(table_name: str, entity_id) -> Dict[str, Optional[str]]:
+    """Returns {field name: value} of the fields users added to a record, sorted by name."""
+    result = execute_query(_SELECT_QUERY, (CUSTOM_FIELD_ENTITY_TYPES[table_name], entity_id), fetch_mode="all")
+    return dict(result) if isinstance(result, list) else {}
+
+
+def set_custom_field(table_name: str, entity_id, field_name: str, value: Optional[str]) -> bool:
+    """
+    Adds a field to a record, or replaces its value when the record already has it.
+
+    Returns:
+        bool: True if the field was written, False if the query failed (the error has already been shown).
+    """
+    return save_custom_fields(table_name, entity_id, {field_name: value}, only_changed=False) >= 0
+
+
+def save_custom_fields(table_name: str, entity_id, values: Dict[str, Optional[str]],
+                       only_changed: bool = True) -> int:
+    """
+    Writes the custom fields of a record in a single upsert. Fields set to an empty value are removed.
+
+    Args:
+        table_name (str): The table of the record (employees, clients or job_orders).
+        entity_id: The id of the record.
+        values (Dict[str, Optional[str]]): The new value of each field.
+        only_changed (bool): Compare with the stored values first and only write the fields that differ.
+
+    Returns:
+        int: The number of fields written or removed, or -1 if a query failed.
+    """
+    entity_type = CUSTOM_FIELD_ENTITY_TYPES[table_name]
+    values = {field.strip(): (None if value is None or value.strip() in NULL_TEXTS else value)
+              for field, value in values.items()}
+    if only_changed:
+        stored = get_custom_fields(table_name, entity_id)
+        values = {field: value for field, value in values.items() if stored.get(field) != value}
+
+    upserts = {field: value for field, value in values.items() if value is not None}
+    removals = [field for field, value in values.items() if value is None]
+
+    if upserts:
+        rows = ", ".join(["(%s, %s, %s, %s)"] * len(upserts))
+        data = [item for field, value in upserts.items() for item in (entity_type, entity_id, field, value)]
+        result = execute_query(f"INSERT INTO custom_fields (entity_type, entity_id, field_name, field_value) "
+                               f"VALUES {rows} ON DUPLICATE KEY UPDATE field_value = VALUES(field_value)", tuple(data))
+        if result.get("error"):
+            return -1
+
+    if removals:
+        placeholders = ", ".join(["%s"] * len(removals))
+        result = execute_query(f"DELETE FROM custom_fields WHERE entity_type = %s AND entity_id = %s "
+                               f"AND field_name IN ({placeholders})", (entity_type, entity_id, *removals))
+        if result.get("error"):
+            return -1
+
+    return len(upserts) + len(removals)
@@ -1,22 +1,27 @@
+import argparse
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
 from PyQt5.QtWidgets import *
 
-from .helpful_functions import resource_path
+from .assets import get_stylesheet
+from .document_store import get_document_store, is_document_reference
+from .helpful_functions import read_output_directory, resource_path
 
 DECRYPTION_KEY_LOCATION = Path("path_to_some_persistent_storage.json")  # Update this path accordingly
+DECRYPTION_MANIFEST_NAME = ".decryption_manifest.json"
+DECRYPTED_CACHE_MAX_BYTES = 128 * 1024 * 1024
 
 # Determine if the application is a frozen executable or a script
 # application_path = get_application_path()
 application_path = str(resource_path(Path.cwd()))
 
-# Read the stylesheet content
-stylesheet_path = Path(application_path, 'resources', 'style_properties', 'stylesheet.qss')
-with open(stylesheet_path, 'r') as file:
-    stylesheet = file.read()
-
 
 class ConfigDialog(QDialog):
     def __init__(self, stylesheet):
@@ -85,18 +90,20 @@ def set_config_path(path):
 
 
 def prompt_for_config_path():
-    app = QApplication([])
-    dialog = ConfigDialog(stylesheet)
+    # Reuse the running application when the prompt comes from a lazy decryption inside the CRM
+    app = QApplication.instance() or QApplication([])
+    dialog = ConfigDialog(get_stylesheet())
     if dialog.exec_() == QDialog.Accepted:
         set_config_path(dialog.configPath)
         return dialog.configPath
     return ""
 
 
-def read_config():
+def read_config(prompt=True):
     config_path = get_config_path()
     if not config_path or not Path(config_path).exists():
-        config_path = prompt_for_config_path()
+        # Only the GUI thread may open the dialog
+        config_path = prompt_for_config_path() if prompt else ""
     if not config_path:  # Still no path, exit or handle error
         raise FileNotFoundError("Config file not found.")
     with open(config_path, 'r') as config_file:
@@ -108,24 +115,257 @@ def init_gpg(gpg_home, gpg_binary_path):
     return gnupg.GPG(gnupghome=gpg_home, gpgbinary=gpg_binary_path)
 
 
+def _open_document_store():
+    """Opens the document store without prompting, since decryption may run outside the GUI thread."""
+    output_directory = read_output_directory()
+    if output_directory is None:
+        raise FileNotFoundError("The CRM output directory has not been configured yet.")
+    return get_document_store(Path(output_directory, "document_store"))
+
+
+class DecryptedDocumentCache:
+    """
+    Decrypts .gpg documents on first access and keeps the plaintext in memory only.
+
+    Entries are keyed by path, modification time and size, so an updated ciphertext is decrypted again. The cache
+    is bounded by the total size of the plaintexts; the least recently used ones are dropped first.
+
+    There is one cache per process and it is only used in the CRM process itself: the extraction service decrypts
+    in its supervisor threads and hands the plaintext to the workers. Only a read from the GUI thread may prompt
+    for the config file; other threads fail until the key has been loaded.
+    """
+
+    def __init__(self, max_bytes: int = DECRYPTED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._gpg = None
+        self._passphrase = None
+
+    def _get_gpg(self):
+        if self._gpg is None:
+            config = read_config(prompt=threading.current_thread() is threading.main_thread())
+            self._passphrase = config['passphrase']
+            self._gpg = init_gpg(config['gpg_home'], config['gpg_binary_path'])
+        return self._gpg
+
+    def read_bytes(self, encrypted_file_path) -> bytes:
+        """Returns the plaintext of a .gpg file or stored document, decrypting it if it is not cached."""
+        if is_document_reference(encrypted_file_path):
+            # Stored documents never change, so the reference alone identifies the content
+            key = (encrypted_file_path,)
+        else:
+            stat = os.stat(encrypted_file_path)
+            key = (os.path.abspath(encrypted_file_path), stat.st_mtime, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            gpg = self._get_gpg()
+
+        if is_document_reference(encrypted_file_path):
+            status = gpg.decrypt(_open_document_store().read_bytes(encrypted_file_path), passphrase=self._passphrase)
+        else:
+            with open(encrypted_file_path, 'rb') as f:
+                status = gpg.decrypt_file(f, passphrase=self._passphrase)
+        if not status.ok:
+            raise RuntimeError(f"Could not decrypt {encrypted_file_path}: {status.status}")
+        data = status.data
+
+        with self._lock:
+            if key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_decrypted_cache = None
+_decrypted_cache_lock = threading.Lock()
+
+
+def get_decrypted_document_cache() -> DecryptedDocumentCache:
+    """Returns the process-wide cache of decrypted documents."""
+    global _decrypted_cache
+    with _decrypted_cache_lock:
+        if _decrypted_cache is None:
+            _decrypted_cache = DecryptedDocumentCache()
+        return _decrypted_cache
+
+
+def read_decrypted_bytes(encrypted_file_path) -> bytes:
+    """
+    Decrypts a .gpg file or stored document into memory (through the shared cache) without writing the plaintext
+    to disk.
+    """
+    return get_decrypted_document_cache().read_bytes(encrypted_file_path)
+
+
+def file_sha256(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path: Path) -> Dict[str, dict]:
+    """Reads the decryption manifest of a start path. A missing or unreadable manifest is treated as empty."""
+    try:
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest_path: Path, manifest: Dict[str, dict]) -> None:
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def find_stale_files(start_path: str, manifest: Dict[str, dict], force: bool = False) -> Tuple[List[Path], int]:
+    """
+    Returns the .gpg files under start_path whose plaintext is missing or out of date, and the number of .gpg files.
+
+    Files whose size and modification time match the manifest are skipped without being read. When only the
+    modification time changed (e.g. after a copy), the ciphertext hash decides, and the manifest is refreshed.
+    """
+    stale = []
+    total = 0
+    for root, dirs, files in os.walk(start_path):
+        for file in files:
+            if not file.endswith(".gpg"):
+                continue
+            total += 1
+            encrypted_file_path = Path(root) / file
+            entry = manifest.get(str(encrypted_file_path))
+            if force or entry is None or not encrypted_file_path.with_suffix('').exists():
+                stale.append(encrypted_file_path)
+                continue
+
+            stat = encrypted_file_path.stat()
+            if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+                continue
+            if entry.get('size') == stat.st_size and entry.get('sha256') == file_sha256(encrypted_file_path):
+                entry['mtime'] = stat.st_mtime
+                continue
+            stale.append(encrypted_file_path)
+    return stale, total
+
+
+def decrypt_file(gpg, encrypted_file_path: Path, passphrase: str) -> dict:
+    """
+    Decrypts one file next to itself and returns its manifest entry.
+
+    The plaintext is written to a temporary name first, so an interrupted run never leaves a truncated file that a
+    later run would consider current.
+    """
+    decrypted_file_path = encrypted_file_path.with_suffix('')
+    tmp_path = decrypted_file_path.with_name(decrypted_file_path.name + ".partial")
+    stat = encrypted_file_path.stat()
+    with open(encrypted_file_path, 'rb') as f:
+        status = gpg.decrypt_file(f, passphrase=passphrase, output=str(tmp_path))
+    if not status.ok:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise RuntimeError(status.status or "gpg could not decrypt the file")
+    os.replace(tmp_path, decrypted_file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': file_sha256(encrypted_file_path),
+            'output': str(decrypted_file_path)}
+
+
+def print_progress(done: int, total: int) -> None:
+    if done == total or done % 25 == 0:
+        print(f"Decrypted {done}/{total} files")
+
+
 # Function to recursively decrypt files
-def decrypt_files():
+def decrypt_files(dry_run: bool = False, force: bool = False, max_workers: Optional[int] = None,
+                  progress: Optional[Callable[[int, int], None]] = print_progress) -> dict:
+    """
+    Decrypts the .gpg files under every start path of the config, skipping the ones that did not change.
+
+    Each start path keeps a manifest (size, mtime and SHA-256 of every ciphertext) in DECRYPTION_MANIFEST_NAME.
+    The stale files are decrypted concurrently, each by its own gpg process.
+
+    Args:
+        dry_run (bool): Only report which files would be decrypted.
+        force (bool): Decrypt every file, ignoring the manifests.
+        max_workers (Optional[int]): Number of concurrent gpg processes. Defaults to the config's
+            "decrypt_workers", then to the number of CPUs (at most 8).
+        progress (Optional[Callable[[int, int], None]]): Called with (done, total) after each file.
+
+    Returns:
+        dict: Summary with the "total", "decrypted", "skipped" and "failed" counts, the "pending" paths of a dry
+        run and the "errors" as (path, message) pairs.
+    """
     config = read_config()
     passphrase = config['passphrase']
-    gpg = init_gpg(config['gpg_home'], config['gpg_binary_path'])
+    max_workers = max_workers or config.get('decrypt_workers') or min(8, os.cpu_count() or 1)
+
+    summary = {'total': 0, 'decrypted': 0, 'skipped': 0, 'failed': 0, 'pending': [], 'errors': []}
+    manifests = {}
+    jobs = []
     for start_path in config['start_paths']:
-        for root, dirs, files in os.walk(start_path):
-            for file in files:
-                if file.endswith(".gpg"):
-                    encrypted_file_path = Path(root) / file
-                    decrypted_file_path = encrypted_file_path.with_suffix('')
-                    with open(encrypted_file_path, 'rb') as f:
-                        status = gpg.decrypt_file(f, passphrase=passphrase, output=str(decrypted_file_path))
-                        if status.ok:
-                            print(f"Decrypted: {encrypted_file_path}")
-                        else:
-                            print(f"Failed to decrypt: {encrypted_file_path}")
+        manifest_path = Path(start_path) / DECRYPTION_MANIFEST_NAME
+        manifest = load_manifest(manifest_path)
+        manifests[manifest_path] = manifest
+        stale, total = find_stale_files(start_path, manifest, force)
+        summary['total'] += total
+        jobs.extend((manifest, path) for path in stale)
+    summary['skipped'] = summary['total'] - len(jobs)
+
+    if dry_run:
+        summary['pending'] = [str(path) for _, path in jobs]
+        return summary
+
+    if jobs:
+        gpg = init_gpg(config['gpg_home'], config['gpg_binary_path'])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(decrypt_file, gpg, path, passphrase): (manifest, path)
+                       for manifest, path in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                manifest, path = futures[future]
+                try:
+                    manifest[str(path)] = future.result()
+                    summary['decrypted'] += 1
+                except Exception as e:
+                    summary['failed'] += 1
+                    summary['errors'].append((str(path), str(e)))
+                if progress is not None:
+                    progress(done, len(jobs))
+
+    for manifest_path, manifest in manifests.items():
+        save_manifest(manifest_path, manifest)
+    return summary
+
+
+def print_summary(summary: dict, dry_run: bool = False) -> None:
+    if dry_run:
+        print(f"{len(summary['pending'])} of {summary['total']} files would be decrypted:")
+        for path in summary['pending']:
+            print(f"  {path}")
+        return
+    print(f"{summary['decrypted']} decrypted, {summary['skipped']} unchanged, {summary['failed']} failed "
+          f"({summary['total']} encrypted files)")
+    for path, message in summary['errors']:
+        print(f"  Failed to decrypt {path}: {message}")
 
 
 if __name__ == '__main__':
-    decrypt_files()
+    parser = argparse.ArgumentParser(description="Decrypt the .gpg files listed in the config's start paths.")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the files that would be decrypted.")
+    parser.add_argument("--force", action="store_true", help="Decrypt every file, even unchanged ones.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of concurrent gpg processes.")
+    args = parser.parse_args()
+    print_summary(decrypt_files(dry_run=args.dry_run, force=args.force, max_workers=args.workers), args.dry_run)
@@ -0,0 +1,180 @@
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class LibreOfficeConverter:
+    """
+    Converts legacy .doc files to .docx with headless LibreOffice.
+
+    Every conversion runs "soffice --convert-to" with a private user profile that no other LibreOffice instance
+    holds. When a profile is in use (by a running instance or the user's own LibreOffice), soffice hands the request
+    over to that instance and may exit successfully without writing anything. The profile is created by the first
+    conversion and reused by the following ones, one at a time, which saves most of the cold start. Files are
+    converted in batches, the output of every batch is checked, and all temporary output lives in one working
+    directory that is removed on shutdown.
+    """
+
+    def __init__(self, binary: Optional[str] = None, timeout: float = 60, per_file_timeout: float = 10):
+        """
+        Args:
+            binary (Optional[str]): Path to soffice/libreoffice. Looked up on the PATH when not given.
+            timeout (float): Base timeout, in seconds, for a conversion batch.
+            per_file_timeout (float): Extra seconds granted per file in a batch.
+        """
+        self.binary = binary
+        self.timeout = timeout
+        self.per_file_timeout = per_file_timeout
+
+        self._lock = threading.Lock()
+        self._profile_dir = None
+        self._work_dir = None
+
+    @staticmethod
+    def find_binary() -> Optional[str]:
+        """Returns the LibreOffice executable available on this machine, if any."""
+        for name in ('soffice', 'libreoffice'):
+            found = shutil.which(name)
+            if found:
+                return found
+
+        if sys.platform == 'win32':
+            candidates = [Path(os.environ.get(variable, ''), 'LibreOffice', 'program', 'soffice.exe')
+                          for variable in ('PROGRAMFILES', 'PROGRAMFILES(X86)')]
+        elif sys.platform == 'darwin':
+            candidates = [Path('/Applications/LibreOffice.app/Contents/MacOS/soffice')]
+        else:
+            candidates = []
+
+        for candidate in candidates:
+            if candidate.is_file():
+                return str(candidate)
+        return None
+
+    def max_duration(self, file_count: int) -> float:
+        """
+        Returns the longest convert() may take for file_count files: their batches, then a retry of each file on
+        its own. Callers that wait on a conversion (such as the extraction service) must wait longer than this.
+        """
+        batches = self.timeout * file_count + self.per_file_timeout * file_count
+        if file_count <= 1:
+            return batches
+        return batches + (self.timeout + self.per_file_timeout) * file_count
+
+    def _profile_argument(self) -> str:
+        return f"-env:UserInstallation={Path(self._profile_dir).as_uri()}"
+
+    def _prepare(self) -> None:
+        """Finds LibreOffice and creates the profile and working directories on first use."""
+        self.binary = self.binary or self.find_binary()
+        if not self.binary:
+            raise FileNotFoundError("LibreOffice was not found. Install it to read .doc files.")
+
+        if self._profile_dir is None:
+            self._profile_dir = tempfile.mkdtemp(prefix="crm_libreoffice_profile_")
+        if self._work_dir is None:
+            self._work_dir = tempfile.mkdtemp(prefix="crm_libreoffice_work_")
+
+    def _run(self, batch: List[str], out_dir: str) -> None:
+        """Converts one batch into out_dir. Failures are only logged, the caller checks which files were written."""
+        timeout = self.timeout + self.per_file_timeout * len(batch)
+        try:
+            result = subprocess.run([self.binary, self._profile_argument(), '--headless', '--invisible', '--nologo',
+                                     '--norestore', '--convert-to', 'docx', '--outdir', out_dir, *batch],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # subprocess.run has already killed the process, so the profile is free for the next conversion
+            print(f"LibreOffice timed out converting {len(batch)} file(s).")
+            return
+        if result.returncode != 0:
+            print(f"LibreOffice exited with code {result.returncode}: {result.stderr.decode(errors='replace')}")
+
+    def shutdown(self) -> None:
+        """Removes every temporary file the conversions produced, including the profile."""
+        with self._lock:
+            for directory in (self._work_dir, self._profile_dir):
+                if directory:
+                    shutil.rmtree(directory, ignore_errors=True)
+            self._work_dir = None
+            self._profile_dir = None
+
+    @staticmethod
+    def _split_batches(doc_paths: List[str]) -> List[List[str]]:
+        """Splits the files so no batch contains two files with the same name, which would overwrite each other."""
+        batches = []
+        for doc_path in doc_paths:
+            stem = Path(doc_path).stem.lower()
+            for batch in batches:
+                if stem not in batch:
+                    batch[stem] = doc_path
+                    break
+            else:
+                batches.append({stem: doc_path})
+        return [list(batch.values()) for batch in batches]
+
+    def convert(self, doc_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Converts .doc files to .docx.
+
+        Args:
+            doc_paths (Iterable[str]): Paths of the .doc files to convert.
+
+        Returns:
+            Dict[str, Optional[str]]: Maps every input path to its converted .docx file, or None if it failed.
+            Converted files should be handed back to release() once they have been read.
+        """
+        doc_paths = list(dict.fromkeys(str(path) for path in doc_paths))
+        converted = {doc_path: None for doc_path in doc_paths}
+        if not doc_paths:
+            return converted
+
+        with self._lock:
+            self._prepare()
+            for batch in self._split_batches(doc_paths):
+                out_dir = tempfile.mkdtemp(dir=self._work_dir)
+                expected = {doc_path: Path(out_dir, f"{Path(doc_path).stem}.docx") for doc_path in batch}
+                self._run(batch, out_dir)
+
+                # One file LibreOffice fails on must not fail the whole batch, so the missing ones are retried alone
+                if len(batch) > 1:
+                    for doc_path in batch:
+                        if not expected[doc_path].is_file():
+                            self._run([doc_path], out_dir)
+
+                for doc_path, converted_path in expected.items():
+                    if converted_path.is_file():
+                        converted[doc_path] = str(converted_path)
+                    else:
+                        print(f"LibreOffice did not convert {doc_path}.")
+
+        return converted
+
+    def release(self, converted_path: Optional[str]) -> None:
+        """Deletes a converted file along with its batch folder once it is empty."""
+        if not converted_path:
+            return
+        try:
+            os.remove(converted_path)
+            os.rmdir(os.path.dirname(converted_path))
+        except OSError:
+            pass
+
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def get_doc_converter() -> LibreOfficeConverter:
+    """Returns the process-wide converter, creating it on first use."""
+    global _converter
+    with _converter_lock:
+        if _converter is None:
+            _converter = LibreOfficeConverter()
+            atexit.register(_converter.shutdown)
+    return _converter
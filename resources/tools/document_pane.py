@@ -0,0 +1,75 @@
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import *
+
+from .background import run_in_background
+from .extraction_service import extract_text
+
+EMPTY_PATHS = [None, 'N/A', 'NULL', 'None', '']
+
+
+class DocumentPane(QWidget):
+    """
+    Read-only view of a document that is loaded off the GUI thread.
+
+    Nothing is read until the pane is first shown. A placeholder is displayed while the file is extracted in the
+    background, then only a preview of the text is rendered; the full text is rendered on demand with "Show all".
+    """
+    loaded = pyqtSignal(str)
+
+    def __init__(self, file_path, empty_text="No Document Found.", preview_chars=4000, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.empty_text = empty_text
+        self.preview_chars = preview_chars
+        self.full_text = None
+        self._task = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # QPlainTextEdit only lays out the visible blocks, which keeps long documents cheap to display
+        self.textView = QPlainTextEdit()
+        self.textView.setReadOnly(True)
+        self.textView.setFont(QFont("Arial", 10))
+        self.textView.setStyleSheet("color: gray;")
+        self.textView.setPlainText("Loading..." if file_path not in EMPTY_PATHS else empty_text)
+        layout.addWidget(self.textView)
+
+        self.showAllButton = QPushButton("Show all")
+        self.showAllButton.clicked.connect(self.showAll)
+        self.showAllButton.hide()
+        layout.addWidget(self.showAllButton)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.load()
+
+    def load(self):
+        """Starts reading the document, once."""
+        if self._task is not None or self.file_path in EMPTY_PATHS:
+            return
+        self._task = run_in_background(extract_text, self.file_path, on_finished=self.onLoaded,
+                                       on_failed=self.onFailed)
+
+    def onLoaded(self, text):
+        self.full_text = text or self.empty_text
+        if len(self.full_text) > self.preview_chars:
+            self.textView.setPlainText(self.full_text[:self.preview_chars] + "...")
+            self.showAllButton.setText(f"Show all ({len(self.full_text):,} characters)")
+            self.showAllButton.show()
+        else:
+            self.textView.setPlainText(self.full_text)
+        self.loaded.emit(self.full_text)
+
+    def onFailed(self, message):
+        self.textView.setPlainText(f"Could not load the document due to the following error: \n{message}.")
+
+    def showAll(self):
+        if self.full_text is not None:
+            self.textView.setPlainText(self.full_text)
+        self.showAllButton.hide()
+
+    def text(self):
+        """Returns the loaded text, or an empty string while it is still loading."""
+        return self.full_text or ""
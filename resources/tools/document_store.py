@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+DOCUMENT_REFERENCE_PREFIX = "docstore://"
+
+
+def is_document_reference(path) -> bool:
+    """Returns True if the value stored in a path column points into the document store."""
+    return isinstance(path, str) and path.startswith(DOCUMENT_REFERENCE_PREFIX)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Writes the file through a temporary sibling so readers never see a partially written file."""
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class DocumentStore:
+    """
+    Content-addressed storage for resumes, job descriptions and notes.
+
+    Every document is stored once, under the SHA-256 of its bytes, as a compressed blob next to its extracted text
+    and metadata:
+
+        <root>/objects/ab/abcdef.../blob.gz
+        <root>/objects/ab/abcdef.../text.txt.gz
+        <root>/objects/ab/abcdef.../meta.json
+
+    The database keeps a "docstore://<sha256><extension>" reference in place of a file path. Identical documents
+    share one object, objects are never rewritten, and reading the text of a stored document only decompresses the
+    cached extraction.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # References
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def make_reference(digest: str, extension: str) -> str:
+        return f"{DOCUMENT_REFERENCE_PREFIX}{digest}{extension.lower()}"
+
+    @staticmethod
+    def parse_reference(reference: str) -> Tuple[str, str]:
+        """Splits a reference into its digest and file extension."""
+        if not is_document_reference(reference):
+            raise ValueError(f"Not a document store reference: {reference}")
+        name = reference[len(DOCUMENT_REFERENCE_PREFIX):]
+        digest, extension = name[:64], name[64:]
+        if len(digest) != 64:
+            raise ValueError(f"Malformed document store reference: {reference}")
+        return digest, extension
+
+    def object_dir(self, reference: str) -> Path:
+        digest, _ = self.parse_reference(reference)
+        return self.objects_dir / digest[:2] / digest
+
+    def contains(self, reference: str) -> bool:
+        # meta.json is written last, so its presence marks a complete object
+        return (self.object_dir(reference) / "meta.json").is_file()
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+    def put_bytes(self, data: bytes, extension: str, original_name: Optional[str] = None,
+                  source_path: Optional[str] = None, text: Optional[str] = None) -> str:
+        """
+        Stores a document unless an identical one is already stored.
+
+        Args:
+            data (bytes): Content of the document.
+            extension (str): File extension including the dot, used to pick the extractor.
+            original_name (Optional[str]): Human readable file name kept in the metadata.
+            source_path (Optional[str]): Where the document was ingested from.
+            text (Optional[str]): Already extracted text, saving a later extraction.
+
+        Returns:
+            str: The reference to save in the database.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        reference = self.make_reference(digest, extension)
+        if self.contains(reference):
+            return reference
+
+        object_dir = self.object_dir(reference)
+        object_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(object_dir / "blob.gz", gzip.compress(data, compresslevel=6))
+        if text is not None:
+            _atomic_write(object_dir / "text.txt.gz", gzip.compress(text.encode("utf-8"), compresslevel=6))
+
+        metadata = {
+            "sha256": digest,
+            "extension": extension.lower(),
+            "size": len(data),
+            "original_name": original_name,
+            "source_path": source_path,
+            "ingested": datetime.now().isoformat(timespec="seconds")
+        }
+        _atomic_write(object_dir / "meta.json", json.dumps(metadata, indent=2).encode("utf-8"))
+        return reference
+
+    @staticmethod
+    def document_extension(file_path) -> str:
+        """
+        Returns the extension that picks the extractor of a file, keeping the format of encrypted documents
+        (resume.pdf.gpg gives ".pdf.gpg"). Other dots in the name are not part of it (j.smith.pdf gives ".pdf").
+        """
+        suffixes = Path(file_path).suffixes
+        if len(suffixes) > 1 and suffixes[-1].lower() == ".gpg":
+            return "".join(suffixes[-2:])
+        return "".join(suffixes[-1:])
+
+    def put_file(self, file_path) -> str:
+        """Ingests a file from disk and returns its reference."""
+        file_path = Path(file_path)
+        return self.put_bytes(file_path.read_bytes(), self.document_extension(file_path),
+                              original_name=file_path.name, source_path=str(file_path))
+
+    def put_text(self, text: str, original_name: Optional[str] = None) -> str:
+        """Stores plain text as a .txt document and returns its reference."""
+        return self.put_bytes(text.encode("utf-8"), ".txt", original_name=original_name, text=text)
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    def metadata(self, reference: str) -> Dict:
+        with open(self.object_dir(reference) / "meta.json", "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def read_bytes(self, reference: str) -> bytes:
+        with gzip.open(self.object_dir(reference) / "blob.gz", "rb") as file:
+            return file.read()
+
+    def materialize(self, reference: str, target_dir) -> Path:
+        """Writes the original document into target_dir, for tools that need a real file."""
+        digest, extension = self.parse_reference(reference)
+        target = Path(target_dir, f"{digest}{extension}")
+        with gzip.open(self.object_dir(reference) / "blob.gz", "rb") as source, open(target, "wb") as destination:
+            shutil.copyfileobj(source, destination)
+        return target
+
+    def read_text(self, reference: str, extractor: Callable[[str], str]) -> str:
+        """
+        Returns the extracted text of a stored document, extracting and caching it on first access.
+
+        The text of encrypted (.gpg) documents is never written next to them, and neither are read errors.
+
+        Args:
+            reference (str): Reference returned when the document was stored.
+            extractor (Callable[[str], str]): Extracts the text of a file on disk (read_text_file).
+        """
+        if not self.contains(reference):
+            return "File not found."
+
+        text_path = self.object_dir(reference) / "text.txt.gz"
+        if text_path.is_file():
+            with gzip.open(text_path, "rb") as file:
+                return file.read().decode("utf-8")
+
+        with tempfile.TemporaryDirectory(prefix="crm_docstore_") as tmp_dir:
+            text = extractor(str(self.materialize(reference, tmp_dir)))
+
+        # Imported here, helpful_functions imports this module
+        from .helpful_functions import is_read_error
+
+        _, extension = self.parse_reference(reference)
+        if not is_read_error(text) and not extension.endswith(".gpg"):
+            _atomic_write(text_path, gzip.compress(text.encode("utf-8"), compresslevel=6))
+        return text
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_document_store(root) -> DocumentStore:
+    """Returns the store for the given root directory, shared across the process."""
+    key = str(Path(root).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = DocumentStore(root)
+        return _stores[key]
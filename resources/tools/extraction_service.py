@@ -0,0 +1,492 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional
+
+DEFAULT_HOST = os.environ.get("CRM_EXTRACTION_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("CRM_EXTRACTION_PORT", 50731))
+AUTHKEY_ENV = "CRM_EXTRACTION_AUTHKEY"
+MIN_AUTHKEY_LENGTH = 16
+# Extra seconds a job converting .doc files gets on top of the longest the conversion itself may take
+CONVERSION_TIMEOUT_MARGIN = 15
+
+
+def get_authkey() -> bytes:
+    """
+    Returns the key shared by the extraction service and its clients, read from CRM_EXTRACTION_AUTHKEY.
+
+    The manager socket exchanges pickles, so anyone holding the key can run code in the service. There is
+    deliberately no default; generate one with e.g. python -c "import secrets; print(secrets.token_urlsafe(32))".
+
+    Raises:
+        RuntimeError: If the variable is unset or shorter than MIN_AUTHKEY_LENGTH characters.
+    """
+    authkey = os.environ.get(AUTHKEY_ENV, "")
+    if len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise RuntimeError(f"Set {AUTHKEY_ENV} to a secret of at least {MIN_AUTHKEY_LENGTH} characters to use the "
+                           f"shared extraction service.")
+    return authkey.encode("utf-8")
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than the allowed time to extract."""
+
+
+class ExtractionWorkerCrashed(Exception):
+    """Raised when the worker process dies while extracting a document."""
+
+
+def _extract(file_path: str, plaintext: Optional[bytes] = None, **options) -> str:
+    """
+    Reads the text of a document. Runs inside a worker process.
+
+    Encrypted documents arrive already decrypted as plaintext (see ExtractionService._with_plaintext), so the
+    workers never load the key or open the config dialog. The workers are daemonic and may not have children,
+    so large PDFs are read page by page.
+    """
+    from resources.tools.helpful_functions import read_document_bytes, read_text_file
+
+    if plaintext is not None:
+        return read_document_bytes(plaintext, file_path[:-len(".gpg")], parallel=False, **options)
+    return read_text_file(file_path, parallel=False, **options)
+
+
+def _extract_batch(file_paths: List[str], **options) -> List[str]:
+    """Reads several documents in a worker process, converting the .doc files among them in one LibreOffice batch."""
+    from resources.tools.helpful_functions import read_text_files
+
+    return read_text_files(file_paths, parallel=False, **options)
+
+
+def _needs_conversion(file_path) -> bool:
+    """Tells whether reading a document starts LibreOffice (a .doc file, or a stored one)."""
+    return isinstance(file_path, str) and file_path.lower().endswith(".doc")
+
+
+def _index_document(index_path: str, doc_id: int, file_path: str, plaintext: Optional[bytes] = None) -> int:
+    """
+    Extracts a document and adds it to a ranking index. Runs inside a worker process.
+
+    Raises when the document cannot be read, so it stays unindexed and is retried instead of being recorded as
+    current with the error message as its text.
+    """
+    from application.finder_agent.bm25_index import BM25Index, file_signature
+    from resources.tools.helpful_functions import is_read_error
+
+    # Recorded with the same signature BM25Index.sync checks, so the finder does not read the document again
+    signature = file_signature(file_path)
+    text = _extract(file_path, plaintext)
+    if is_read_error(text):
+        raise RuntimeError(f"Could not read {file_path}: {text}")
+    with BM25Index(index_path) as index:
+        index.add_document(doc_id, text, *signature)
+    return len(text)
+
+
+def _worker_main(connection) -> None:
+    """Entry point of a worker process: runs the jobs it receives until the pipe is closed."""
+    # The parsers are imported by the tasks, so they are only ever loaded inside the worker processes
+    tasks = {"extract": _extract, "extract_batch": _extract_batch, "index": _index_document}
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        task, args, kwargs = job
+        try:
+            connection.send((True, tasks[task](*args, **kwargs)))
+        except Exception as e:
+            connection.send((False, str(e)))
+
+
+class _Worker:
+    """One extraction process and the pipe used to talk to it."""
+
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+    def close(self) -> None:
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.connection.close()
+
+
+class ExtractionService:
+    """
+    Extracts document text in separate worker processes.
+
+    PyMuPDF, python-docx and LibreOffice only ever run inside the workers, so a malformed document can neither
+    block nor crash the caller. Each worker is owned by a supervisor thread that hands it one job at a time,
+    kills and replaces it when a job exceeds its timeout or the process dies, and caches successful results.
+    .gpg documents are decrypted by the supervisors, through the decryption cache of this process, and only their
+    plaintext is sent to the workers.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 60, cache_size: int = 256,
+                 index_dir: Optional[str] = None):
+        """
+        Args:
+            max_workers (int): Number of worker processes, i.e. how many documents are parsed at once.
+            timeout (float): Default number of seconds a single document may take.
+            cache_size (int): Number of extracted texts kept in memory.
+            index_dir (Optional[str]): Folder of the ranking indexes updated by index_document(). Defaults to
+                <output directory>/ranking_index.
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.index_dir = index_dir
+
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = queue.Queue()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._stats = {"submitted": 0, "cache_hits": 0, "timeouts": 0, "crashes": 0}
+        self._closed = False
+        self._supervisors = []
+        for number in range(self.max_workers):
+            supervisor = threading.Thread(target=self._supervise, name=f"extraction-supervisor-{number}",
+                                          daemon=True)
+            supervisor.start()
+            self._supervisors.append(supervisor)
+
+    # ------------------------------------------------------------------ #
+    # Cache
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _cache_key(file_path: str, options: Dict) -> Optional[tuple]:
+        try:
+            stat = os.stat(file_path)
+            signature = (os.path.abspath(file_path), stat.st_mtime, stat.st_size)
+        except (OSError, TypeError, ValueError):
+            # Document store references never change content, anything else that cannot be stat'ed is not cached
+            if not (isinstance(file_path, str) and file_path.startswith("docstore://")):
+                return None
+            signature = (file_path,)
+        return signature + tuple(sorted(options.items()))
+
+    def _cache_get(self, key):
+        if key is None:
+            return None
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_put(self, key, text: str) -> None:
+        if key is None or text.startswith("An error occurred"):
+            return
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------ #
+    # Jobs
+    # ------------------------------------------------------------------ #
+    def submit(self, file_path: str, timeout: Optional[float] = None, **options) -> Future:
+        """
+        Queues a document for extraction.
+
+        Args:
+            file_path (str): Path of the document (or a document store reference).
+            timeout (Optional[float]): Seconds the extraction may take, defaults to the service timeout.
+            **options: Passed to read_text_file (max_pages, max_chars).
+
+        Returns:
+            Future: Resolves to the text, or raises ExtractionTimeout / ExtractionWorkerCrashed.
+        """
+        if self._closed:
+            raise RuntimeError("The extraction service has been shut down.")
+
+        future = Future()
+        self._stats["submitted"] += 1
+        key = self._cache_key(file_path, options)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._stats["cache_hits"] += 1
+            future.set_result(cached)
+            return future
+
+        self._jobs.put((future, ("extract", (file_path,), options), key,
+                        self._job_timeout(timeout, int(_needs_conversion(file_path))), file_path))
+        return future
+
+    def submit_batch(self, file_paths: List[str], timeout: Optional[float] = None, **options) -> Future:
+        """
+        Queues several documents as a single job, so the .doc files among them are converted in one LibreOffice
+        batch instead of one cold start each. The results are not cached; extract_many does that.
+
+        Returns:
+            Future: Resolves to the texts, in the same order as file_paths.
+        """
+        if self._closed:
+            raise RuntimeError("The extraction service has been shut down.")
+
+        future = Future()
+        self._stats["submitted"] += 1
+        doc_count = sum(1 for file_path in file_paths if _needs_conversion(file_path))
+        self._jobs.put((future, ("extract_batch", (list(file_paths),), options), None,
+                        self._job_timeout(timeout, doc_count), f"{len(file_paths)} documents"))
+        return future
+
+    def _job_timeout(self, timeout: Optional[float], doc_count: int) -> float:
+        """
+        Returns the timeout of a job that converts doc_count .doc files. It must outlast LibreOffice's own timeouts:
+        killing the worker in the middle of a conversion would leave soffice running and its profile behind.
+        """
+        timeout = timeout or self.timeout
+        if doc_count:
+            from resources.tools.doc_converter import LibreOfficeConverter
+            timeout = max(timeout, LibreOfficeConverter().max_duration(doc_count) + CONVERSION_TIMEOUT_MARGIN)
+        return timeout
+
+    def submit_index(self, doc_id: int, file_path: str, index_name: str = "employees",
+                     timeout: Optional[float] = None) -> Future:
+        """
+        Queues a document to be extracted and added to a ranking index.
+
+        Args:
+            doc_id (int): Database id of the row the document belongs to.
+            file_path (str): Path of the document, exactly as stored in the database.
+            index_name (str): Name of the index, as passed to open_ranking_index.
+            timeout (Optional[float]): Seconds the job may take, defaults to the service timeout.
+
+        Returns:
+            Future: Resolves to the number of characters indexed.
+        """
+        if self._closed:
+            raise RuntimeError("The extraction service has been shut down.")
+
+        index_dir = self.index_dir
+        if index_dir is None:
+            from resources.tools.helpful_functions import read_output_directory
+            output_directory = read_output_directory()
+            if output_directory is None:
+                raise RuntimeError("The CRM output directory has not been configured yet.")
+            index_dir = os.path.join(output_directory, "ranking_index")
+        os.makedirs(index_dir, exist_ok=True)
+
+        future = Future()
+        self._stats["submitted"] += 1
+        index_path = os.path.join(index_dir, f"{index_name}.sqlite3")
+        self._jobs.put((future, ("index", (index_path, doc_id, file_path), {}), None,
+                        self._job_timeout(timeout, int(_needs_conversion(file_path))), file_path))
+        return future
+
+    def index_document(self, doc_id: int, file_path: str, index_name: str = "employees",
+                       timeout: Optional[float] = None) -> int:
+        """Extracts a document into a ranking index and waits for it. See submit_index."""
+        return self.submit_index(doc_id, file_path, index_name, timeout).result()
+
+    def store_document(self, file_path: str) -> str:
+        """
+        Copies a document into the CRM document store and returns the docstore:// reference to save for it.
+
+        Used by the website, whose upload folder is only a staging area. Runs in the calling thread; the store
+        only hashes and compresses the file.
+        """
+        from resources.tools.document_store import get_document_store
+        from resources.tools.helpful_functions import read_output_directory
+
+        output_directory = read_output_directory()
+        if output_directory is None:
+            raise RuntimeError("The CRM output directory has not been configured yet.")
+        return get_document_store(os.path.join(output_directory, "document_store")).put_file(file_path)
+
+    def extract(self, file_path: str, timeout: Optional[float] = None, **options) -> str:
+        """Extracts a document and waits for its text. Failures are returned as text, like read_text_file."""
+        try:
+            return self.submit(file_path, timeout, **options).result()
+        except Exception as e:
+            return f"An error occurred: {e}"
+
+    def extract_many(self, file_paths: List[str], timeout: Optional[float] = None, **options) -> List[str]:
+        """
+        Extracts several documents concurrently and returns their texts in the same order.
+
+        The .doc files that are not cached yet are read by a single job, so LibreOffice converts them in one batch;
+        the other documents are spread over the workers.
+        """
+        unique_paths = list(dict.fromkeys(file_paths))
+        doc_paths = [file_path for file_path in unique_paths if _needs_conversion(file_path)
+                     and self._cache_get(self._cache_key(file_path, options)) is None]
+        futures = {file_path: self.submit(file_path, timeout, **options)
+                   for file_path in unique_paths if file_path not in doc_paths}
+
+        texts = {}
+        if doc_paths:
+            try:
+                texts.update(zip(doc_paths, self.submit_batch(doc_paths, timeout, **options).result()))
+                for file_path in doc_paths:
+                    self._cache_put(self._cache_key(file_path, options), texts[file_path])
+            except Exception as e:
+                texts.update((file_path, f"An error occurred: {e}") for file_path in doc_paths)
+        for file_path, future in futures.items():
+            try:
+                texts[file_path] = future.result()
+            except Exception as e:
+                texts[file_path] = f"An error occurred: {e}"
+        return [texts[file_path] for file_path in file_paths]
+
+    def stats(self) -> Dict[str, int]:
+        """Returns counters describing the work done so far."""
+        return dict(self._stats, queued=self._jobs.qsize(), cached=len(self._cache))
+
+    @staticmethod
+    def _with_plaintext(task: tuple, file_path: str) -> tuple:
+        """Decrypts a .gpg document in this process and adds its plaintext to the job sent to the worker."""
+        if not (isinstance(file_path, str) and file_path.lower().endswith(".gpg")):
+            return task
+        from resources.tools.decrypt_encrypted_files import read_decrypted_bytes
+
+        name, args, kwargs = task
+        return name, args, dict(kwargs, plaintext=read_decrypted_bytes(file_path))
+
+    def _supervise(self) -> None:
+        worker = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, task, key, timeout, file_path = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            # Another supervisor may have extracted the same document while this job was queued
+            cached = self._cache_get(key)
+            if cached is not None:
+                future.set_result(cached)
+                continue
+
+            try:
+                task = self._with_plaintext(task, file_path)
+            except Exception as e:
+                future.set_exception(RuntimeError(f"Could not decrypt {file_path}: {e}"))
+                continue
+
+            try:
+                if worker is None or not worker.is_alive():
+                    worker = _Worker(self._context)
+                worker.connection.send(task)
+                if not worker.connection.poll(timeout):
+                    self._stats["timeouts"] += 1
+                    worker.kill()
+                    worker = None
+                    future.set_exception(ExtractionTimeout(f"Extracting {file_path} took more than {timeout}s."))
+                    continue
+                ok, result = worker.connection.recv()
+            except (EOFError, OSError) as e:
+                self._stats["crashes"] += 1
+                if worker is not None:
+                    worker.kill()
+                worker = None
+                future.set_exception(ExtractionWorkerCrashed(f"The worker crashed while extracting {file_path}: {e}"))
+                continue
+
+            if ok:
+                self._cache_put(key, result)
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+        if worker is not None:
+            worker.close()
+
+    def shutdown(self) -> None:
+        """Stops the supervisors and their worker processes once the queued jobs are done."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._supervisors:
+            self._jobs.put(None)
+        for supervisor in self._supervisors:
+            supervisor.join()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_extraction_service() -> ExtractionService:
+    """Returns the extraction service of this process, starting it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            import atexit
+            _service = ExtractionService(max_workers=min(4, os.cpu_count() or 1))
+            atexit.register(_service.shutdown)
+    return _service
+
+
+def extract_text(file_path: str, **options) -> str:
+    """Extracts a document through the shared service. Blocks, so call it off the GUI thread."""
+    return get_extraction_service().extract(file_path, **options)
+
+
+class ExtractionServiceManager(BaseManager):
+    """Exposes an ExtractionService to other processes over a local socket."""
+
+
+def serve_extraction_service(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, authkey: Optional[bytes] = None,
+                             **service_options) -> None:
+    """
+    Runs a shared extraction service until the process is stopped.
+
+    Clients (such as the website backend) connect with a BaseManager registering "get_service" on the same
+    address and authkey, then call extract(), extract_many(), index_document(), store_document() or stats() on the
+    returned proxy.
+    Refuses to start without an authkey (see get_authkey).
+    """
+    authkey = authkey or get_authkey()
+    service = ExtractionService(**service_options)
+    ExtractionServiceManager.register("get_service", callable=lambda: service,
+                                      exposed=("extract", "extract_many", "index_document", "store_document",
+                                               "stats"))
+    server = ExtractionServiceManager(address=(host, port), authkey=authkey).get_server()
+    print(f"Extraction service listening on {host}:{port} with {service.max_workers} worker(s)")
+    try:
+        server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the shared document text extraction service.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--index-dir", default=None, help="Folder of the ranking indexes, defaults to the CRM's.")
+    args = parser.parse_args()
+    serve_extraction_service(args.host, args.port, max_workers=args.workers, timeout=args.timeout,
+                             index_dir=args.index_dir)
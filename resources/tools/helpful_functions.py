@@ -1,16 +1,22 @@
+import atexit
+import io
 import os
-import subprocess
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Dict, List
 import json
 
-import docx
-import fitz  # PyMuPDF
 from PyQt5.QtWidgets import *
+from mysql.connector import Error
 
-from .mydb import execute_query
+from .assets import get_window_icon
+from .custom_fields import CUSTOM_FIELD_ENTITY_TYPES, delete_custom_fields
+from .doc_converter import get_doc_converter
+from .document_store import get_document_store, is_document_reference
+from .mydb import execute_query, db_transaction, showCriticalMessage
 
 
 def resource_path(relative_path):
@@ -27,16 +33,23 @@ def resource_path(relative_path):
 application_path = str(resource_path(Path.cwd()))
 
 
-def find_output_directory():
-    # Check if local_directories.json file exists
+def read_output_directory():
+    """Returns the configured output directory, or None when it has not been chosen yet. Never prompts."""
     local_dir_path = resource_path("local_directories.json")
     if os.path.exists(local_dir_path):
         with open(local_dir_path, "r") as file:
             data = json.load(file)
-            output_directory = data.get("outputs", None)
-            if output_directory:
-                return output_directory
+            return data.get("outputs", None) or None
+    return None
+
+
+def find_output_directory():
+    # Check if local_directories.json file exists
+    output_directory = read_output_directory()
+    if output_directory:
+        return output_directory
 
+    local_dir_path = resource_path("local_directories.json")
     # If local_directories.json does not exist or outputs key is not found, create it and prompt user
     dialog = QDialog()
     dialog.setWindowTitle("Output Directory Selection")
@@ -97,7 +110,7 @@ def show_error_message(message: str) -> None:
     msgBox.setIcon(QMessageBox.Warning)
     msgBox.setText(message)
     msgBox.setWindowTitle("Error")
-    msgBox.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+    msgBox.setWindowIcon(get_window_icon())
     msgBox.setStandardButtons(QMessageBox.Ok)
     msgBox.exec_()
 
@@ -194,9 +207,96 @@ def archive_and_delete_company_job_order(client_id, job_order_id):
     delete_relationship_query = "DELETE FROM job2employer_ids WHERE job_order_id = %s AND client_id = %s"
     execute_query(delete_relationship_query, (job_order_id, client_id))
 
-    # Delete the job order from job_orders
+    # Delete the job order from job_orders, with the fields users added to it
     delete_job_order_query = "DELETE FROM job_orders WHERE id = %s"
     execute_query(delete_job_order_query, (job_order_id,))
+    execute_query("DELETE FROM custom_fields WHERE entity_type = %s AND entity_id = %s",
+                  (CUSTOM_FIELD_ENTITY_TYPES["job_orders"], job_order_id))
+
+
+def sweep_employee_availability(ending_soon_days=30):
+    """
+    Updates availability from the job order end dates and archives the job orders that have ended.
+
+    Everything runs as a handful of set-based statements in one transaction, so either the whole sweep is applied
+    or none of it is:
+
+    - employees on a job order ending within ending_soon_days are marked '~A'
+    - every placement on a job order that ended before today is copied to old_employee_job_orders, and each such job
+      order is copied once per client to old_company_job_orders
+    - those employees are reset to 'NW', and the placements and job orders (with their custom fields) are deleted
+
+    Raises on database errors instead of showing a dialog, so it can run in the background.
+
+    Returns:
+        dict: Number of rows affected by each step.
+    """
+    counts = {}
+    with db_transaction() as cursor:
+        cursor.execute("""
+            UPDATE employees e
+            JOIN job2employer_ids j ON j.employee_id = e.id
+            JOIN job_orders jo ON jo.id = j.job_order_id
+            SET e.availability = '~A'
+            WHERE jo.end_date BETWEEN CURDATE() AND CURDATE() + INTERVAL %s DAY
+            """, (ending_soon_days,))
+        counts["ending_soon"] = cursor.rowcount
+
+        # Locks the expired job orders so the rest of the sweep works on a stable set
+        cursor.execute("""
+            SELECT DISTINCT j.job_order_id
+            FROM job2employer_ids j
+            JOIN job_orders jo ON jo.id = j.job_order_id
+            WHERE jo.end_date < CURDATE()
+            FOR UPDATE
+            """)
+        expired_ids = [row[0] for row in cursor.fetchall()]
+        counts["expired_job_orders"] = len(expired_ids)
+        if not expired_ids:
+            return counts
+        id_list = ", ".join(["%s"] * len(expired_ids))
+
+        cursor.execute(f"""
+            INSERT INTO old_employee_job_orders (first_name, last_name, hired_date, pay, pay_conversion,
+                                                 po_order_number, location, company, job_title, position_type, remote)
+            SELECT e.first_name, e.last_name, e.hired_date, e.pay, e.pay_conversion,
+                   jo.po_order_number, jo.location, jo.company, jo.job_title, jo.position_type, jo.remote
+            FROM job2employer_ids j
+            JOIN employees e ON e.id = j.employee_id
+            JOIN job_orders jo ON jo.id = j.job_order_id
+            WHERE j.job_order_id IN ({id_list})
+            """, expired_ids)
+        counts["archived_placements"] = cursor.rowcount
+
+        cursor.execute(f"""
+            INSERT INTO old_company_job_orders (employer_company, contact_person, location, po_order_number, 
+            start_date, end_date, needed_employees, job_title, position_type, bill_rate_min, bill_rate_max, 
+            bill_rate_conversion, pay_rate, pay_rate_conversion, min_experience, requirements, remote, 
+            job_description_path, notes_path)
+            SELECT c.employer_company, c.contact_person, jo.location, jo.po_order_number, jo.start_date, 
+                   jo.end_date, jo.needed_employees, jo.job_title, jo.position_type, jo.bill_rate_min, 
+                   jo.bill_rate_max, jo.bill_rate_conversion, jo.pay_rate, jo.pay_rate_conversion, 
+                   jo.min_experience, jo.requirements, jo.remote, jo.job_description_path, jo.notes_path
+            FROM (SELECT DISTINCT job_order_id, client_id FROM job2employer_ids
+                  WHERE job_order_id IN ({id_list})) j
+            JOIN job_orders jo ON jo.id = j.job_order_id
+            JOIN clients c ON c.id = j.client_id
+            """, expired_ids)
+        counts["archived_job_orders"] = cursor.rowcount
+
+        cursor.execute(f"""
+            UPDATE employees e
+            JOIN job2employer_ids j ON j.employee_id = e.id
+            SET e.availability = 'NW', e.employee_type = NULL, e.job_id = NULL, e.hired_date = NULL, e.pay = NULL,
+                e.pay_conversion = NULL
+            WHERE j.job_order_id IN ({id_list})
+            """, expired_ids)
+        counts["released_employees"] = cursor.rowcount
+
+        cursor.execute(f"DELETE FROM job2employer_ids WHERE job_order_id IN ({id_list})", expired_ids)
+        cursor.execute(f"DELETE FROM job_orders WHERE id IN ({id_list})", expired_ids)
+        delete_custom_fields(cursor, "job_orders", expired_ids)
+    return counts
 
 
 def retrieve_current_job_order(employee_id):
@@ -221,93 +321,311 @@ def retrieve_current_company(job_order_id):
 
 
 def change_active_needed_employees(employer_id, job_order_id, subtract_needed_employees=True):
-    # Fetch the current values of needed_employees and active_employees
+    """
+    Moves one employee from the needed to the active count of a job order (or back), and updates the active count of
+    its client to match.
+
+    Both counters are changed with relative UPDATE statements (x = x + 1) in a single transaction, so two recruiters
+    placing people on the same job order at the same time never overwrite each other's change.
+    """
+    step = 1 if subtract_needed_employees else -1
+
     query = "SELECT needed_employees, active_employees FROM job_orders WHERE id = %s"
     result = execute_query(query, (job_order_id,), fetch_mode='one')
-    if result:
-        needed_employees, active_employees = result
-
-        # Prepare new values based on the operation
-        new_needed_employees = needed_employees - 1 if subtract_needed_employees else needed_employees + 1
-        new_active_employees = active_employees + 1 if subtract_needed_employees else active_employees - 1
-
-        # Check if the operation leads to negative numbers
-        if new_needed_employees < 0 or new_active_employees < 0:
-            reply = QMessageBox.question(None, "Confirm Operation",
-                                         "This operation will result in negative numbers for employees. "
-                                         "Are you sure you want to proceed?",
-                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-
-            if reply == QMessageBox.No:
-                return  # User chose not to proceed
-
-        # Update job_orders table with new values
-        update_query = """
-            UPDATE job_orders 
-            SET needed_employees = %s, active_employees = %s 
-            WHERE id = %s
-            """
-        execute_query(update_query, (new_needed_employees, new_active_employees, job_order_id))
+    if not result:
+        return
+    needed_employees, active_employees = result
+
+    # The counts may change before the update; this only spares the user an obviously wrong operation
+    if needed_employees - step < 0 or active_employees + step < 0:
+        reply = QMessageBox.question(None, "Confirm Operation",
+                                     "This operation will result in negative numbers for employees. "
+                                     "Are you sure you want to proceed?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+
+        if reply == QMessageBox.No:
+            return  # User chose not to proceed
+
+    try:
+        with db_transaction() as cursor:
+            cursor.execute("""
+                UPDATE job_orders
+                SET needed_employees = needed_employees - %s, active_employees = active_employees + %s
+                WHERE id = %s
+                """, (step, step, job_order_id))
+            cursor.execute("UPDATE clients SET active_employees = active_employees + %s WHERE id = %s",
+                           (step, employer_id))
+    except Error as e:
+        showCriticalMessage("Database Error", f"The employee counts could not be updated: {e}")
+
+
+def reconcile_employee_counts():
+    """
+    Recomputes the active employee counts of job orders and clients from their placements in job2employer_ids.
+
+    Counts drift when a placement is removed without going through change_active_needed_employees (the availability
+    sweep, deleted rows, edits made outside the application). A job order whose active count is corrected gets the
+    difference added to its needed count, so the number of positions it asked for stays the same.
 
-        # Update clients table
-        query = "SELECT active_employees FROM clients WHERE id = %s"
-        result = execute_query(query, (employer_id,), fetch_mode='one')
-        if result:
-            active_employees = result[0]
-            new_active_employees = active_employees + 1 if subtract_needed_employees else active_employees - 1
+    Raises on database errors instead of showing a dialog, so it can run in the background.
 
-            update_query = """
-                    UPDATE clients 
-                    SET active_employees = %s 
-                    WHERE id = %s
-                    """
-            execute_query(update_query, (new_active_employees, employer_id))
+    Returns:
+        dict: Number of job orders and clients whose counts were corrected.
+    """
+    counts = {}
+    with db_transaction() as cursor:
+        placed_per_job_order = """
+            UPDATE job_orders jo
+            LEFT JOIN (SELECT job_order_id, COUNT(*) AS placed FROM job2employer_ids GROUP BY job_order_id) j
+                ON j.job_order_id = jo.id
+            SET {assignment}
+            WHERE jo.active_employees <> COALESCE(j.placed, 0)
+            """
+        # Two statements, since MySQL does not guarantee the order of the assignments of a multiple-table UPDATE
+        cursor.execute(placed_per_job_order.format(
+            assignment="jo.needed_employees = jo.needed_employees + jo.active_employees - COALESCE(j.placed, 0)"))
+        cursor.execute(placed_per_job_order.format(assignment="jo.active_employees = COALESCE(j.placed, 0)"))
+        counts["reconciled_job_orders"] = cursor.rowcount
+
+        cursor.execute("""
+            UPDATE clients c
+            LEFT JOIN (SELECT client_id, COUNT(*) AS placed FROM job2employer_ids GROUP BY client_id) j
+                ON j.client_id = c.id
+            SET c.active_employees = COALESCE(j.placed, 0)
+            WHERE c.active_employees <> COALESCE(j.placed, 0)
+            """)
+        counts["reconciled_clients"] = cursor.rowcount
+    return counts
 
 
 def convert_doc_to_docx(doc_path):
-    """Converts a .doc file to .docx using LibreOffice."""
-    tmp_dir = tempfile.mkdtemp()
-    subprocess.run(['libreoffice', '--convert-to', 'docx', '--outdir', tmp_dir, doc_path], stdout=subprocess.PIPE,
-                   stderr=subprocess.PIPE)
-    base_name = os.path.splitext(os.path.basename(doc_path))[0]
-    converted_path = os.path.join(tmp_dir, f"{base_name}.docx")
-    return converted_path
+    """Converts a .doc file to .docx using the shared LibreOffice instance. Returns None if it failed."""
+    return get_doc_converter().convert([doc_path]).get(str(doc_path))
 
 
-def read_docx_file(file_path):
-    """Reads a .docx file and returns its text content."""
+def convert_docs_to_docx(doc_paths):
+    """Converts several .doc files in one LibreOffice batch. Returns a dict of input path to .docx path."""
+    return get_doc_converter().convert(doc_paths)
+
+
+def read_docx_file(file_path, max_chars=None):
+    """Reads a .docx file (path or binary file object) and returns its text content."""
+    import docx  # Imported on first use to keep it out of the application start-up
+
     doc = docx.Document(file_path)
-    return '\n'.join([para.text for para in doc.paragraphs])
+    text = '\n'.join([para.text for para in doc.paragraphs])
+    return text if max_chars is None else text[:max_chars]
+
+
+# PDFs with at least this many pages are split across worker processes
+PDF_PARALLEL_PAGE_THRESHOLD = 64
+PDF_PAGES_PER_WORKER_CHUNK = 16
+_pdf_executor = None
+
+
+def _get_pdf_executor():
+    """Returns the process pool used for large PDFs, creating it on first use."""
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        atexit.register(_pdf_executor.shutdown, wait=False)
+    return _pdf_executor
+
+
+def _extract_pdf_page_range(file_path, start, stop):
+    """Extracts a range of pages. Runs in a worker process, so it opens its own handle on the document."""
+    with open_pdf(file_path) as doc:
+        return [doc.load_page(page_number).get_text() for page_number in range(start, stop)]
 
 
-def read_pdf_file(file_path):
-    """Reads a .pdf file and returns its text content."""
-    with fitz.open(file_path) as doc:
-        text = ""
-        for page in doc:
-            text += page.get_text()
-    return text
+def open_pdf(source):
+    """Opens a .pdf from a path, or from its content when given bytes."""
+    import fitz  # PyMuPDF, imported on first use to keep it out of the application start-up
 
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
 
-def read_text_file(file_path):
-    """Reads text from a file based on its extension. Supports .txt, .docx, .doc, and .pdf."""
+
+def _pdf_page_count(doc, max_pages=None):
+    """Returns how many pages of an open document are read when only max_pages are wanted."""
+    return doc.page_count if max_pages is None else min(max_pages, doc.page_count)
+
+
+def _iter_open_pdf_pages(doc, page_count):
+    """Yields the text of the first page_count pages of an open document."""
+    for page_number in range(page_count):
+        yield doc.load_page(page_number).get_text()
+
+
+def iter_pdf_pages(file_path, max_pages=None):
+    """Yields the text of a .pdf file (path or bytes) one page at a time."""
+    with open_pdf(file_path) as doc:
+        yield from _iter_open_pdf_pages(doc, _pdf_page_count(doc, max_pages))
+
+
+def read_pdf_file(file_path, max_pages=None, max_chars=None, parallel=True):
+    """
+    Reads a .pdf file and returns its text content.
+
+    Args:
+        file_path (Union[str, bytes]): Path to the .pdf file, or its content.
+        max_pages (Optional[int]): Only the first max_pages pages are read.
+        max_chars (Optional[int]): Reading stops once this many characters have been collected.
+        parallel (bool): Allows large documents to be split across worker processes.
+
+    Returns:
+        str: The text of the extracted pages.
+    """
+    # The workers open their own handles, this one is kept for the page count and the sequential read
+    with open_pdf(file_path) as doc:
+        page_count = _pdf_page_count(doc, max_pages)
+
+        # A character cap usually stops after a few pages, which is cheaper to do in order. In-memory documents
+        # are not split, that would mean copying them to every worker
+        if (parallel and max_chars is None and page_count >= PDF_PARALLEL_PAGE_THRESHOLD
+                and isinstance(file_path, str)):
+            starts = list(range(0, page_count, PDF_PAGES_PER_WORKER_CHUNK))
+            stops = [min(start + PDF_PAGES_PER_WORKER_CHUNK, page_count) for start in starts]
+            try:
+                chunks = _get_pdf_executor().map(_extract_pdf_page_range, [file_path] * len(starts), starts, stops)
+                return "".join(text for chunk in chunks for text in chunk)
+            except BrokenProcessPool as e:
+                global _pdf_executor
+                _pdf_executor = None
+                print(f"Parallel PDF extraction failed, reading it page by page instead: {e}")
+
+        pages = []
+        collected = 0
+        for text in _iter_open_pdf_pages(doc, page_count):
+            pages.append(text)
+            collected += len(text)
+            if max_chars is not None and collected >= max_chars:
+                break
+    text = "".join(pages)
+    return text if max_chars is None else text[:max_chars]
+
+
+def open_document_store():
+    """Returns the document store kept in the output directory."""
+    return get_document_store(Path(find_output_directory(), "document_store"))
+
+
+def store_document(file_path):
+    """
+    Copies a document the user picked into the document store and returns the reference to save in its place.
+    Empty values and values that already are references are returned unchanged.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    if file_path in [None, 'N/A', 'NULL', 'None', ''] or is_document_reference(file_path):
+        return file_path
+    return open_document_store().put_file(file_path)
+
+
+def read_document_bytes(data, file_name, max_pages=None, max_chars=None, parallel=True):
+    """
+    Reads the text of a document held in memory, e.g. the plaintext of a .gpg file. The format is taken from the
+    extension of file_name. Only .doc files need a short-lived temporary copy, since LibreOffice cannot read from
+    memory.
+    """
+    extension = os.path.splitext(file_name)[-1].lower()
+    if extension == '.txt':
+        text = data.decode('utf-8')
+        return text if max_chars is None else text[:max_chars]
+    elif extension == '.docx':
+        return read_docx_file(io.BytesIO(data), max_chars)
+    elif extension == '.pdf':
+        return read_pdf_file(data, max_pages, max_chars, parallel)
+    elif extension == '.doc':
+        with tempfile.TemporaryDirectory(prefix="crm_decrypted_") as tmp_dir:
+            doc_path = os.path.join(tmp_dir, os.path.basename(file_name))
+            with open(doc_path, 'wb') as file:
+                file.write(data)
+            return read_text_file(doc_path, max_pages=max_pages, max_chars=max_chars, parallel=parallel)
+    return "Unsupported file format."
+
+
+def read_encrypted_text_file(file_path, max_pages=None, max_chars=None, parallel=True):
+    """
+    Reads a .gpg encrypted document (e.g. resume.pdf.gpg) without writing its plaintext to disk.
+
+    The file is decrypted into the in-memory cache of decrypt_encrypted_files and handed to the extractor as bytes.
+    """
+    # Imported here, decrypt_encrypted_files imports this module
+    from .decrypt_encrypted_files import read_decrypted_bytes
+
+    return read_document_bytes(read_decrypted_bytes(file_path), file_path[:-len('.gpg')], max_pages, max_chars,
+                               parallel)
+
+
+# read_text_file reports failures as text starting with one of these
+READ_ERROR_PREFIXES = ("File not found.", "An error occurred", "Unsupported file format.")
+
+
+def is_read_error(text):
+    """Tells whether read_text_file (or the extraction service) failed to read a document."""
+    return text is None or text.startswith(READ_ERROR_PREFIXES)
+
+
+def read_text_file(file_path, converted_path=None, max_pages=None, max_chars=None, parallel=True):
+    """
+    Reads text from a file based on its extension. Supports .txt, .docx, .doc, and .pdf, and their .gpg encrypted
+    versions.
+
+    max_pages only applies to PDFs; max_chars caps the text of every format. Document store references are served
+    from the text cached next to the stored document. Encrypted files, stored or not, are decrypted in memory and
+    their text is never cached on disk. Pass parallel=False from a daemonic process (such as an extraction worker),
+    which may not start the PDF process pool.
+    """
     if file_path in [None, 'N/A', 'NULL', 'None', '']:
         return "File not found."
+    if is_document_reference(file_path) and not file_path.endswith('.gpg'):
+        try:
+            text = open_document_store().read_text(file_path,
+                                                   lambda path: read_text_file(path, parallel=parallel))
+        except Exception as e:
+            return f"An error occurred: {e}"
+        return text if max_chars is None else text[:max_chars]
     extension = os.path.splitext(file_path)[-1].lower()
     try:
         if extension == '.txt':
             with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+                return file.read(max_chars)
         elif extension == '.docx':
-            return read_docx_file(file_path)
+            return read_docx_file(file_path, max_chars)
         elif extension == '.doc':
-            converted_path = convert_doc_to_docx(file_path)
-            text = read_docx_file(converted_path)
-            os.remove(converted_path)  # Clean up the temporary .docx file
-            return text
+            # A converted copy may already exist when the file was part of a batch conversion
+            converted_path = converted_path or convert_doc_to_docx(file_path)
+            if not converted_path:
+                return "An error occurred: LibreOffice could not convert the file."
+            try:
+                return read_docx_file(converted_path, max_chars)
+            finally:
+                get_doc_converter().release(converted_path)  # Clean up the temporary .docx file
         elif extension == '.pdf':
-            return read_pdf_file(file_path)
+            return read_pdf_file(file_path, max_pages, max_chars, parallel)
+        elif extension == '.gpg':
+            return read_encrypted_text_file(file_path, max_pages, max_chars, parallel)
         else:
             return "Unsupported file format."
     except Exception as e:
         return f"An error occurred: {e}"
+
+
+def read_text_files(file_paths, max_pages=None, max_chars=None, parallel=True):
+    """
+    Reads several files, converting all the .doc files among them in a single LibreOffice batch. parallel is passed
+    on to read_text_file.
+    """
+    file_paths = list(file_paths)
+    doc_paths = [str(path) for path in file_paths
+                 if path and not is_document_reference(path) and os.path.splitext(str(path))[-1].lower() == '.doc']
+    try:
+        converted = convert_docs_to_docx(doc_paths) if doc_paths else {}
+    except Exception as e:
+        print(f"Batch conversion failed: {e}")
+        converted = {}
+    return [read_text_file(path, converted.get(str(path)) if path else None, max_pages, max_chars, parallel)
+            for path in file_paths]
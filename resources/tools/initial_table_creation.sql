@@ -114,4 +114,14 @@ CREATE TABLE IF NOT EXISTS old_company_job_orders (
     job_description_path VARCHAR(255) NULL,
     notes_path VARCHAR(255) NULL,
     PRIMARY KEY (id)
-);
\ No newline at end of file
+);
+
+-- Create the 'custom_fields' table (fields users add to a single employee, client or job order)
+CREATE TABLE IF NOT EXISTS custom_fields (
+    entity_type ENUM('employee', 'client', 'job_order') NOT NULL,
+    entity_id INT NOT NULL,
+    field_name VARCHAR(64) NOT NULL,
+    field_value TEXT NULL,
+    PRIMARY KEY (entity_type, entity_id, field_name),
+    INDEX idx_custom_fields_field_name (field_name)
+);
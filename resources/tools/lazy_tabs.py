@@ -0,0 +1,34 @@
+from typing import Callable, Dict
+
+from PyQt5.QtWidgets import QTabWidget, QVBoxLayout, QWidget
+
+
+class LazyTabWidget(QTabWidget):
+    """
+    Tab widget that builds the content of a tab the first time it is shown.
+
+    Each tab is added with a factory instead of a widget. An empty page holds its place in the tab bar, and the
+    factory is only called when the tab is activated, so opening a dialog only pays for the tab that is visible.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._factories: Dict[QWidget, Callable[[], QWidget]] = {}
+        self.currentChanged.connect(self.buildTab)
+
+    def addLazyTab(self, factory: Callable[[], QWidget], icon, title: str) -> int:
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._factories[page] = factory
+        # Adding the first tab makes it current, which builds it right away
+        return self.addTab(page, icon, title)
+
+    def buildTab(self, index: int) -> None:
+        page = self.widget(index)
+        factory = self._factories.pop(page, None)
+        if factory is not None:
+            page.layout().addWidget(factory())
+
+    def isTabBuilt(self, index: int) -> bool:
+        return self.widget(index) not in self._factories
@@ -1,12 +1,14 @@
+import hashlib
 import json
 import sys
+import time
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Tuple, Any, Optional, Dict, Union
+from typing import Tuple, Any, Optional, Dict, Union, Callable, Iterator, List
 
 import mysql.connector
 from PyQt5.QtWidgets import *
-from PyQt5.QtGui import QIcon
 from mysql.connector import Error, MySQLConnection
 
 
@@ -25,6 +27,7 @@ application_path = str(resource_path(Path.cwd()))
 
 CONFIG_PATH = Path(Path(application_path, 'resources', 'tools', 'db_config.json'))
 TABLE_QUERIES_PATH = Path(Path(application_path, 'resources', 'tools', 'table_schemas.json'))
+SCHEMA_FINGERPRINT_PATH = Path(Path(application_path, 'resources', 'tools', 'schema_fingerprint.json'))
 
 
 def load_json_file(file_path: Path = CONFIG_PATH, file_type: str = "JSON file", skip_error_dlg: bool = False) \
@@ -100,6 +103,41 @@ def create_db_connection(config_path: Path = CONFIG_PATH) -> Optional[MySQLConne
         return None
 
 
+@contextmanager
+def db_transaction(config_path: Path = CONFIG_PATH) -> Iterator[Any]:
+    """
+    Runs several statements on one connection as a single transaction.
+
+    Unlike execute_query, no dialog is shown: errors are raised to the caller, which makes it safe to use from
+    background threads. The transaction is committed when the block exits normally and rolled back otherwise.
+
+    Yields:
+        MySQLCursorBuffered: Cursor to run the statements with.
+    """
+    config = load_json_file(config_path, "Database Configuration JSON file", skip_error_dlg=True)
+    if config is None:
+        raise Error("The database configuration could not be loaded.")
+
+    connection = mysql.connector.connect(
+        host=config['host'],
+        user=config['user'],
+        password=config['password'],
+        database=config['database'],
+        auth_plugin='mysql_native_password'
+    )
+    cursor = connection.cursor(buffered=True)
+    try:
+        connection.start_transaction()
+        yield cursor
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
 def get_column_indices(cursor):
     """
     Returns a list of column indices from the cursor description.
@@ -126,6 +164,19 @@ def get_column_names(cursor):
     return [col[0] for col in cursor.description]
 
 
+_query_listeners = []
+
+
+def add_query_listener(listener: Callable[[str, float], None]) -> None:
+    """Registers a callable that receives (query, seconds) after every execute_query call, e.g. the boot profiler."""
+    _query_listeners.append(listener)
+
+
+def remove_query_listener(listener: Callable[[str, float], None]) -> None:
+    if listener in _query_listeners:
+        _query_listeners.remove(listener)
+
+
 def execute_query(query: str, data: Tuple[Any, ...] = None, **kwargs) -> Union[Dict[str, Any], Any]:
     """
     Executes a SQL query with optional parameters and behaviors controlled by keyword arguments.
@@ -150,6 +201,7 @@ def execute_query(query: str, data: Tuple[Any, ...] = None, **kwargs) -> Union[D
         - The connection to the database is closed before returning unless 'return_cursor' is True.
         - If 'return_cursor' is True, the caller is responsible for managing the cursor and connection.
     """
+    started = time.perf_counter()
     connection = create_db_connection()
     result_dict = {}
 
@@ -188,16 +240,57 @@ def execute_query(query: str, data: Tuple[Any, ...] = None, **kwargs) -> Union[D
             cursor.close()
             connection.close()
 
+    for listener in _query_listeners:
+        listener(query, time.perf_counter() - started)
+
     if len(result_dict) == 1 and "result" in result_dict:
         return result_dict["result"]
     else:
         return result_dict
 
 
+def _schema_statement(definition: Union[str, List[str]]) -> str:
+    # table_schemas.json stores every statement as a list of lines
+    return "\n".join(definition) if isinstance(definition, list) else definition
+
+
+def load_schema_fingerprint(schema_path: Path = TABLE_QUERIES_PATH,
+                            cache_path: Path = SCHEMA_FINGERPRINT_PATH) -> Dict[str, str]:
+    """
+    Returns the SHA-256 of every table definition in table_schemas.json, in creation order.
+
+    The hashes are cached next to the schema file and keyed by the hash of the whole file, so the schema is only
+    parsed again after it changed.
+    """
+    schema_bytes = Path(schema_path).read_bytes()
+    file_hash = hashlib.sha256(schema_bytes).hexdigest()
+    cached = load_json_file(cache_path, skip_error_dlg=True)
+    if cached and cached.get("file") == file_hash:
+        return cached["tables"]
+
+    schemas = json.loads(schema_bytes)
+    tables = {name: hashlib.sha256(_schema_statement(definition).encode("utf-8")).hexdigest()
+              for name, definition in schemas.items()}
+    if cached:
+        # Existing tables are never altered, so a changed definition needs a manual migration
+        for name, table_hash in tables.items():
+            if name in cached.get("tables", {}) and cached["tables"][name] != table_hash:
+                print(f"The definition of table {name} changed; existing databases are not migrated automatically.")
+    try:
+        with open(cache_path, "w") as file:
+            json.dump({"file": file_hash, "tables": tables}, file, indent=2)
+    except OSError as e:
+        print(f"Could not cache the schema fingerprint: {e}")
+    return tables
+
+
 def check_database_and_tables(database: str, config_path: Path = CONFIG_PATH) -> bool:
     """
     Verifies the existence of the specified database and required tables. Attempts to create missing tables.
 
+    A healthy database costs a single information_schema query; missing tables are created in one batch on the
+    same connection, in the order of table_schemas.json so foreign keys resolve.
+
     Args:
         database (str): The name of the database to check and potentially create tables within.
         config_path (Path): The path to the JSON file containing database configurations.
@@ -209,19 +302,29 @@ def check_database_and_tables(database: str, config_path: Path = CONFIG_PATH) ->
     if connection is None:
         return False
 
+    cursor = None
     try:
-        tables = ["employees", "clients", "job_orders", "job2employer_ids",
-                  "old_employee_job_orders", "old_company_job_orders"]
-        for table in tables:
-            result = execute_query(f"SHOW TABLES LIKE '{table}';")
-            if not result:
-                print(f"Table {table} does not exist. Creating...")
-                create_table(table)
+        tables = list(load_schema_fingerprint())
+        cursor = connection.cursor(buffered=True)
+        placeholders = ", ".join(["%s"] * len(tables))
+        cursor.execute(f"SELECT TABLE_NAME FROM information_schema.TABLES "
+                       f"WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders})", (database, *tables))
+        existing = {row[0].lower() for row in cursor.fetchall()}
+        missing = [table for table in tables if table.lower() not in existing]
+
+        if missing:
+            print(f"Creating missing tables: {', '.join(missing)}")
+            queries = load_json_file(TABLE_QUERIES_PATH)
+            for table in missing:
+                cursor.execute(_schema_statement(queries[table]))
+            connection.commit()
         return True
-    except Error as e:
+    except (Error, KeyError, OSError, ValueError) as e:
         showCriticalMessage("Database Check Error", f"An error occurred: {e}")
         return False
     finally:
+        if cursor is not None:
+            cursor.close()
         if connection.is_connected():
             connection.close()
 
@@ -240,7 +343,7 @@ def create_table(table_name: str) -> None:
     query = queries.get(table_name)
     if query:
         try:
-            execute_query(query)
+            execute_query(_schema_statement(query))
             print(f"Table {table_name} checked/created successfully.")
         except Exception as e:
             QMessageBox.critical(None, "Table Creation Error", f"Error creating table '{table_name}': {e}")
@@ -249,9 +352,11 @@ def create_table(table_name: str) -> None:
 
 
 def showCriticalMessage(title, message):
+    from .assets import get_window_icon  # Imported here, assets imports this module
+
     dialog = QDialog()
     dialog.setWindowTitle(title)
-    dialog.setWindowIcon(QIcon(str(Path(application_path, 'resources', 'icons', 'crm-icon-high-seas.png'))))
+    dialog.setWindowIcon(get_window_icon())
     layout = QVBoxLayout()
 
     # Message Label with word wrap enabled
@@ -0,0 +1,183 @@
+import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Type
+
+from .mydb import execute_query
+
+# Text the edit dialogs show or accept for an empty value; stored as a real NULL
+NULL_TEXTS = ("", "N/A", "NULL", "None")
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y")
+# Returned by Repository.save when another user changed the row after the entity was loaded
+SAVE_CONFLICT = -2
+
+
+def coerce_value(text: Any, original: Any) -> Any:
+    """
+    Converts the text of a form field to the type of the value it replaces, so unchanged fields compare equal.
+
+    Raises:
+        ValueError: If the text is not a valid value of that type.
+    """
+    if text is None or (isinstance(text, str) and text.strip() in NULL_TEXTS):
+        return None
+    if not isinstance(text, str) or original is None or isinstance(original, str):
+        return text
+
+    text = text.strip()
+    if isinstance(original, bool):
+        return text.lower() in ("1", "true", "yes")
+    if isinstance(original, int):
+        return int(text)
+    if isinstance(original, Decimal):
+        try:
+            return Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"'{text}' is not a valid number.")
+    if isinstance(original, float):
+        return float(text)
+    if isinstance(original, datetime.date):
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+        raise ValueError(f"'{text}' is not a valid date (YYYY-MM-DD, DD/MM/YYYY or MM/DD/YYYY).")
+    return text
+
+
+class Entity:
+    """
+    A row of one table, with a snapshot of the values it was loaded with.
+
+    Values set from the edit dialogs are converted to the type of the stored value, and changes() only reports the
+    columns whose value actually differs from the snapshot.
+    """
+    table_name: str = ""
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values = dict(values)
+        self._original = dict(values)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._values
+
+    @property
+    def id(self):
+        return self._values.get("id")
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._values)
+
+    def get(self, column: str, default=None) -> Any:
+        return self._values.get(column, default)
+
+    def text(self, column: str) -> str:
+        """Returns a column as the text a form field shows for it, which set() reads back to the same value."""
+        value = self._values.get(column)
+        if value is None:
+            return ""
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        return str(value)
+
+    def original(self, column: str) -> Any:
+        """Returns the value a column had when the entity was loaded or last saved."""
+        return self._original.get(column)
+
+    def set(self, column: str, value: Any) -> None:
+        """
+        Sets a column from the value of a form field.
+
+        Raises:
+            KeyError: If the table has no such column.
+            ValueError: If the value cannot be converted to the type of the column.
+        """
+        if column not in self._values or column == "id":
+            raise KeyError(f"{self.table_name} has no editable column '{column}'")
+        try:
+            self._values[column] = coerce_value(value, self._original[column])
+        except ValueError as e:
+            raise ValueError(f"{column}: {e}") from e
+
+    def changes(self) -> Dict[str, Any]:
+        return {column: value for column, value in self._values.items() if value != self._original[column]}
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.changes())
+
+    def mark_clean(self) -> None:
+        self._original = dict(self._values)
+
+
+class Employee(Entity):
+    table_name = "employees"
+
+
+class Client(Entity):
+    table_name = "clients"
+
+
+class JobOrder(Entity):
+    table_name = "job_orders"
+
+
+class Repository:
+    """Loads entities of one table by id and saves their changed columns."""
+
+    def __init__(self, entity_class: Type[Entity]):
+        self.entity_class = entity_class
+
+    @property
+    def table_name(self) -> str:
+        return self.entity_class.table_name
+
+    def get(self, _id) -> Optional[Entity]:
+        """Returns the entity with the given id, or None when it does not exist or the query failed."""
+        result = execute_query(f"SELECT * FROM {self.table_name} WHERE id = %s", (_id,), get_column_names=True)
+        if not result or result.get("error") or result.get("result") is None:
+            return None
+        return self.entity_class(dict(zip(result["column_names"], result["result"])))
+
+    def save(self, entity: Entity) -> int:
+        """
+        Writes the changed columns of an entity in a single UPDATE.
+
+        The update only applies while those columns still hold the values the entity was loaded with, so a change
+        another user made in the meantime is never overwritten.
+
+        Returns:
+            int: The number of columns written; 0 when nothing changed. -1 when the update failed (the error has
+            already been shown by execute_query). SAVE_CONFLICT when another user changed one of the columns since
+            the entity was loaded; nothing is written then.
+        """
+        changes = entity.changes()
+        if not changes:
+            return 0
+        assignments = ", ".join(f"{column} = %s" for column in changes)
+        # <=> also matches NULL against NULL
+        conditions = "".join(f" AND {column} <=> %s" for column in changes)
+        result = execute_query(f"UPDATE {self.table_name} SET {assignments} WHERE id = %s{conditions}",
+                               (*changes.values(), entity.id, *(entity.original(column) for column in changes)))
+        if result.get("error"):
+            return -1
+        if not result.get("affected_rows"):
+            # No row is reported either when another user already saved the very same values
+            current = self.get(entity.id)
+            if current is None or any(current.get(column) != value for column, value in changes.items()):
+                return SAVE_CONFLICT
+        entity.mark_clean()
+        return len(changes)
+
+
+employees = Repository(Employee)
+clients = Repository(Client)
+job_orders = Repository(JobOrder)
+
+_REPOSITORIES = {repository.table_name: repository for repository in (employees, clients, job_orders)}
+
+
+def repository_for(table_name: str) -> Repository:
+    """Returns the repository of a table, e.g. the one a dialog was opened for."""
+    return _REPOSITORIES[table_name]
@@ -0,0 +1,86 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .mydb import TABLE_QUERIES_PATH, execute_query, load_json_file
+
+# First word of the lines of a table definition that declare a key or constraint rather than a column
+CONSTRAINT_KEYWORDS = ("PRIMARY", "FOREIGN", "UNIQUE", "KEY", "INDEX", "CONSTRAINT", "CHECK")
+
+
+def parse_defined_columns(definition: List[str]) -> List[str]:
+    """Returns the column names declared in the CREATE TABLE lines of table_schemas.json."""
+    columns = []
+    for line in definition:
+        # Columns and constraints are the indented lines between "CREATE TABLE ... (" and ");"
+        if not line.startswith("    ") or not line.strip():
+            continue
+        name = line.split()[0].strip("`")
+        if name.upper() not in CONSTRAINT_KEYWORDS:
+            columns.append(name)
+    return columns
+
+
+class SchemaMetadata:
+    """
+    In-memory copy of the table definitions of table_schemas.json and of the live column lists of the database.
+
+    Both are loaded on first use. The app never alters its tables (fields users add live in custom_fields), so the
+    column lists are kept for the life of the process; call invalidate() after changing a table from outside the
+    app. Only used from the GUI thread.
+    """
+
+    def __init__(self, schema_path: Path = TABLE_QUERIES_PATH):
+        self.schema_path = schema_path
+        self._defined: Optional[Dict[str, List[str]]] = None
+        self._live: Dict[str, List[str]] = {}
+
+    def defined_columns(self, table_name: str) -> List[str]:
+        """Returns the columns table_schemas.json declares for a table, or an empty list for an unknown table."""
+        if self._defined is None:
+            table_schemas = load_json_file(self.schema_path, "Table schema file") or {}
+            self._defined = {table: parse_defined_columns(definition)
+                             for table, definition in table_schemas.items() if isinstance(definition, list)}
+        return self._defined.get(table_name, [])
+
+    def live_columns(self, table_name: str) -> List[str]:
+        """Returns the columns the table has in the database. A failed lookup is not cached."""
+        if table_name not in self._live:
+            result = execute_query(f"SHOW COLUMNS FROM {table_name}", fetch_mode="all", skip_SELECT=True)
+            if isinstance(result, dict):
+                return []
+            self._live[table_name] = [row[0] for row in result]
+        return self._live[table_name]
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        return column_name.lower() in (column.lower() for column in self.live_columns(table_name))
+
+    def extra_columns(self, table_name: str, actual_columns: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Returns the columns added to a table by users, i.e. the ones not declared in table_schemas.json.
+
+        Args:
+            table_name (str): The table to inspect.
+            actual_columns (Optional[Iterable[str]]): The columns of a row that was just read (e.g. by a card
+                loader). The cached live column list is used when omitted.
+        """
+        if actual_columns is None:
+            actual_columns = self.live_columns(table_name)
+        return set(actual_columns) - set(self.defined_columns(table_name))
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Forgets the live columns of one table, or of all of them. The table definitions only change on disk."""
+        if table_name is None:
+            self._live.clear()
+        else:
+            self._live.pop(table_name, None)
+
+
+_schema_metadata = None
+
+
+def get_schema_metadata() -> SchemaMetadata:
+    """Returns the schema metadata shared by all cards and dialogs."""
+    global _schema_metadata
+    if _schema_metadata is None:
+        _schema_metadata = SchemaMetadata()
+    return _schema_metadata
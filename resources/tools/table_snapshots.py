@@ -0,0 +1,179 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtWidgets import QHeaderView, QTableWidgetItem
+
+from .background import run_in_background
+from .helpful_functions import read_output_directory
+from .mydb import application_path, db_transaction
+
+SNAPSHOT_DIR_NAME = "snapshots"
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(name: str) -> Path:
+    """Returns the snapshot file of a page, kept in the output directory (or next to the application)."""
+    return Path(read_output_directory() or application_path, SNAPSHOT_DIR_NAME, f"{name}.json.gz")
+
+
+def save_table_snapshot(name: str, query: str, columns: List[str], rows: List[List[str]]) -> Path:
+    """
+    Saves the rows a page displayed as a gzip-compressed, column-oriented JSON file.
+
+    Columns compress much better than rows since the values of a column repeat (availability, state, ...). The file is
+    written under a temporary name and moved into place, so a crash never leaves a truncated snapshot behind.
+    """
+    path = snapshot_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved": datetime.now().isoformat(timespec="seconds"),
+        "query": query,
+        "columns": columns,
+        "values": [[row[index] for row in rows] for index in range(len(columns))]
+    }
+    tmp_path = path.with_name(path.name + ".partial")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=5) as file:
+        json.dump(snapshot, file, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_table_snapshot(name: str, query: str, columns: List[str]) -> Optional[Dict]:
+    """
+    Loads the snapshot of a page.
+
+    Returns:
+        Optional[Dict]: {"saved": ISO timestamp, "rows": list of rows}, or None when there is no usable snapshot
+        (missing, unreadable, or taken with another query or other columns).
+    """
+    path = snapshot_path(name)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if (snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("query") != query
+            or snapshot.get("columns") != columns):
+        return None
+    return {"saved": snapshot.get("saved"), "rows": [list(row) for row in zip(*snapshot["values"])]}
+
+
+def fetch_table_rows(query: str, columns: List[str],
+                     formatters: Optional[Dict[str, Callable]] = None) -> List[List[str]]:
+    """
+    Runs a page query and returns its rows as the strings the table displays, in the order of columns.
+
+    Safe to call from a worker thread: errors are raised instead of shown in a dialog.
+    """
+    formatters = formatters or {}
+    with db_transaction() as cursor:
+        cursor.execute(query)
+        indices = [cursor.column_names.index(column) for column in columns]
+        records = cursor.fetchall()
+
+    rows = []
+    for record in records:
+        row = []
+        for column, index in zip(columns, indices):
+            value = record[index]
+            if column in formatters:
+                value = formatters[column](value)
+            row.append(str(value))
+        rows.append(row)
+    return rows
+
+
+class SnapshotTableLoader(QObject):
+    """
+    Fills a page table from its last snapshot at once, then refreshes it from the database in the background.
+
+    The snapshot is shown with the status label reading "Refreshing..."; once the query returns, the table is
+    replaced with the live rows and a new snapshot is written. refreshing is emitted with True when a query starts
+    and False once the live rows are shown, so the page can keep editing and deleting disabled while the rows may
+    be stale. A failed refresh leaves them disabled until a later load succeeds.
+    """
+    refreshing = pyqtSignal(bool)
+    loaded = pyqtSignal()
+
+    def __init__(self, tableWidget, statusLabel, editable: bool = True, parent=None):
+        super().__init__(parent)
+        self.tableWidget = tableWidget
+        self.statusLabel = statusLabel
+        self.editable = editable
+        self.statusLabel.hide()
+        self._task = None
+        self._generation = 0
+
+    def load(self, name: str, query: str, formatters: Optional[Dict[str, Callable]] = None) -> None:
+        """Shows the snapshot of the page (if the table is still empty) and starts the database refresh."""
+        columns = list(self.tableWidget.headers.keys())
+        if self.tableWidget.rowCount() == 0:
+            snapshot = load_table_snapshot(name, query, columns)
+            if snapshot is not None:
+                self.fillTable(columns, snapshot["rows"])
+
+        # Only the newest refresh may update the table
+        self._generation += 1
+        generation = self._generation
+        if self._task is not None:
+            self._task.cancel()
+
+        self.statusLabel.setStyleSheet("color: gray; font-style: italic;")
+        self.statusLabel.setText("Refreshing...")
+        self.statusLabel.show()
+        self.refreshing.emit(True)
+        self._task = run_in_background(
+            fetch_table_rows, query, columns, formatters,
+            on_finished=lambda rows: self.onRefreshed(generation, name, query, columns, rows),
+            on_failed=lambda message: self.onRefreshFailed(generation, message))
+
+    def onRefreshed(self, generation, name, query, columns, rows):
+        if generation != self._generation:
+            return
+        self._task = None
+        self.fillTable(columns, rows)
+        self.statusLabel.hide()
+        self.refreshing.emit(False)
+        self.loaded.emit()
+        run_in_background(save_table_snapshot, name, query, columns, rows,
+                          on_failed=lambda message: print(f"Could not save the {name} snapshot: {message}"))
+
+    def onRefreshFailed(self, generation, message):
+        if generation != self._generation:
+            return
+        self._task = None
+        self.statusLabel.setStyleSheet("color: #d9534f;")
+        if self.tableWidget.rowCount():
+            self.statusLabel.setText(f"Could not refresh from the database, showing saved data: {message}")
+        else:
+            self.statusLabel.setText(f"Could not load from the database: {message}")
+        # The rows shown are still the snapshot, so refreshing is not reset and editing stays disabled
+
+    def fillTable(self, columns, rows):
+        table = self.tableWidget
+        table.setUpdatesEnabled(False)
+        try:
+            table.setRowCount(0)
+            table.setRowCount(len(rows))
+            for row, values in enumerate(rows):
+                for column, value in enumerate(values):
+                    item = QTableWidgetItem(value)
+                    item.setToolTip(value)
+                    if not self.editable:
+                        item.setFlags(item.flags() ^ Qt.ItemIsEditable)
+                    table.setItem(row, column, item)
+            if "id" in columns:
+                table.hideColumn(columns.index("id"))
+            table.resizeColumnsToContents()
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        finally:
+            table.setUpdatesEnabled(True)
@@ -39,6 +39,19 @@ class DBConnector:
             print(f"ERROR: Cannot execute query: {e}")
             raise e
 
+    def execute_insert(self, query, params=None):
+        """Execute an INSERT and return the id of the new row."""
+        self.connect()
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(query, params)
+                self.connection.commit()
+                return cursor.lastrowid
+        except pymysql.MySQLError as e:
+            self.connection.rollback()
+            print(f"ERROR: Cannot execute query: {e}")
+            raise e
+
     def close(self):
         """Close the database connection."""
         if self.connection:
@@ -0,0 +1,30 @@
+import os
+from multiprocessing.managers import BaseManager
+
+EXTRACTION_HOST = os.environ.get('CRM_EXTRACTION_HOST', '127.0.0.1')
+EXTRACTION_PORT = int(os.environ.get('CRM_EXTRACTION_PORT', 50731))
+
+
+class ExtractionClient(BaseManager):
+    """Client side of the shared extraction service (resources/tools/extraction_service.py)."""
+
+
+ExtractionClient.register('get_service')
+
+
+def connect_extraction_service():
+    """
+    Connects to the running extraction service and returns a proxy to it.
+
+    Start the service with `python -m resources.tools.extraction_service` from the CRM root. The proxy exposes
+    extract(file_path), extract_many(file_paths), index_document(id, file_path), store_document(file_path) and
+    stats(); parsing happens in the service's worker processes, never in the web request threads. Both sides must
+    have the same secret in CRM_EXTRACTION_AUTHKEY; there is no default.
+    """
+    authkey = os.environ.get('CRM_EXTRACTION_AUTHKEY', '')
+    if not authkey:
+        raise RuntimeError('Set CRM_EXTRACTION_AUTHKEY to the secret of the extraction service.')
+    client = ExtractionClient(address=(EXTRACTION_HOST, EXTRACTION_PORT), authkey=authkey.encode('utf-8'))
+    client.connect()
+    return client.get_service()
+
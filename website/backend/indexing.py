@@ -0,0 +1,75 @@
+import os
+import queue
+import threading
+import time
+
+from database.db_connector import DBConnector
+from extraction_client import connect_extraction_service
+
+
+class ResumeIndexer:
+    """
+    Background worker that hands new resumes to the extraction service for indexing.
+
+    Requests only enqueue (employee id, resume path) pairs and return. A single daemon thread sends them to the
+    extraction service: a staged upload is first moved into the CRM document store and the employee row is pointed
+    at it, then the service extracts the text in its worker processes and adds it to the employees ranking index.
+    """
+
+    def __init__(self, retries=3):
+        self.retries = retries
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._service = None
+        self._db = None
+
+    def enqueue(self, employee_id, resume_path):
+        """Queues a resume for indexing, starting the worker thread on first use."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='resume-indexer', daemon=True)
+                self._thread.start()
+        self._jobs.put((employee_id, resume_path))
+
+    def pending(self):
+        return self._jobs.qsize()
+
+    def _run(self):
+        while True:
+            employee_id, resume_path = self._jobs.get()
+            for attempt in range(1, self.retries + 1):
+                try:
+                    if self._service is None:
+                        self._service = connect_extraction_service()
+                    if not resume_path.startswith('docstore://'):
+                        resume_path = self._store(employee_id, resume_path)
+                    self._service.index_document(employee_id, resume_path)
+                    break
+                except (ConnectionError, EOFError, OSError) as e:
+                    # The service was restarted or is not running; reconnect on the next attempt
+                    self._service = None
+                    print(f"ERROR: Cannot reach the extraction service (attempt {attempt}): {e}")
+                    time.sleep(2 ** attempt)
+                except Exception as e:
+                    print(f"ERROR: Cannot index the resume of employee {employee_id}: {e}")
+                    break
+            self._jobs.task_done()
+
+
+    def _store(self, employee_id, staged_path):
+        """Moves an upload into the CRM document store and saves the returned reference on the employee."""
+        reference = self._service.store_document(staged_path)
+        if self._db is None:
+            self._db = DBConnector()  # The request threads' connection is not shared with this thread
+        # Only replaced while the row still points at the upload, in case the resume was changed from the CRM
+        self._db.execute_query("UPDATE employees SET resume_path = %s WHERE id = %s AND resume_path = %s",
+                               (reference, employee_id, staged_path))
+        try:
+            os.remove(staged_path)
+        except OSError:
+            pass
+        return reference
+
+
+resume_indexer = ResumeIndexer()
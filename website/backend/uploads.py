@@ -0,0 +1,57 @@
+import hashlib
+import os
+import tempfile
+
+from werkzeug.utils import secure_filename
+
+ALLOWED_RESUME_EXTENSIONS = {'.pdf', '.doc', '.docx', '.txt'}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an uploaded file is bigger than the allowed size."""
+
+
+class UnsupportedUpload(Exception):
+    """Raised when an uploaded file has an extension the CRM cannot read."""
+
+
+def save_upload(file_storage, upload_folder, max_bytes):
+    """
+    Streams an uploaded file to disk in chunks, enforcing the size cap and hashing it on the way.
+
+    The file is written to a temporary name and only moved into place once it is complete, under
+    "<sha256 prefix>_<sanitized name>", so re-uploading the same resume reuses the same file.
+
+    Returns:
+        tuple: (absolute path of the saved file, sha256 hex digest, size in bytes)
+    """
+    filename = secure_filename(file_storage.filename or '')
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in ALLOWED_RESUME_EXTENSIONS:
+        raise UnsupportedUpload(f"Resumes must be one of: {', '.join(sorted(ALLOWED_RESUME_EXTENSIONS))}.")
+
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=upload_folder, prefix='.upload_', suffix=extension)
+    try:
+        with os.fdopen(file_descriptor, 'wb') as destination:
+            while True:
+                chunk = file_storage.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Resumes may be at most {max_bytes // (1024 * 1024)} MB.")
+                digest.update(chunk)
+                destination.write(chunk)
+
+        checksum = digest.hexdigest()
+        saved_path = os.path.abspath(os.path.join(upload_folder, f"{checksum[:16]}_{filename}"))
+        os.replace(tmp_path, saved_path)
+        return saved_path, checksum, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise